@@ -0,0 +1,195 @@
+"""
+Vectorized evaluation of many boards at once.
+
+Boards are stacked into a (B, m, n) int8 array with EMPTY, X_CODE and O_CODE
+codes. evaluate_batch() counts the marks on every winning line of every board
+-- each window of k squares in a row, k = n for the classic n x n game -- and
+scores the whole stack in a few NumPy operations, giving the same heuristic
+score, terminal flag, winner and utility as GenGameBoard.get_est_utility(),
+is_terminal(), check_for_win() and get_utility(). The windows are counted by
+gathering them through the precomputed window index table, or by convolution
+(see windows.py).
+
+Run this module directly to measure throughput in boards/second, for n x n
+boards won by n in a row (--sizes) and for m x n boards won by k (--geometries):
+
+    python batch_eval.py --sizes 3 4 5 --batches 1000 10000 100000 1000000
+    python batch_eval.py --sizes --geometries 7x7:4 15x15:5 --batches 1000 10000
+"""
+
+import argparse
+import collections
+import time
+
+import numpy as np
+
+from mp2 import GenGameBoard
+from windows import count_windows, get_window_index
+
+# Codes of the (B, n, n) int8 board array
+EMPTY = 0
+X_CODE = 1
+O_CODE = 2
+
+# Boards evaluated per NumPy pass, which bounds the temporary memory
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# Window squares gathered per NumPy pass; larger boards get smaller chunks
+CHUNK_CELLS = 1 << 20
+
+# Results of evaluate_batch(), one array entry per board
+BatchResult = collections.namedtuple('BatchResult', ['scores', 'terminal', 'winner', 'utility'])
+
+
+def encode_marks(marks):
+    """
+    Converts an (m, n) array of marks (or a GenGameBoard) into the int8 board codes.
+    Marks other than X and O count as empty.
+    """
+    if isinstance(marks, GenGameBoard):
+        marks = marks.marks
+    marks = np.asarray(marks)
+    codes = np.zeros(marks.shape, dtype=np.int8)
+    codes[marks == GenGameBoard.PLAYER] = X_CODE
+    codes[marks == GenGameBoard.COMPUTER] = O_CODE
+    return codes
+
+
+def evaluate_chunk(boards, win_length, convolution=False):
+    """
+    Evaluates a (B, m, n) array of boards won by win_length in a row, counting the
+    windows by convolution if set, else through the window index table.
+    Returns the (scores, terminal, winner) arrays described in evaluate_batch().
+    """
+    num_rows, num_cols = boards.shape[1:]
+    flat_boards = boards.reshape(len(boards), num_rows * num_cols)
+    powers = 10 ** np.arange(win_length + 1, dtype=np.int64)
+
+    if convolution:
+        num_x = count_windows(boards == X_CODE, win_length)
+        num_o = count_windows(boards == O_CODE, win_length)
+    else:
+        # (B, lines, k) marks on each line, then the X and O count of each line.
+        on_lines = flat_boards[:, get_window_index(num_rows, win_length, num_cols)]
+        num_x = np.count_nonzero(on_lines == X_CODE, axis=2)
+        num_o = np.count_nonzero(on_lines == O_CODE, axis=2)
+
+    x_won = (num_x == win_length).any(axis=1)
+    o_won = (num_o == win_length).any(axis=1)
+    full = (flat_boards != EMPTY).all(axis=1)
+
+    scores = (powers[num_o] - powers[num_x]).sum(axis=1)
+    winner = np.where(x_won, X_CODE, np.where(o_won, O_CODE, EMPTY)).astype(np.int8)
+    return scores, x_won | o_won | full, winner
+
+
+def evaluate_batch(boards, chunk_size=DEFAULT_CHUNK_SIZE, win_length=None, convolution=False):
+    """
+    Evaluates a (B, m, n) int8 stack of boards won by win_length in a row (default:
+    the shorter side), counting the windows by convolution if set, else through the
+    window index table, and returns a BatchResult of:
+        scores  -- int64 heuristic score (get_est_utility; also given for finished boards)
+        terminal -- bool, the board is won by either side or full (is_terminal)
+        winner -- int8, X_CODE or O_CODE for the winning side, EMPTY if none; X is reported
+                  when both sides have a line, as get_utility() checks X first
+        utility -- int64 utility of the board (get_utility: -10^max(m, n), 10^max(m, n)
+                   or 0)
+    """
+    boards = np.asarray(boards, dtype=np.int8)
+    num_boards, num_rows, num_cols = boards.shape
+    if win_length is None:
+        win_length = min(num_rows, num_cols)
+
+    # Evaluate chunk_size boards at a time (fewer when each has many windows) to bound
+    # the temporary arrays.
+    window_cells = get_window_index(num_rows, win_length, num_cols).size
+    chunk_size = max(1, min(chunk_size, CHUNK_CELLS // max(window_cells, 1)))
+    scores = np.empty(num_boards, dtype=np.int64)
+    terminal = np.empty(num_boards, dtype=bool)
+    winner = np.empty(num_boards, dtype=np.int8)
+    for start in range(0, num_boards, chunk_size):
+        end = min(start + chunk_size, num_boards)
+        scores[start:end], terminal[start:end], winner[start:end] = \
+            evaluate_chunk(boards[start:end], win_length, convolution)
+
+    utility = np.zeros(num_boards, dtype=np.int64)
+    utility[winner == X_CODE] = -10 ** max(num_rows, num_cols)
+    utility[winner == O_CODE] = 10 ** max(num_rows, num_cols)
+    return BatchResult(scores, terminal, winner, utility)
+
+
+def random_boards(num_boards, board_size, generator, num_cols=None):
+    """
+    Returns a (B, m, n) stack of boards (m = board_size, n = num_cols, square by
+    default) with each square empty, X or O at random.
+    """
+    num_cols = board_size if num_cols is None else num_cols
+    return generator.integers(0, 3, size=(num_boards, board_size, num_cols), dtype=np.int8)
+
+
+def evaluate_loop(boards, win_length=None):
+    """
+    Evaluates the boards one at a time with GenGameBoard, for comparison.
+    Returns the list of (score, terminal) pairs.
+    """
+    symbols = np.array([' ', GenGameBoard.PLAYER, GenGameBoard.COMPUTER])
+    results = []
+    for codes in boards:
+        board = GenGameBoard(codes.shape[0], win_length, codes.shape[1])
+        board.marks = symbols[codes]
+        results.append((board.est_points, board.is_terminal()))
+    return results
+
+
+def parse_geometry(text):
+    """ Parses 'MxN:K' (or 'MxN' for k = min(m, n)) into (rows, win_length, cols). """
+    size, _, win_length = text.partition(':')
+    num_rows, _, num_cols = size.partition('x')
+    num_rows = int(num_rows)
+    num_cols = int(num_cols) if num_cols else num_rows
+    win_length = int(win_length) if win_length else min(num_rows, num_cols)
+    return num_rows, win_length, num_cols
+
+
+def time_batch(boards, win_length, convolution):
+    """ Returns the boards/second of evaluate_batch() on the boards. """
+    start = time.perf_counter()
+    evaluate_batch(boards, win_length=win_length, convolution=convolution)
+    return len(boards) / (time.perf_counter() - start)
+
+
+def main():
+    """ Measures boards/second of evaluate_batch() against a GenGameBoard loop. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='*', default=[3, 4, 5],
+                        help='n x n boards won by n in a row')
+    parser.add_argument('--geometries', type=parse_geometry, nargs='*', default=[],
+                        help='m x n boards won by k in a row, as MxN:K')
+    parser.add_argument('--batches', type=int, nargs='+',
+                        default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--loop-boards', type=int, default=2000,
+                        help='boards timed with the GenGameBoard loop')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    generator = np.random.default_rng(args.seed)
+
+    print(f"{'board':>8} {'boards':>9} {'index boards/s':>15} {'conv boards/s':>14} "
+          f"{'loop boards/s':>14}")
+    geometries = [(size, size, size) for size in args.sizes] + args.geometries
+    for num_rows, win_length, num_cols in geometries:
+        name = f'{num_rows}x{num_cols}:{win_length}'
+        boards = random_boards(args.loop_boards, num_rows, generator, num_cols)
+        start = time.perf_counter()
+        evaluate_loop(boards, win_length)
+        loop_rate = len(boards) / (time.perf_counter() - start)
+
+        for num_boards in args.batches:
+            boards = random_boards(num_boards, num_rows, generator, num_cols)
+            index_rate = time_batch(boards, win_length, False)
+            convolution_rate = time_batch(boards, win_length, True)
+            print(f"{name:>8} {num_boards:>9} {index_rate:>15.0f} {convolution_rate:>14.0f} "
+                  f"{loop_rate:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Search benchmark suite over fixed position sets.
+
+Each board size has an opening, a midgame and a near-terminal set of positions
+(all with O to move) and a search depth. run_benchmarks() searches every
+position with max_value() and records the wall time (best of several runs),
+the nodes visited, the cutoff counters and nodes/second, as JSON.
+
+Node counts do not depend on the machine, so the stored baseline doubles as a
+set of golden node counts: any change to them means the search itself changed.
+Times are compared with a regression threshold.
+
+    python benchmark.py --output results.json
+    python benchmark.py --baseline benchmark_baseline.json --threshold 0.15
+    python benchmark.py --save-baseline benchmark_baseline.json
+
+With --baseline the exit status is 1 when any position got slower than the
+threshold allows or visits more nodes. --with-stats gathers a SearchStats in
+every search and adds it to the report, so comparing against a baseline taken
+without it measures what the statistics cost.
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+
+import numpy as np
+
+from mp2 import GenGameBoard, SearchContext
+from search_stats import SearchStats
+
+# Positions per board size and set, as rows with '.' for an empty square.
+BENCHMARK_SETS = {
+    3: {
+        'max_depth': 9,
+        'opening': {
+            'corner': ('X..', '...', '...'),
+            'center': ('...', '.X.', '...'),
+            'edge': ('.X.', '...', '...')
+        },
+        'midgame': {
+            'corner reply': ('X..', '.O.', '..X'),
+            'edge reply': ('.X.', 'O..', '..X'),
+            'crossed': ('O.X', '.X.', '...')
+        },
+        'near_terminal': {
+            'double threat': ('XO.', 'XX.', '..O'),
+            'can win': ('XOX', 'XO.', '...'),
+            'last squares': ('XOX', 'XO.', 'O.X')
+        }
+    },
+    4: {
+        'max_depth': 4,
+        'opening': {
+            'corner': ('X...', '....', '....', '....'),
+            'inner': ('....', '.X..', '....', '....')
+        },
+        'midgame': {
+            'diagonal': ('X...', '.O..', '..X.', 'O..X'),
+            'scattered': ('.X..', 'O..X', '..O.', 'X...')
+        },
+        'near_terminal': {
+            'crowded': ('XOXO', 'OX.X', 'X.OO', 'OXX.'),
+            'must block': ('XXX.', 'OO..', 'XO..', '.X.O'),
+            'open lines': ('XO..', '.XO.', '..O.', 'X..X')
+        }
+    },
+    5: {
+        'max_depth': 3,
+        'opening': {
+            'corner': ('X....', '.....', '.....', '.....', '.....'),
+            'center': ('.....', '.....', '..X..', '.....', '.....')
+        },
+        'midgame': {
+            'scattered': ('X....', '.O.O.', '..X..', '...O.', 'X...X')
+        },
+        'near_terminal': {
+            'crowded': ('XOXOX', 'OXOXO', 'X.O.X', 'OX.XO', 'XO...')
+        }
+    }
+}
+
+# Names of the position sets of each size
+SET_NAMES = ('opening', 'midgame', 'near_terminal')
+
+# Counters recorded for each position
+COUNTERS = ('num_nodes', 'num_pruned', 'utility_max', 'utility_min')
+
+# Positions searched faster than this in the baseline are too noisy to time on their own;
+# they still count towards the total time.
+MIN_TIMED_SECONDS = 0.005
+
+
+def make_board(rows):
+    """ Returns a GenGameBoard holding the rows ('.' for an empty square). """
+    board = GenGameBoard(len(rows))
+    board.marks = np.array([[' ' if mark == '.' else mark for mark in row] for row in rows])
+    return board
+
+
+def run_position(rows, max_depth, repeats, with_stats=False):
+    """
+    Searches one position repeats times and returns its result dict; seconds is the
+    fastest run. With with_stats, each search gathers a SearchStats and the last one
+    is included in the result.
+    """
+    board = make_board(rows)
+    seconds = math.inf
+    for _ in range(repeats):
+        context = SearchContext(max_depth, stats=SearchStats() if with_stats else None)
+        start = time.perf_counter()
+        value, action = board.max_value(-math.inf, math.inf, context)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    result = {name: getattr(context, name) for name in COUNTERS}
+    result.update(seconds=round(seconds, 6),
+                  nodes_per_second=round(context.num_nodes / seconds),
+                  value=int(value), action=[int(action[0]), int(action[1])])
+    if with_stats:
+        context.stats.finish(context.get_stats(), seconds)
+        result['stats'] = context.stats.to_dict()
+    return result
+
+
+def run_benchmarks(sizes=(3, 4, 5), set_names=SET_NAMES, repeats=3, with_stats=False):
+    """
+    Runs the benchmark positions of the sizes and sets. Returns the JSON-ready report:
+    machine details and one result per position, keyed 'size/set/name'.
+    """
+    results = {}
+    for size in sizes:
+        benchmark_set = BENCHMARK_SETS[size]
+        for set_name in set_names:
+            for name, rows in benchmark_set[set_name].items():
+                result = run_position(rows, benchmark_set['max_depth'], repeats, with_stats)
+                result['max_depth'] = benchmark_set['max_depth']
+                results[f'{size}/{set_name}/{name}'] = result
+    return {
+        'machine': {'python': platform.python_version(), 'numpy': np.__version__,
+                    'platform': platform.platform(), 'repeats': repeats},
+        'results': results
+    }
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Compares two reports position by position, and their total time.
+    Returns (regressions, changes): lines describing positions that got slower by more
+    than the threshold (a fraction) or visit more nodes, and other node count changes.
+    """
+    regressions, changes = [], []
+    total, expected_total = 0, 0
+    for key, result in current['results'].items():
+        expected = baseline['results'].get(key)
+        if expected is None:
+            changes.append(f"{key}: not in the baseline")
+            continue
+        total, expected_total = total + result['seconds'], expected_total + expected['seconds']
+
+        if result['num_nodes'] > expected['num_nodes']:
+            regressions.append(f"{key}: {result['num_nodes']} nodes, "
+                               f"baseline {expected['num_nodes']}")
+        elif result['num_nodes'] < expected['num_nodes']:
+            changes.append(f"{key}: {result['num_nodes']} nodes, "
+                           f"baseline {expected['num_nodes']}")
+        if expected['seconds'] >= MIN_TIMED_SECONDS \
+                and result['seconds'] > expected['seconds'] * (1 + threshold):
+            regressions.append(f"{key}: {result['seconds']:.4f}s, "
+                               f"baseline {expected['seconds']:.4f}s "
+                               f"(+{result['seconds'] / expected['seconds'] - 1:.0%})")
+
+    if expected_total and total > expected_total * (1 + threshold):
+        regressions.append(f"total: {total:.4f}s, baseline {expected_total:.4f}s "
+                           f"(+{total / expected_total - 1:.0%})")
+    return regressions, changes
+
+
+def print_report(report):
+    """ Prints one line per position of a report. """
+    print(f"{'position':<32} {'nodes':>9} {'pruned':>7} {'u_max':>6} {'u_min':>6} "
+          f"{'time':>9} {'nodes/s':>9}")
+    for key, result in report['results'].items():
+        print(f"{key:<32} {result['num_nodes']:>9} {result['num_pruned']:>7} "
+              f"{result['utility_max']:>6} {result['utility_min']:>6} "
+              f"{result['seconds']:>8.4f}s {result['nodes_per_second']:>9}")
+
+
+def main():
+    """ Runs the benchmark suite and compares it with a baseline. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 4, 5],
+                        choices=sorted(BENCHMARK_SETS))
+    parser.add_argument('--sets', nargs='+', default=list(SET_NAMES), choices=SET_NAMES)
+    parser.add_argument('--repeats', type=int, default=3, help='runs per position (best kept)')
+    parser.add_argument('--output', help='write the report as JSON to this file')
+    parser.add_argument('--baseline', help='JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='allowed slowdown as a fraction of the baseline time')
+    parser.add_argument('--save-baseline', help='write the report as the new baseline')
+    parser.add_argument('--with-stats', action='store_true',
+                        help='gather a SearchStats in every search')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.sets, args.repeats, args.with_stats)
+    print_report(report)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as report_file:
+                json.dump(report, report_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions, changes = compare_results(baseline, report, args.threshold)
+        for line in changes:
+            print(f"changed: {line}")
+        for line in regressions:
+            print(f"REGRESSION: {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.baseline} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Bitboard backend for GenGameBoard.
+
+The X and O marks are stored as two integer bitmasks (bit row * n + col), so
+placing, clearing and testing a mark during search is a couple of integer
+operations instead of NumPy element indexing.
+
+Run this module directly to benchmark search speed (nodes/second) against the
+string-array board:
+
+    python bitboard.py --sizes 3 4 5 6
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from mp2 import GenGameBoard, SearchContext
+from symmetry import unique_actions
+
+
+# Counts the set bits of a non-negative integer (int.bit_count needs Python 3.10+)
+bit_count = getattr(int, 'bit_count', lambda bits: bin(bits).count('1'))
+
+
+def get_win_masks(board_size):
+    """
+    Builds the bitmask of every winning line (rows, columns and both diagonals)
+    for a board of the given size.
+    """
+    masks = []
+
+    # Each row and each column.
+    for i in range(board_size):
+        row_mask = 0
+        col_mask = 0
+        for j in range(board_size):
+            row_mask |= 1 << (i * board_size + j)
+            col_mask |= 1 << (j * board_size + i)
+        masks.append(row_mask)
+        masks.append(col_mask)
+
+    # The main diagonal and the other diagonal.
+    main_diagonal = 0
+    other_diagonal = 0
+    for i in range(board_size):
+        main_diagonal |= 1 << (i * board_size + i)
+        other_diagonal |= 1 << ((board_size - 1 - i) * board_size + i)
+    masks.append(main_diagonal)
+    masks.append(other_diagonal)
+
+    return masks
+
+
+class BitBoard(GenGameBoard):  # pylint: disable=too-many-instance-attributes
+    """
+    GenGameBoard backend that keeps X and O as integer bitmasks.
+    Any other non-blank mark (as used by some tests) only blocks its square.
+    """
+
+    def __init__(self, board_size, win_length=None, num_cols=None):
+        """
+        Constructor method - initializes the bitmasks and the winning line masks.
+        Only n x n boards won by n in a row are supported; the other arguments of
+        GenGameBoard are accepted but must match that.
+        """
+        if win_length not in (None, board_size) or num_cols not in (None, board_size):
+            raise ValueError('BitBoard only supports n x n boards won by n in a row')
+        self.x_bits = 0
+        self.o_bits = 0
+        self.blocked_bits = 0
+        self.full_bits = (1 << (board_size * board_size)) - 1
+        self.win_masks = get_win_masks(board_size)
+        self.num_won = {GenGameBoard.PLAYER: 0, GenGameBoard.COMPUTER: 0}
+
+        # The winning line masks through each square (at most 4).
+        self.masks_through = [[mask for mask in self.win_masks if mask >> square & 1]
+                              for square in range(board_size * board_size)]
+        super().__init__(board_size)
+
+        # The mask of each winning line in win_lines order, for get_line_counts().
+        self.line_masks = [sum(1 << (row * board_size + col) for row, col in line)
+                           for line in self.win_lines]
+
+    @property
+    def marks(self):
+        """
+        Renders the bitmasks as the (n, n) array of marks used by GenGameBoard.
+        The array is a copy; change the board through make_move/place/undo.
+        """
+        size = self.board_size
+        marks = np.full((size, size), ' ', dtype='str')
+        for square in range(size * size):
+            bit = 1 << square
+            if self.x_bits & bit:
+                marks[square // size][square % size] = GenGameBoard.PLAYER
+            elif self.o_bits & bit:
+                marks[square // size][square % size] = GenGameBoard.COMPUTER
+            elif self.blocked_bits & bit:
+                marks[square // size][square % size] = '#'
+        return marks
+
+    @marks.setter
+    def marks(self, marks):
+        """
+        Loads the bitmasks from an (n, n) array of marks.
+        """
+        self.x_bits = 0
+        self.o_bits = 0
+        self.blocked_bits = 0
+        for (row, col), mark in np.ndenumerate(np.asarray(marks)):
+            bit = 1 << (row * self.board_size + col)
+            if mark == GenGameBoard.PLAYER:
+                self.x_bits |= bit
+            elif mark == GenGameBoard.COMPUTER:
+                self.o_bits |= bit
+            elif mark != ' ':
+                self.blocked_bits |= bit
+        self.num_empty = self.board_size * self.board_size \
+            - bit_count(self.x_bits | self.o_bits | self.blocked_bits)
+
+        # Line popcounts give the running get_est_utility() value.
+        self.est_points = 0
+        for mask in self.win_masks:
+            num_o_in_row = bit_count(self.o_bits & mask)
+            num_x_in_row = bit_count(self.x_bits & mask)
+            self.est_points = self.est_points + 10 ** num_o_in_row - 10 ** num_x_in_row
+
+        # Count the completed lines of each mark and hash the marks.
+        self.position_hashes = [0] * 8
+        for mark in self.num_won:
+            bits = self.get_bits(mark)
+            self.num_won[mark] = sum(1 for mask in self.win_masks if bits & mask == mask)
+            for square in range(self.board_size * self.board_size):
+                if bits >> square & 1:
+                    self.toggle_hash(square // self.board_size, square % self.board_size, mark)
+
+    def place(self, row, col, mark):
+        """
+        Sets the bit for the given array indexes in the mark's bitmask and
+        counts the lines through that square that it completes.
+        """
+        square = int(row) * self.board_size + int(col)
+        bit = 1 << square
+        self.num_empty = self.num_empty - 1
+        if mark == GenGameBoard.PLAYER:
+            self.x_bits |= bit
+            bits = self.x_bits
+        elif mark == GenGameBoard.COMPUTER:
+            self.o_bits |= bit
+            bits = self.o_bits
+        else:
+            self.blocked_bits |= bit
+            return
+
+        # Each line through the square gains 9 * 10^k points for O (loses them for X),
+        # where k is the mark's count on that line before this move.
+        self.toggle_hash(row, col, mark)
+        sign = 1 if mark == GenGameBoard.COMPUTER else -1
+        for mask in self.masks_through[square]:
+            self.est_points = self.est_points + sign * 9 * 10 ** (bit_count(bits & mask) - 1)
+            if bits & mask == mask:
+                self.num_won[mark] = self.num_won[mark] + 1
+
+    def undo(self, row, col):
+        """
+        Clears the bit for the given array indexes in every bitmask and
+        uncounts the lines through that square that were complete.
+        """
+        square = int(row) * self.board_size + int(col)
+        bit = 1 << square
+        for mark in self.num_won:
+            bits = self.get_bits(mark)
+            if bits & bit:
+                self.toggle_hash(row, col, mark)
+                sign = 1 if mark == GenGameBoard.COMPUTER else -1
+                for mask in self.masks_through[square]:
+                    count = bit_count(bits & mask)
+                    self.est_points = self.est_points - sign * 9 * 10 ** (count - 1)
+                    if bits & mask == mask:
+                        self.num_won[mark] = self.num_won[mark] - 1
+
+        if (self.x_bits | self.o_bits | self.blocked_bits) & bit:
+            self.num_empty = self.num_empty + 1
+        bit = ~bit
+        self.x_bits &= bit
+        self.o_bits &= bit
+        self.blocked_bits &= bit
+
+    def get_bits(self, mark):
+        """ Returns the bitmask holding the given mark. """
+        if mark == GenGameBoard.PLAYER:
+            return self.x_bits
+        if mark == GenGameBoard.COMPUTER:
+            return self.o_bits
+        return 0
+
+    def get_line_counts(self, mark):
+        """
+        Returns the mark's popcount on each winning line, indexed like win_lines.
+        """
+        bits = self.get_bits(mark)
+        return [bit_count(bits & mask) for mask in self.line_masks]
+
+    def no_more_moves(self):
+        """
+        Determines whether the board is full.
+        """
+        return (self.x_bits | self.o_bits | self.blocked_bits) == self.full_bits
+
+    def get_actions(self, unique=False):
+        """
+        Generates the list of possible moves as (row, col) pairs in row-major order,
+        leaving out symmetric duplicates if unique is True (see GenGameBoard.get_actions).
+        """
+        empty = self.full_bits & ~(self.x_bits | self.o_bits | self.blocked_bits)
+        actions = []
+        while empty:
+            lowest = empty & -empty
+            square = lowest.bit_length() - 1
+            actions.append((square // self.board_size, square % self.board_size))
+            empty ^= lowest
+        if unique:
+            actions = unique_actions(actions, self.position_hashes, self.board_size)
+        return actions
+
+
+# Default search depth per board size, so each benchmark runs for about a second.
+BENCHMARK_DEPTHS = {3: 6, 4: 3, 5: 2, 6: 1}
+
+
+def time_search(board_class, board_size, max_depth):
+    """
+    Runs one alpha_beta_search on an empty board of the given backend.
+    Returns the number of nodes visited and the elapsed seconds.
+    """
+    board = board_class(board_size)
+    context = SearchContext(max_depth)
+    start = time.perf_counter()
+    board.alpha_beta_search(context=context)
+    return context.num_nodes, time.perf_counter() - start
+
+
+def main():
+    """ Benchmarks nodes/second of the string-array board against BitBoard. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 4, 5, 6])
+    parser.add_argument('--depth', type=int, default=None,
+                        help='MAX_DEPTH for every size (default: per-size table)')
+    args = parser.parse_args()
+
+    print(f"{'n':>2} {'depth':>5} {'nodes':>9} {'array n/s':>11} {'bitboard n/s':>13} "
+          f"{'speedup':>8}")
+    for board_size in args.sizes:
+        depth = args.depth if args.depth is not None else BENCHMARK_DEPTHS.get(board_size, 1)
+        nodes, array_time = time_search(GenGameBoard, board_size, depth)
+        bit_nodes, bit_time = time_search(BitBoard, board_size, depth)
+        assert nodes == bit_nodes, 'both backends must visit the same tree'
+        print(f"{board_size:>2} {depth:>5} {nodes:>9} {nodes / array_time:>11.0f} "
+              f"{bit_nodes / bit_time:>13.0f} {array_time / bit_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
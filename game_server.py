@@ -0,0 +1,355 @@
+"""
+Asyncio game server hosting many concurrent games against the computer.
+
+Clients send one JSON object per line and get one JSON object per line back,
+over a TCP socket or stdin/stdout:
+
+    {"op": "new", "size": 3}                    -> {"session": 1, "board": [...]}
+    {"op": "move", "session": 1, "row": 1, "col": 2}
+                                                -> {"computer_move": [2, 2], "board": [...],
+                                                    "result": null, "latency_ms": 1.2}
+    {"op": "stats"} or {"op": "stats", "session": 1}
+                                                -> move latency percentiles
+    {"op": "close", "session": 1}
+
+"new" also takes "max_depth" and "time_budget_ms" for the computer's search.
+max_depth is below the number of squares, and a depth whose full-width tree
+has more than MAX_UNTIMED_LEAVES leaves needs a time budget (of at most
+MAX_TIME_BUDGET_MS), so no session can hold a worker indefinitely.
+Rows and columns are 1-based as in mp2.main(), and "result" becomes "won",
+"lost" or "draw" (from the player's side) when the game ends. Every response
+has "ok" (with "error" when false) and echoes the request's "id", since
+responses on one connection may come back out of order.
+
+Computer moves run on a bounded executor: at most max_pending searches are
+queued or running, and the event loop keeps serving the other sessions while a
+slow 5x5 search runs. Run the server with:
+
+    python game_server.py --port 8765 --workers 4
+    python game_server.py --stdio
+"""
+
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import itertools
+import json
+import math
+import sys
+import time
+
+from mp2 import GenGameBoard, SearchContext
+
+# Largest board size a session may ask for
+MAX_BOARD_SIZE = 9
+
+# Most leaves of the full-width search tree of a session without a time budget
+MAX_UNTIMED_LEAVES = 10 ** 8
+
+# Largest time budget of a computer move, in milliseconds
+MAX_TIME_BUDGET_MS = 60000
+
+# Number of most recent move latencies kept for the server-wide percentiles
+LATENCY_WINDOW = 100000
+
+# Percentiles reported by get_latency_stats()
+PERCENTILES = (50, 90, 99)
+
+
+class RequestError(Exception):
+    """
+    Raised for a request the server cannot carry out; its message goes back to the client
+    """
+
+
+def percentile(sorted_values, percent):
+    """
+    Returns the nearest-rank percentile of an ascending list of values (None if empty).
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def get_latency_stats(latencies):
+    """
+    Returns the count, percentiles and maximum of move latencies given in seconds,
+    in milliseconds.
+    """
+    values = sorted(latencies)
+    stats = {'moves': len(values)}
+    for percent in PERCENTILES:
+        value = percentile(values, percent)
+        stats[f'p{percent}_ms'] = None if value is None else round(value * 1000, 3)
+    stats['max_ms'] = round(values[-1] * 1000, 3) if values else None
+    return stats
+
+
+def is_integer(value):
+    """ Returns whether a decoded JSON value is an integer (true and false are not). """
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def count_leaves(num_squares, max_depth):
+    """
+    Returns the number of leaves of the full-width search tree to max_depth from an
+    empty board of num_squares squares (the search stops at a full board).
+    """
+    return math.prod(range(num_squares, max(num_squares - max_depth - 1, 0), -1))
+
+
+def find_computer_move(marks, max_depth, time_budget_ms):
+    """
+    Executor task: returns the computer's (row, col) array indexes for the marks.
+    Builds its own board and SearchContext, so it runs safely in a thread or process.
+    """
+    board = GenGameBoard(len(marks))
+    board.marks = marks
+    action = board.alpha_beta_search(time_budget_ms, SearchContext(max_depth, prefilter=True))
+    return int(action[0]), int(action[1])
+
+
+class GameSession:
+    """
+    One game between a client and the computer
+    """
+
+    def __init__(self, session_id, board_size, max_depth, time_budget_ms):
+        """
+        Constructor method - starts an empty board of the given size
+        """
+        self.session_id = session_id
+        self.board = GenGameBoard(board_size)
+        self.max_depth = max_depth
+        self.time_budget_ms = time_budget_ms
+        self.result = None  # 'won', 'lost' or 'draw' once the game is over
+        self.latencies = []  # seconds taken to answer each move
+        self.lock = asyncio.Lock()  # one move at a time per session
+
+    def get_rows(self):
+        """ Returns the board as a list of row strings. """
+        return [''.join(row) for row in self.board.marks]
+
+    def check_result(self):
+        """ Records and returns the result of the game if it has ended, else None. """
+        if self.board.check_for_win(GenGameBoard.PLAYER):
+            self.result = 'won'
+        elif self.board.check_for_win(GenGameBoard.COMPUTER):
+            self.result = 'lost'
+        elif self.board.no_more_moves():
+            self.result = 'draw'
+        return self.result
+
+
+class GameServer:
+    """
+    Hosts game sessions and answers JSON-line requests for them
+    """
+
+    def __init__(self, workers=4, max_pending=64, processes=False):
+        """
+        Constructor method - creates the executor for computer moves
+        workers -- threads (or processes, if processes is True) running searches
+        max_pending -- searches allowed to be queued or running at once
+        """
+        executor_class = concurrent.futures.ProcessPoolExecutor if processes \
+            else concurrent.futures.ThreadPoolExecutor
+        self.executor = executor_class(max_workers=workers)
+        self.pending = asyncio.Semaphore(max_pending)
+        self.sessions = {}
+        self.session_ids = itertools.count(1)
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.handlers = {'new': self.new_session, 'move': self.move,
+                         'stats': self.get_stats, 'close': self.close_session}
+
+    def close(self):
+        """ Shuts the executor down, cancelling queued searches where Python allows it. """
+        if sys.version_info < (3, 9):
+            self.executor.shutdown(wait=False)
+        else:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_session(self, request):
+        """ Returns the session named by the request. """
+        session = self.sessions.get(request.get('session'))
+        if session is None:
+            raise RequestError('unknown session')
+        return session
+
+    async def new_session(self, request):
+        """ Starts a new game. """
+        board_size = request.get('size', 3)
+        max_depth = request.get('max_depth', GenGameBoard.MAX_DEPTH)
+        time_budget_ms = request.get('time_budget_ms')
+        if not is_integer(board_size) or not 2 <= board_size <= MAX_BOARD_SIZE:
+            raise RequestError(f'size must be an integer from 2 to {MAX_BOARD_SIZE}')
+        num_squares = board_size * board_size
+        if not is_integer(max_depth) or not 0 <= max_depth < num_squares:
+            raise RequestError(f'max_depth must be an integer from 0 to {num_squares - 1}')
+        if time_budget_ms is None:
+            if count_leaves(num_squares, max_depth) > MAX_UNTIMED_LEAVES:
+                raise RequestError('this max_depth needs a time_budget_ms on this board')
+        elif isinstance(time_budget_ms, bool) or not isinstance(time_budget_ms, (int, float)) \
+                or not 0 < time_budget_ms <= MAX_TIME_BUDGET_MS:
+            raise RequestError(f'time_budget_ms must be a number from 0 to {MAX_TIME_BUDGET_MS}')
+
+        session = GameSession(next(self.session_ids), board_size, max_depth, time_budget_ms)
+        self.sessions[session.session_id] = session
+        return {'session': session.session_id, 'board': session.get_rows()}
+
+    async def move(self, request):
+        """ Plays the player's move, then the computer's reply unless the game is over. """
+        session = self.get_session(request)
+        row, col = request.get('row'), request.get('col')
+        size = session.board.board_size
+        if not is_integer(row) or not is_integer(col) \
+                or not 1 <= row <= size or not 1 <= col <= size:
+            raise RequestError('not a valid row or column')
+
+        async with session.lock:
+            if session.result is not None:
+                raise RequestError('the game is over')
+            if session.board.marks[row - 1][col - 1] != ' ':
+                raise RequestError('this position is already taken')
+
+            start = time.perf_counter()
+            session.board.place(row - 1, col - 1, GenGameBoard.PLAYER)
+            computer_move = None
+            if session.check_result() is None:
+                async with self.pending:
+                    action = await asyncio.get_running_loop().run_in_executor(
+                        self.executor, find_computer_move, session.board.marks.copy(),
+                        session.max_depth, session.time_budget_ms)
+                session.board.place(action[0], action[1], GenGameBoard.COMPUTER)
+                computer_move = [action[0] + 1, action[1] + 1]
+                session.check_result()
+
+            latency = time.perf_counter() - start
+            session.latencies.append(latency)
+            self.latencies.append(latency)
+            return {'computer_move': computer_move, 'board': session.get_rows(),
+                    'result': session.result, 'latency_ms': round(latency * 1000, 3)}
+
+    async def get_stats(self, request):
+        """ Returns move latency percentiles for one session or the whole server. """
+        if 'session' in request:
+            return get_latency_stats(self.get_session(request).latencies)
+        stats = get_latency_stats(self.latencies)
+        stats['sessions'] = len(self.sessions)
+        return stats
+
+    async def close_session(self, request):
+        """ Ends a game and returns its latency percentiles. """
+        session = self.get_session(request)
+        del self.sessions[session.session_id]
+        return get_latency_stats(session.latencies)
+
+    async def handle_line(self, line):
+        """
+        Answers one request line; returns the response as a dict.
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {'ok': False, 'error': 'invalid JSON'}
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': 'a request must be a JSON object'}
+
+        response = {'id': request['id']} if 'id' in request else {}
+        handler = self.handlers.get(request.get('op'))
+        try:
+            if handler is None:
+                raise RequestError('unknown op')
+            response.update(await handler(request))
+            response['ok'] = True
+        except RequestError as error:
+            response.update(ok=False, error=str(error))
+        return response
+
+    async def handle_stream(self, reader, write):
+        """
+        Answers every line from the reader with write(text) until end of input.
+        Requests are handled concurrently, so a slow move does not hold up the others.
+        """
+        async def answer(line):
+            write(json.dumps(await self.handle_line(line)) + '\n')
+
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                task = asyncio.create_task(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def handle_connection(self, reader, writer):
+        """ Serves one TCP connection. """
+        try:
+            await self.handle_stream(reader, lambda text: writer.write(text.encode()))
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve_tcp(self, host, port):
+        """ Starts listening on the host and port; returns the asyncio server. """
+        return await asyncio.start_server(self.handle_connection, host, port,
+                                          limit=1 << 20)
+
+    async def serve_stdio(self):
+        """ Serves requests from stdin, writing the responses to stdout. """
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=1 << 20)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        def write(text):
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+        await self.handle_stream(reader, write)
+
+
+async def run_server(args):
+    """ Runs the server until it is interrupted (or stdin closes). """
+    server = GameServer(args.workers, args.max_pending, args.processes)
+    try:
+        if args.stdio:
+            await server.serve_stdio()
+        else:
+            tcp_server = await server.serve_tcp(args.host, args.port)
+            print(f"Serving on {args.host}:{args.port}", file=sys.stderr)
+            async with tcp_server:
+                await tcp_server.serve_forever()
+    finally:
+        print(json.dumps(get_latency_stats(server.latencies)), file=sys.stderr)
+        server.close()
+
+
+def main():
+    """ Starts the game server. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--stdio', action='store_true',
+                        help='serve JSON lines on stdin/stdout instead of TCP')
+    parser.add_argument('--workers', type=int, default=4, help='searches run at once')
+    parser.add_argument('--max-pending', type=int, default=64,
+                        help='searches queued or running before new ones wait')
+    parser.add_argument('--processes', action='store_true',
+                        help='run searches in worker processes instead of threads')
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_server(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Load generator for game_server.py: simulated players making random moves.
+
+Each player starts a game, answers every computer move with a random free
+square until the game ends, and then starts its next game. The players share
+a few TCP connections, each carrying many sessions at once. Reports the move
+throughput and the move latency percentiles seen by the players and by the
+server.
+
+    python game_server.py --port 8765 &
+    python load_generator.py --port 8765 --players 1000 --games 2 --size 3
+
+or, with a server started inside the load generator:
+
+    python load_generator.py --spawn --players 200 --size 4 --max-depth 2
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+
+from game_server import GameServer, get_latency_stats
+
+
+class GameClient:
+    """
+    One connection to the game server; requests on it may be answered out of order
+    """
+
+    def __init__(self, reader, writer):
+        """
+        Constructor method - starts reading the responses of the connection
+        """
+        self.reader = reader
+        self.writer = writer
+        self.request_ids = itertools.count(1)
+        self.waiting = {}
+        self.read_task = asyncio.create_task(self.read_responses())
+
+    @classmethod
+    async def connect(cls, host, port):
+        """ Opens a connection to the server. """
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+        return cls(reader, writer)
+
+    async def read_responses(self):
+        """ Hands each response to the request waiting for it. """
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self.waiting.pop(response.get('id'), None)
+            if future is not None:
+                future.set_result(response)
+        for future in self.waiting.values():
+            future.set_exception(ConnectionError('the server closed the connection'))
+
+    async def request(self, **request):
+        """ Sends a request and returns its response. """
+        request['id'] = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request['id']] = future
+        self.writer.write((json.dumps(request) + '\n').encode())
+        await self.writer.drain()
+        response = await future
+        if not response['ok']:
+            raise RuntimeError(response['error'])
+        return response
+
+    async def close(self):
+        """ Closes the connection. """
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.read_task.cancel()
+
+
+async def play_games(client, games, new_game, generator):
+    """
+    Plays the given number of games with random moves.
+    Returns the move latencies (seconds, as seen by the player) and the game results.
+    """
+    latencies, results = [], []
+    for _ in range(games):
+        response = await client.request(op='new', **new_game)
+        session, board = response['session'], response['board']
+        while True:
+            free = [(row + 1, col + 1) for row, line in enumerate(board)
+                    for col, mark in enumerate(line) if mark == ' ']
+            row, col = generator.choice(free)
+            start = time.perf_counter()
+            response = await client.request(op='move', session=session, row=row, col=col)
+            latencies.append(time.perf_counter() - start)
+            board = response['board']
+            if response['result'] is not None:
+                results.append(response['result'])
+                break
+        await client.request(op='close', session=session)
+    return latencies, results
+
+
+async def run_load(host, port, args):
+    """
+    Runs the players against the server at host:port and returns a summary dict.
+    """
+    new_game = {'size': args.size, 'max_depth': args.max_depth}
+    if args.time_budget_ms is not None:
+        new_game['time_budget_ms'] = args.time_budget_ms
+
+    clients = [await GameClient.connect(host, port) for _ in range(args.connections)]
+    generators = [random.Random(args.seed + player) for player in range(args.players)]
+    try:
+        start = time.perf_counter()
+        played = await asyncio.gather(*[
+            play_games(clients[player % len(clients)], args.games, new_game, generator)
+            for player, generator in enumerate(generators)])
+        elapsed = time.perf_counter() - start
+        server_stats = await clients[0].request(op='stats')
+    finally:
+        for client in clients:
+            await client.close()
+
+    latencies = [latency for player_latencies, _ in played for latency in player_latencies]
+    results = [result for _, player_results in played for result in player_results]
+    return {
+        'players': args.players,
+        'games': len(results),
+        'results': {result: results.count(result) for result in ('won', 'lost', 'draw')},
+        'seconds': round(elapsed, 3),
+        'moves_per_second': round(len(latencies) / elapsed, 1),
+        'client_latency': get_latency_stats(latencies),
+        'server_latency': {key: server_stats[key] for key in get_latency_stats([])}
+    }
+
+
+async def run(args):
+    """ Runs the load against the given server, or against one started here. """
+    if not args.spawn:
+        return await run_load(args.host, args.port, args)
+
+    server = GameServer(args.workers, args.max_pending)
+    tcp_server = await server.serve_tcp('127.0.0.1', 0)
+    try:
+        return await run_load('127.0.0.1', tcp_server.sockets[0].getsockname()[1], args)
+    finally:
+        tcp_server.close()
+        await tcp_server.wait_closed()
+        server.close()
+
+
+def get_parser():
+    """ Returns the command line parser of the load generator. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--spawn', action='store_true',
+                        help='start a server inside this process instead of connecting')
+    parser.add_argument('--workers', type=int, default=4, help='searches run at once (--spawn)')
+    parser.add_argument('--max-pending', type=int, default=64,
+                        help='searches queued or running at once (--spawn)')
+    parser.add_argument('--players', type=int, default=100)
+    parser.add_argument('--games', type=int, default=1, help='games per player')
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--max-depth', type=int, default=2)
+    parser.add_argument('--time-budget-ms', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    return parser
+
+
+def main():
+    """ Drives a game server with simulated players and prints the summary. """
+    print(json.dumps(asyncio.run(run(get_parser().parse_args())), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Monte Carlo Tree Search (UCT) engine for boards too large for alpha-beta.
+
+Instead of searching to a fixed depth, MCTSEngine plays many random games
+(playouts) from the position and grows a tree towards the moves that win them
+most often. Each iteration selects a path down the tree by the UCB1 formula
+(mean reward plus an exploration bonus for rarely tried moves), expands the leaf
+once it has been visited, finishes the game with a random playout and adds the
+result (1 win, 0.5 draw, 0 loss for the player who made each move) back up the
+path. The computer plays the root move visited most.
+
+The tree lives in a NodeStore: flat NumPy arrays indexed by node number, with
+the children of a node in one contiguous block, so a node costs a few array
+slots instead of a Python object and UCB1 is computed for all children at once.
+Playouts only update copies of the board's per-line mark counts, so they cost a
+few list operations per move.
+
+The budget is a number of playouts, or a time budget per move (the time budget
+of alpha_beta_search() when given). Select it like the other engines:
+
+    GenGameBoard.engine = MCTSEngine(time_budget_ms=500)
+
+and compare it with alpha-beta, by games won and time per move, with:
+
+    python mcts.py --sizes 4 5 6 7 8 9 --games 2 --time-ms 200
+"""
+
+import argparse
+import math
+import random
+import statistics
+import time
+
+import numpy as np
+
+from mp2 import GenGameBoard, SearchContext
+
+# Playouts per move when neither a playout count nor a time budget is given
+DEFAULT_PLAYOUTS = 2000
+
+
+class NodeStore:
+    """
+    Growable array-backed store of tree nodes; node 0 is the root
+    """
+
+    def __init__(self, capacity=4096):
+        """
+        Constructor method - allocates arrays for capacity nodes and adds the root
+        """
+        self.moves = np.zeros(capacity, dtype=np.int32)  # square (row * n + col) played
+        self.first_child = np.full(capacity, -1, dtype=np.int32)  # -1 until expanded
+        self.num_children = np.zeros(capacity, dtype=np.int32)
+        self.visits = np.zeros(capacity, dtype=np.float64)
+        self.rewards = np.zeros(capacity, dtype=np.float64)  # for the player who moved
+        self.size = 1
+
+    def __len__(self):
+        """ Returns the number of nodes stored. """
+        return self.size
+
+    def add_children(self, node, squares):
+        """ Adds one child per square to the node, in one contiguous block. """
+        needed = self.size + len(squares)
+        if needed > len(self.moves):
+            capacity = max(needed, 2 * len(self.moves))
+            for name in ('moves', 'first_child', 'num_children', 'visits', 'rewards'):
+                old = getattr(self, name)
+                new = np.full(capacity, -1 if name == 'first_child' else 0, dtype=old.dtype)
+                new[:len(old)] = old
+                setattr(self, name, new)
+        self.moves[self.size:needed] = squares
+        self.first_child[node] = self.size
+        self.num_children[node] = len(squares)
+        self.size = needed
+
+    def select_child(self, node, exploration):
+        """ Returns the child of the node with the highest UCB1 score (untried ones first). """
+        first = self.first_child[node]
+        children = slice(first, first + self.num_children[node])
+        visits = self.visits[children]
+        untried = np.flatnonzero(visits == 0)
+        if len(untried):
+            return first + int(untried[0])
+        scores = self.rewards[children] / visits \
+            + exploration * np.sqrt(math.log(self.visits[node]) / visits)
+        return first + int(np.argmax(scores))
+
+    def get_best_child(self):
+        """ Returns the child of the root visited most. """
+        first = self.first_child[0]
+        return first + int(np.argmax(self.visits[first:first + self.num_children[0]]))
+
+
+def play_square(counts, square, mark, board):
+    """
+    Adds the mark at the square (row * num_cols + col) of the board to the line counts;
+    returns True if it wins.
+    """
+    mark_counts = counts[mark]
+    won = False
+    for line in board.lines_through[square // board.num_cols][square % board.num_cols]:
+        mark_counts[line] = mark_counts[line] + 1
+        won = won or mark_counts[line] == board.win_length
+    return won
+
+
+def random_playout(counts, squares, mark, board, rng):
+    """
+    Plays the empty squares in random order, alternating from mark, on the line
+    counts. Returns the winning mark, or None for a draw.
+    """
+    rng.shuffle(squares)
+    other = GenGameBoard.PLAYER if mark == GenGameBoard.COMPUTER else GenGameBoard.COMPUTER
+    for square in squares:
+        if play_square(counts, square, mark, board):
+            return mark
+        mark, other = other, mark
+    return None
+
+
+class MCTSEngine:
+    """
+    UCT search engine with a playout or time budget, for SearchContext.engine
+    """
+
+    def __init__(self, playouts=None, time_budget_ms=None, exploration=math.sqrt(2),
+                 seed=None):
+        """
+        Constructor method - the budget is playouts per move, or time_budget_ms per move
+        (DEFAULT_PLAYOUTS without either); seed makes the playouts repeatable
+        """
+        self.playouts = playouts
+        self.time_budget_ms = time_budget_ms
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.store = NodeStore()  # tree of the last search
+        self.num_playouts = 0  # playouts of the last search
+
+    def run_iteration(self, board, empty):
+        """
+        Selects a path from the root, expands its leaf if visited before, finishes the
+        game with a random playout and backs the result up the path.
+        """
+        store = self.store
+        counts = {mark: list(board.get_line_counts(mark))
+                  for mark in (GenGameBoard.PLAYER, GenGameBoard.COMPUTER)}
+        empty = set(empty)
+        path, mark, winner = [0], GenGameBoard.COMPUTER, None
+        while True:
+            node = path[-1]
+            if store.first_child[node] < 0:
+                if not empty or (node and store.visits[node] == 0):
+                    break
+                squares = list(empty)
+                self.rng.shuffle(squares)
+                store.add_children(node, squares)
+            node = store.select_child(node, self.exploration)
+            path.append(node)
+            square = int(store.moves[node])
+            empty.discard(square)
+            if play_square(counts, square, mark, board):
+                winner = mark
+                break
+            mark = GenGameBoard.PLAYER if mark == GenGameBoard.COMPUTER else GenGameBoard.COMPUTER
+
+        if winner is None and empty:
+            winner = random_playout(counts, list(empty), mark, board, self.rng)
+
+        # The first move on the path is the computer's, then the moves alternate.
+        mover = GenGameBoard.COMPUTER
+        store.visits[0] = store.visits[0] + 1
+        for node in path[1:]:
+            reward = 0.5 if winner is None else float(winner == mover)
+            store.visits[node] = store.visits[node] + 1
+            store.rewards[node] = store.rewards[node] + reward
+            mover = GenGameBoard.PLAYER if mover == GenGameBoard.COMPUTER \
+                else GenGameBoard.COMPUTER
+
+    def search(self, board, context, time_budget_ms=None):
+        """
+        Returns (value, best_action) for the computer: value is the mean reward of the
+        move (1 = always won). Runs until the playout count or the time budget
+        (time_budget_ms, else the engine's) is spent. Tree nodes created are added to
+        context.num_nodes.
+        """
+        time_budget_ms = time_budget_ms if time_budget_ms is not None else self.time_budget_ms
+        playouts = self.playouts
+        if playouts is None and time_budget_ms is None:
+            playouts = DEFAULT_PLAYOUTS
+        deadline = None if time_budget_ms is None \
+            else time.perf_counter() + time_budget_ms / 1000
+
+        self.store = NodeStore()
+        self.num_playouts = 0
+        if board.is_terminal():
+            return 0.0, np.array([-1, -1])
+        num_cols = board.num_cols
+        empty = [int(row) * num_cols + int(col) for row, col in board.get_actions()]
+        while playouts is None or self.num_playouts < playouts:
+            if deadline is not None and self.num_playouts % 16 == 0 \
+                    and time.perf_counter() > deadline and self.num_playouts:
+                break
+            self.run_iteration(board, empty)
+            self.num_playouts = self.num_playouts + 1
+
+        context.num_nodes = context.num_nodes + len(self.store)
+        best = self.store.get_best_child()
+        square = int(self.store.moves[best])
+        value = self.store.rewards[best] / self.store.visits[best]
+        return value, np.array([square // num_cols, square % num_cols])
+
+
+def get_move(board, mark, engine, time_budget_ms, max_depth=GenGameBoard.MAX_DEPTH):
+    """
+    Returns ((row, col), seconds): the move of the mark chosen with the engine (None
+    for alpha-beta) with the tactical prefilter on. X moves are found by swapping the
+    marks, as the engines search for O.
+    """
+    search_board = board
+    if mark == GenGameBoard.PLAYER:
+        search_board = GenGameBoard(*board.geometry)
+        swap = {GenGameBoard.PLAYER: GenGameBoard.COMPUTER,
+                GenGameBoard.COMPUTER: GenGameBoard.PLAYER}
+        search_board.marks = np.array([[swap.get(square, square) for square in row]
+                                       for row in board.marks])
+    context = SearchContext(max_depth, engine=engine, prefilter=True)
+    start = time.perf_counter()
+    action = search_board.alpha_beta_search(time_budget_ms, context)
+    return (int(action[0]), int(action[1])), time.perf_counter() - start
+
+
+def play_game(board_size, mcts_mark, time_budget_ms, playouts, alpha_beta_depth=None):
+    """
+    Plays MCTS (as mcts_mark) against alpha-beta, which searches with the time budget
+    or, given alpha_beta_depth, to that depth. Returns (result for MCTS: 'win', 'loss'
+    or 'draw', MCTS seconds per move, alpha-beta seconds per move).
+    """
+    board = GenGameBoard(board_size)
+    engine = MCTSEngine(playouts, time_budget_ms)
+    alpha_beta_budget = (time_budget_ms,) if alpha_beta_depth is None \
+        else (None, alpha_beta_depth)
+    times = {'mcts': [], 'alpha-beta': []}
+    mark = GenGameBoard.PLAYER
+    while not board.is_terminal():
+        name = 'mcts' if mark == mcts_mark else 'alpha-beta'
+        if name == 'mcts':
+            (row, col), seconds = get_move(board, mark, engine, time_budget_ms)
+        else:
+            (row, col), seconds = get_move(board, mark, None, *alpha_beta_budget)
+        times[name].append(seconds)
+        board.place(row, col, mark)
+        mark = GenGameBoard.COMPUTER if mark == GenGameBoard.PLAYER else GenGameBoard.PLAYER
+
+    if board.check_for_win(mcts_mark):
+        result = 'win'
+    elif board.check_for_win(GenGameBoard.PLAYER) or board.check_for_win(GenGameBoard.COMPUTER):
+        result = 'loss'
+    else:
+        result = 'draw'
+    return result, times['mcts'], times['alpha-beta']
+
+
+def play_match(board_size, args):
+    """
+    Plays args.games games of MCTS against alpha-beta, MCTS playing X and O in turn.
+    Returns (MCTS result counts, MCTS seconds per move, alpha-beta seconds per move).
+    """
+    results = {'win': 0, 'draw': 0, 'loss': 0}
+    mcts_times, alpha_beta_times = [], []
+    for game in range(args.games):
+        mcts_mark = GenGameBoard.PLAYER if game % 2 == 0 else GenGameBoard.COMPUTER
+        result, mcts_seconds, alpha_beta_seconds = play_game(
+            board_size, mcts_mark, args.time_ms, args.playouts, args.ab_depth)
+        results[result] = results[result] + 1
+        mcts_times.extend(mcts_seconds)
+        alpha_beta_times.extend(alpha_beta_seconds)
+    return results, mcts_times, alpha_beta_times
+
+
+def main():
+    """ Plays MCTS against alpha-beta on each board size and prints results and latency. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[4, 5, 6, 7, 8, 9])
+    parser.add_argument('--games', type=int, default=2,
+                        help='games per size (MCTS plays X and O in turn)')
+    parser.add_argument('--time-ms', type=int, default=200, help='time budget per move')
+    parser.add_argument('--playouts', type=int, default=None,
+                        help='MCTS playouts per move instead of the time budget')
+    parser.add_argument('--ab-depth', type=int, default=None,
+                        help='alpha-beta depth instead of the time budget')
+    args = parser.parse_args()
+
+    print(f"{'n':>2} {'games':>5} {'mcts W/D/L':>11} {'mcts ms/move':>12} "
+          f"{'ab ms/move':>11} {'ab max ms':>9}")
+    for board_size in args.sizes:
+        results, mcts_times, alpha_beta_times = play_match(board_size, args)
+        record = f"{results['win']}/{results['draw']}/{results['loss']}"
+        print(f"{board_size:>2} {args.games:>5} {record:>11} "
+              f"{statistics.mean(mcts_times) * 1000:>12.1f} "
+              f"{statistics.mean(alpha_beta_times) * 1000:>11.1f} "
+              f"{max(alpha_beta_times) * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,42 +10,261 @@ https://github.com/amajor/artificial-intelligence-machine-problem-2
 """
 
 import math
+import random
+import time
 import numpy as np
 
+from search_stats import SearchStats
+from symmetry import canonical_key, from_canonical, get_symmetry_tables, to_canonical, \
+    unique_actions
+from tactics import get_tactical_move
+from windows import get_win_lines, get_window_index
 
-def print_current_depth(debugging_on):
+
+# Zobrist keys for each board size, built once by get_zobrist_keys()
+ZOBRIST_KEYS = {}
+
+
+def get_zobrist_keys(board_size, num_cols=None):
+    """
+    Returns the Zobrist keys for the board size (board_size rows by num_cols columns,
+    square by default) as (keys, min_key). keys[mark][row][col]
+    holds, for X or O at that position, the random 64-bit key of its image under each
+    of the 8 board symmetries (identity first), so a board can hash itself in every
+    orientation at once. min_key is mixed into the hash of positions searched by
+    min_value(). The keys are seeded, so hashes are repeatable.
     """
-    Strictly for debugging purposes
+    num_cols = board_size if num_cols is None else num_cols
+    if (board_size, num_cols) not in ZOBRIST_KEYS:
+        seed = board_size if board_size == num_cols else f'{board_size}x{num_cols}'
+        generator = random.Random(seed)
+        tables = get_symmetry_tables(board_size, num_cols)
+        keys = {}
+        for mark in (GenGameBoard.PLAYER, GenGameBoard.COMPUTER):
+            square_keys = [[generator.getrandbits(64) for _ in range(num_cols)]
+                           for _ in range(board_size)]
+            keys[mark] = [[tuple(square_keys[table[row][col][0]][table[row][col][1]]
+                                 for table in tables)
+                           for col in range(num_cols)] for row in range(board_size)]
+        ZOBRIST_KEYS[(board_size, num_cols)] = (keys, generator.getrandbits(64))
+    return ZOBRIST_KEYS[(board_size, num_cols)]
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the deadline of a time-budgeted search has passed
     """
-    depth = GenGameBoard.depth
-    if debugging_on:
-        print(' ' * depth, '---> Depth:', depth)
 
 
-class GenGameBoard:
+class SearchContext:  # pylint: disable=too-many-instance-attributes
+    """
+    State of one search: the current depth, the limits and helpers it uses, and the
+    statistics it gathers. Every search has its own context, passed down through
+    max_value() and min_value(), so boards can be searched at the same time in
+    separate threads. Give each concurrent search its own table and orderer as well.
+    """
+    # Names of the statistics counters
+    STATS = ('num_nodes', 'num_pruned', 'utility_max', 'utility_min',
+             'tt_hits', 'tt_misses', 'tt_stores', 'book_hits', 'tablebase_hits',
+             'tactical_wins', 'tactical_blocks', 'tactical_forks')
+
+    def __init__(self, max_depth, transposition_table=None, move_orderer=None,
+                 canonical_table_keys=False, depth=0, opening_book=None, tablebase=None,
+                 stats=None, hooks=None, engine=None, prefilter=False):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Constructor method - sets the limits and helpers of the search and zeroes the counters
+        """
+        self.max_depth = max_depth  # depth beyond which the evaluation function is applied
+        self.depth = depth  # current depth within minimax search
+        self.transposition_table = transposition_table  # TranspositionTable used, if any
+        self.canonical_table_keys = canonical_table_keys  # key the table by canonical position
+        self.move_orderer = move_orderer  # MoveOrderer sorting the moves of each node, if any
+        self.opening_book = opening_book  # OpeningBook consulted before searching, if any
+        self.tablebase = tablebase  # Tablebase answering positions of its size, if any
+        self.stats = stats  # SearchStats counting nodes and cutoffs per depth, if any
+        self.hooks = hooks  # SearchHooks told about nodes, cutoffs and leaves, if any
+        self.engine = engine  # engine searching in place of max_value(), e.g. PVSEngine, if any
+        self.prefilter = prefilter  # whether get_tactical_move() may decide before searching
+        self.deadline = None  # time.perf_counter() value at which a time-budgeted search stops
+        self.root_first_move = None  # action searched first at the root
+
+        self.num_nodes = 0  # counts number of nodes visited during search
+        self.num_pruned = 0  # counts number of pruned branches due to alpha/beta
+        self.utility_max = 0  # counts number of pruned branches due to reaching maximum utility
+        self.utility_min = 0  # counts number of pruned branches due to reaching minimum utility
+        self.tt_hits = 0  # counts number of nodes answered from the transposition table
+        self.tt_misses = 0  # counts number of transposition table lookups that did not answer
+        self.tt_stores = 0  # counts number of results stored in the transposition table
+        self.book_hits = 0  # counts number of searches answered from the opening book
+        self.tablebase_hits = 0  # counts number of searches answered from the tablebase
+        self.tactical_wins = 0  # counts number of searches answered by an immediate win
+        self.tactical_blocks = 0  # counts number of searches answered by a forced block
+        self.tactical_forks = 0  # counts number of searches answered by a winning fork
+
+    def get_stats(self):
+        """ Returns the statistics counters as a dict. """
+        return {name: getattr(self, name) for name in SearchContext.STATS}
+
+    def end_iterations(self, max_depth):
+        """ Restores max_depth after an iterative deepening search and clears its state. """
+        self.max_depth = max_depth
+        self.deadline = None
+        self.root_first_move = None
+        self.depth = 0
+
+
+class GenGameBoard:  # pylint: disable=too-many-instance-attributes,too-many-public-methods
     """
     Class responsible for representing the game board and game playing methods
+
+    The class attributes below are defaults: a search run without an explicit
+    SearchContext takes its settings from them and adds its counters to them.
     """
     num_pruned = 0  # counts number of pruned branches due to alpha/beta
     utility_max = 0  # counts number of pruned branches due to reaching maximum utility
     utility_min = 0  # counts number of pruned branches due to reaching minimum utility
+    num_nodes = 0  # counts number of nodes visited during search
+    tt_hits = 0  # counts number of nodes answered from the transposition table
+    tt_misses = 0  # counts number of transposition table lookups that did not answer
+    tt_stores = 0  # counts number of results stored in the transposition table
+    book_hits = 0  # counts number of searches answered from the opening book
+    tablebase_hits = 0  # counts number of searches answered from the tablebase
+    tactical_wins = 0  # counts number of searches answered by an immediate win
+    tactical_blocks = 0  # counts number of searches answered by a forced block
+    tactical_forks = 0  # counts number of searches answered by a winning fork
     MAX_DEPTH = 6  # max depth before applying evaluation function
-    depth = 0  # current depth within minimax search
     PLAYER = 'X'  # the mark used by the human player
     COMPUTER = 'O'  # the mark used by the computer
 
+    transposition_table = None  # TranspositionTable used by the search, if any
+    canonical_table_keys = False  # whether the table is keyed by the symmetry-reduced position
+    move_orderer = None  # MoveOrderer sorting the moves of each node, if any
+    opening_book = None  # OpeningBook consulted before searching, if any
+    tablebase = None  # Tablebase answering positions of its size, if any
+    collect_stats = False  # whether each search gathers a SearchStats
+    hooks = None  # SearchHooks of the profilers and tracers watching the search, if any
+    engine = None  # engine searching in place of max_value(), e.g. PVSEngine, if any
+    tactical_prefilter = False  # whether get_tactical_move() may decide before searching
+    search_memory = None  # SearchMemory keeping the table and orderer between moves, if any
+
     DEBUGGING_ON = False  # Whether we should print debugging information
 
-    def __init__(self, board_size):
+    def __init__(self, board_size, win_length=None, num_cols=None):
         """
-        Constructor method - initializes each position variable and the board size
+        Constructor method - initializes each position variable and the board size:
+        board_size rows by num_cols columns (default: square), won by win_length
+        marks in a row (default: the shorter side)
         """
-        # Holds the size of the board
+        # Holds the size of the board and the marks in a row that win
         self.board_size = board_size
+        self.num_cols = board_size if num_cols is None else num_cols
+        self.win_length = min(board_size, self.num_cols) if win_length is None else win_length
+
+        # Utility of a won game, above any estimate of an unfinished one
+        self.win_utility = 10 ** max(board_size, self.num_cols)
+
+        # Tables shared by every board of this size
+        self.win_lines, self.lines_through = get_win_lines(*self.geometry)
+        self.window_index = get_window_index(*self.geometry)
+        self.zobrist_keys, self.min_node_key = get_zobrist_keys(board_size, self.num_cols)
+
+        # Per-depth results of the last iterative_deepening_search()
+        self.depth_reports = []
 
-        # Holds the mark for each position
-        self.marks = np.empty((board_size, board_size), dtype='str')
-        self.marks[:, :] = ' '
+        # Holds the mark for each position (also resets the line counts below)
+        self.marks = np.full((board_size, self.num_cols), ' ', dtype='str')
+
+    @property
+    def geometry(self):
+        """
+        (board_size, win_length, num_cols), the arguments building a board like this one.
+        """
+        return self.board_size, self.win_length, self.num_cols
+
+    @property
+    def marks(self):
+        """
+        The (rows, cols) array of marks. Assigning a new array rebuilds the line counts;
+        change single squares through make_move() or place()/undo().
+        """
+        return self._marks
+
+    @marks.setter
+    def marks(self, marks):
+        """
+        Stores a new array of marks and recounts the marks on every winning line
+        """
+        if np.shape(marks) != (self.board_size, self.num_cols):
+            raise ValueError(f"marks of shape {np.shape(marks)} do not fit a "
+                             f"{self.board_size}x{self.num_cols} board")
+        self._marks = marks
+
+        # Number of X and O marks on each winning line, and the completed lines,
+        # gathered for all lines at once through the window index table.
+        window_marks = np.asarray(marks).ravel()[self.window_index]
+        self.line_counts, self.num_won = {}, {}
+        for mark in (GenGameBoard.PLAYER, GenGameBoard.COMPUTER):
+            counts = np.count_nonzero(window_marks == mark, axis=1)
+            self.line_counts[mark] = counts.tolist()
+            self.num_won[mark] = int(np.count_nonzero(counts == self.win_length))
+
+        # Running value of get_est_utility(): 10^(O count) - 10^(X count) summed over lines.
+        self.est_points = sum(10 ** num_o_in_row - 10 ** num_x_in_row for num_o_in_row, num_x_in_row
+                              in zip(self.line_counts[GenGameBoard.COMPUTER],
+                                     self.line_counts[GenGameBoard.PLAYER]))
+
+        # Number of empty positions left.
+        self.num_empty = int(np.count_nonzero(np.asarray(marks) == ' '))
+
+        # Zobrist hash of the X and O marks in each of the 8 orientations.
+        self.position_hashes = [0] * 8
+        for mark in (GenGameBoard.PLAYER, GenGameBoard.COMPUTER):
+            for (row, col) in np.argwhere(np.asarray(marks) == mark):
+                self.toggle_hash(row, col, mark)
+
+    @property
+    def zobrist_hash(self):
+        """
+        The Zobrist hash of the board as it stands (the identity orientation).
+        """
+        return self.position_hashes[0]
+
+    def toggle_hash(self, row, col, mark):
+        """
+        Adds or removes (XOR) an X or O at the given array indexes in the position hashes.
+        """
+        keys = self.zobrist_keys[mark][row][col]
+        self.position_hashes = [current ^ key for current, key in zip(self.position_hashes, keys)]
+
+    def get_canonical_key(self):
+        """
+        Returns (key, symmetry): a hash shared by all 8 rotations and reflections of the
+        position, and the symmetry mapping this board onto that canonical orientation.
+        Usable by any position cache; see symmetry.py.
+        """
+        return canonical_key(self.position_hashes)
+
+    @staticmethod
+    def new_context():
+        """
+        Returns a SearchContext with the default settings of the class.
+        """
+        return SearchContext(GenGameBoard.MAX_DEPTH, GenGameBoard.transposition_table,
+                             GenGameBoard.move_orderer, GenGameBoard.canonical_table_keys,
+                             opening_book=GenGameBoard.opening_book,
+                             tablebase=GenGameBoard.tablebase,
+                             stats=SearchStats() if GenGameBoard.collect_stats else None,
+                             hooks=GenGameBoard.hooks, engine=GenGameBoard.engine,
+                             prefilter=GenGameBoard.tactical_prefilter)
+
+    @staticmethod
+    def add_stats(context):
+        """
+        Adds the counters of a finished search to the class-level totals.
+        """
+        for name, value in context.get_stats().items():
+            setattr(GenGameBoard, name, getattr(GenGameBoard, name) + value)
 
     def print_board(self):
         """
@@ -53,7 +272,7 @@ class GenGameBoard:
         """
         # Print the column numbers
         print(' ', end='')
-        for j in range(self.board_size):
+        for j in range(self.num_cols):
             print(" " + str(j + 1), end='')
 
         # Print the rows with marks
@@ -61,7 +280,7 @@ class GenGameBoard:
         for i in range(self.board_size):
             # Print the line separating the row
             print(" ", end='')
-            for j in range(self.board_size):
+            for j in range(self.num_cols):
                 print("--", end='')
 
             print("-")
@@ -70,14 +289,14 @@ class GenGameBoard:
             print(i + 1, end='')
 
             # Print the marks on self row
-            for j in range(self.board_size):
+            for j in range(self.num_cols):
                 print("|" + self.marks[i][j], end='')
 
             print("|")
 
         # Print the line separating the last row
         print(" ", end='')
-        for j in range(self.board_size):
+        for j in range(self.num_cols):
             print("--", end='')
 
         print("-")
@@ -96,14 +315,14 @@ class GenGameBoard:
         row = row - 1
         col = col - 1
 
-        if row < 0 or row >= self.board_size or col < 0 or col >= self.board_size:
+        if row < 0 or row >= self.board_size or col < 0 or col >= self.num_cols:
             print("Not a valid row or column!")
             return False
 
         # Check row and col, and make sure space is empty
         # If empty, set the position to the mark and change possible to True
         if self.marks[row][col] == ' ':
-            self.marks[row][col] = mark
+            self.place(row, col, mark)
             possible = True
 
         # Print out the message to the player if the move was not possible
@@ -112,71 +331,90 @@ class GenGameBoard:
 
         return possible
 
+    def place(self, row, col, mark):
+        """
+        Places a mark at the given array indexes without any validation.
+        Used by the search to apply a move; board backends override this.
+        """
+        self._marks[row][col] = mark
+        self.num_empty = self.num_empty - 1
+
+        # Only the lines through this square can have been completed.
+        # Each gains 10^(k+1) - 10^k = 9 * 10^k points for O (or loses it for X).
+        if mark in self.line_counts:
+            self.toggle_hash(row, col, mark)
+            sign = 1 if mark == GenGameBoard.COMPUTER else -1
+            counts = self.line_counts[mark]
+            for line in self.lines_through[row][col]:
+                self.est_points = self.est_points + sign * 9 * 10 ** counts[line]
+                counts[line] = counts[line] + 1
+                if counts[line] == self.win_length:
+                    self.num_won[mark] = self.num_won[mark] + 1
+
+    def undo(self, row, col):
+        """
+        Clears the mark at the given array indexes (backtracks a place()).
+        """
+        mark = self._marks[row][col]
+        self._marks[row][col] = ' '
+        self.num_empty = self.num_empty + 1
+
+        # Only the lines through this square can stop being complete.
+        if mark in self.line_counts:
+            self.toggle_hash(row, col, mark)
+            sign = 1 if mark == GenGameBoard.COMPUTER else -1
+            counts = self.line_counts[mark]
+            for line in self.lines_through[row][col]:
+                if counts[line] == self.win_length:
+                    self.num_won[mark] = self.num_won[mark] - 1
+                counts[line] = counts[line] - 1
+                self.est_points = self.est_points - sign * 9 * 10 ** counts[line]
+
+    def get_line_counts(self, mark):
+        """
+        Returns the number of the mark's marks on each winning line, indexed like
+        win_lines. Board backends that do not keep line_counts override this.
+        """
+        return self.line_counts[mark]
+
     def check_for_win(self, mark):
-        # pylint: disable=too-many-branches
         """
         Determines whether a game winning condition exists.
         If so, returns True, and False otherwise.
         """
-        won = False  # Variable holding the return value
-
-        # Check wins by examining each combination of positions, where N is the board size.
-        #   1. Check each row for N matching values.
-        #   2. Check each column for N matching values.
-        #   3. Check the first diagonal for N matching values.
-        #   4. Check the second diagonal for N matching values.
+        # X and O wins are kept up to date by place()/undo(), so this is O(1).
+        if mark in self.num_won:
+            return self.num_won[mark] > 0
 
-        # Check each row.
-        for i in range(self.board_size):
-            won = True
-            for j in range(self.board_size):
-                if self.marks[i][j] != mark:
-                    won = False
-                    break
-            if won:
-                break
-
-        # Check each column.
-        if not won:
-            for i in range(self.board_size):
-                won = True
-                for j in range(self.board_size):
-                    if self.marks[j][i] != mark:
-                        won = False
-                        break
-                if won:
-                    break
-
-        # Check first diagonal.
-        if not won:
-            for i in range(self.board_size):
-                won = True
-                if self.marks[i][i] != mark:
-                    won = False
-                    break
-
-        # Check second diagonal.
-        if not won:
-            for i in range(self.board_size):
-                won = True
-                if self.marks[self.board_size - 1 - i][i] != mark:
-                    won = False
-                    break
+        # Any other mark is checked against each precomputed winning line.
+        for line in self.win_lines:
+            if all(self.marks[row][col] == mark for row, col in line):
+                return True
+        return False
 
-        return won
+    def get_tactical_move(self, mark=COMPUTER):
+        """
+        Returns (kind, (row, col)) when the mark's move is decided without searching
+        (an immediate 'win', a forced 'block' or a winning 'fork'), or None; see tactics.py.
+        """
+        other = GenGameBoard.PLAYER if mark == GenGameBoard.COMPUTER else GenGameBoard.COMPUTER
+        return get_tactical_move(self, mark, other)
 
     def no_more_moves(self):
         """
         Determines whether the board is full.
         If full, returns True, and False otherwise.
         """
-        return (self.marks != ' ').all()
+        return self.num_empty == 0
 
     # Then make best move for the computer by placing the mark in the best spot
-    def make_computer_move(self):
-        """ Make the computer move based on best action. """
+    def make_computer_move(self, time_budget_ms=None, context=None):
+        """
+        Make the computer move based on best action.
+        If time_budget_ms is given, the search deepens until that many milliseconds pass.
+        """
         # Calculate the best action for COMPUTER user (O).
-        best_action = self.alpha_beta_search()
+        best_action = self.alpha_beta_search(time_budget_ms, context)
         row = best_action[0] + 1
         col = best_action[1] + 1
 
@@ -195,56 +433,32 @@ class GenGameBoard:
         return self.no_more_moves() or self.check_for_win(x_mark) or self.check_for_win(o_mark)
 
     def get_est_utility(self):
-        # pylint: disable=too-many-branches
         """
-        Implements an evaluation function to estimate the utility of current state
+        Implements an evaluation function to estimate the utility of current state:
+        10^(number of O) - 10^(number of X) summed over every winning line.
+        The sum is kept up to date by place()/undo(), so this is O(1).
         """
         assert not self.is_terminal()
-        points = 0
+        return self.est_points
 
-        # Check each row
-        for i in range(self.board_size):
-            num_o_in_row = 0
-            num_x_in_row = 0
-            for j in range(self.board_size):
-                if self.marks[i][j] == GenGameBoard.COMPUTER:
-                    num_o_in_row = num_o_in_row + 1
-                elif self.marks[i][j] == GenGameBoard.PLAYER:
-                    num_x_in_row = num_x_in_row + 1
-            points = points + 10 ** num_o_in_row - 10 ** num_x_in_row
-
-        # Check each column
-        for i in range(self.board_size):
-            num_o_in_row = 0
-            num_x_in_row = 0
-            for j in range(self.board_size):
-                if self.marks[j][i] == GenGameBoard.COMPUTER:
-                    num_o_in_row = num_o_in_row + 1
-                elif self.marks[j][i] == GenGameBoard.PLAYER:
-                    num_x_in_row = num_x_in_row + 1
-            points = points + 10 ** num_o_in_row - 10 ** num_x_in_row
-
-        # Check main diagonal
-        num_o_in_row = 0
-        num_x_in_row = 0
-        for i in range(self.board_size):
-            if self.marks[i][i] == GenGameBoard.COMPUTER:
-                num_o_in_row = num_o_in_row + 1
-            elif self.marks[i][i] == GenGameBoard.PLAYER:
-                num_x_in_row = num_x_in_row + 1
-        points = points + 10 ** num_o_in_row - 10 ** num_x_in_row
-
-        # Check other diagonal
-        num_o_in_row = 0
-        num_x_in_row = 0
-        for i in range(self.board_size):
-            if self.marks[self.board_size - 1 - i][i] == GenGameBoard.COMPUTER:
-                num_o_in_row = num_o_in_row + 1
-            elif self.marks[self.board_size - 1 - i][i] == GenGameBoard.PLAYER:
-                num_x_in_row = num_x_in_row + 1
-        points = points + 10 ** num_o_in_row - 10 ** num_x_in_row
+    def get_cutoff_utility(self):
+        """
+        Estimates the utility of a non-terminal state where the search stops at MAX_DEPTH.
+        The estimate is kept strictly between the losing and winning utilities, so it is
+        never mistaken for a finished game.
+        """
+        limit = self.win_utility - 1
+        return max(-limit, min(limit, self.get_est_utility()))
 
-        return points
+    def get_leaf_value(self, terminal, context):
+        """
+        Returns the value of a node the search does not expand: the utility of a terminal
+        state, or else the estimate at the depth cutoff. Tells the hooks (if any).
+        """
+        value = self.get_utility() if terminal else self.get_cutoff_utility()
+        if context.hooks is not None:
+            context.hooks.leaf(self, context, value)
+        return value
 
     def get_utility(self):
         """
@@ -252,49 +466,333 @@ class GenGameBoard:
         """
         # assert self.is_terminal()
         if self.check_for_win(GenGameBoard.PLAYER):
-            return -10 ** self.board_size
+            return -self.win_utility
         if self.check_for_win(GenGameBoard.COMPUTER):
-            return 10 ** self.board_size
+            return self.win_utility
         return 0
 
-    def get_actions(self):
-        """ Generates a list of possible moves. """
-        return np.argwhere(self.marks == ' ')
-
-    def alpha_beta_search(self):
+    def get_actions(self, unique=False):
+        """
+        Generates a list of possible moves.
+        If unique is True, moves that mirror an earlier move under a symmetry of the
+        position are left out, since they lead to equivalent positions.
+        """
+        actions = np.argwhere(self.marks == ' ')
+        if unique:
+            actions = np.array(unique_actions(actions, self.position_hashes, self.board_size,
+                                               self.num_cols),
+                               dtype=actions.dtype).reshape(-1, 2)
+        return actions
+
+    def alpha_beta_search(self, time_budget_ms=None, context=None, return_stats=False):
         """
         Go through all possible successor states and generate the max_value
         return action (row,col) that gives the max
         uses the backtracking method
+        If time_budget_ms is given, runs iterative_deepening_search() instead.
+        A context with an engine (see pvs.py) leaves the whole search to it.
+        Positions found by get_stored_action() are answered without searching.
+        The search uses the given SearchContext, or a new one with the class defaults
+        whose counters are then added to the class totals; the search_memory (if any)
+        then supplies its table and orderer.
+        With return_stats, returns (action, SearchStats) and gathers the statistics
+        even if the context has no SearchStats of its own.
+        """
+        if context is None:
+            context = self.new_context()
+            if GenGameBoard.search_memory is not None:
+                GenGameBoard.search_memory.attach(self, context)
+            try:
+                return self.alpha_beta_search(time_budget_ms, context, return_stats)
+            finally:
+                self.add_stats(context)
+
+        if return_stats and context.stats is None:
+            context.stats = SearchStats()
+        start = time.perf_counter()
+        best_action = self.get_stored_action(context, time_budget_ms)
+        if best_action is not None:
+            best_action = np.array(best_action)
+        elif context.engine is not None:
+            best_action = context.engine.search(self, context, time_budget_ms)[1]
+        elif time_budget_ms is not None:
+            best_action = self.iterative_deepening_search(time_budget_ms, context)
+        else:
+            context.depth = 0
+            best_action = self.max_value(-math.inf, math.inf, context)[1]
+
+        if context.stats is not None:
+            context.stats.finish(context.get_stats(), time.perf_counter() - start)
+            if GenGameBoard.DEBUGGING_ON:
+                print(context.stats.to_json())
+        if context.hooks is not None:
+            context.hooks.search_done(self, context, best_action)
+        return (best_action, context.stats) if return_stats else best_action
+
+    def get_stored_action(self, context, time_budget_ms=None):
+        """
+        Returns the computer's move when the tactical prefilter decides it, or else from
+        the tablebase, or else from the opening book when the book searched the position
+        at least MAX_DEPTH deep (any depth for a time-budgeted search), or None.
+        """
+        if context.prefilter:
+            tactic = self.get_tactical_move()
+            if tactic is not None:
+                name = f'tactical_{tactic[0]}s'
+                setattr(context, name, getattr(context, name) + 1)
+                return tactic[1]
+
+        if context.tablebase is not None:
+            action = context.tablebase.get_best_action(self)
+            if action is not None:
+                context.tablebase_hits = context.tablebase_hits + 1
+                return action
+
+        if context.opening_book is not None:
+            min_depth = 0 if time_budget_ms is not None else context.max_depth
+            action = context.opening_book.lookup(self, min_depth)
+            if action is not None:
+                context.book_hits = context.book_hits + 1
+                return action
+        return None
+
+    def iterative_deepening_search(self, time_budget_ms, context):
         """
-        GenGameBoard.depth = 0
-        utility_value, best_action = self.max_value(-math.inf, math.inf)  # pylint: disable=unused-variable
-        print_current_depth(GenGameBoard.DEBUGGING_ON)
+        Anytime search: runs max_value with MAX_DEPTH = 0, 1, 2, ... until the time
+        budget (milliseconds) runs out, the tree is searched to the end, or a win or
+        loss is proven. Each iteration searches the previous best move first.
+        Returns the best action of the last completed iteration; the first iteration
+        always completes. Per-iteration timing and node counts go to self.depth_reports.
+        """
+        start = time.perf_counter()
+        saved_depth = context.max_depth
+        saved_marks = np.copy(self.marks)
+        self.depth_reports = []
+        best_action = None
+        try:
+            for max_depth in range(self.num_empty):
+                context.max_depth = max_depth
+                context.depth = 0
+                context.root_first_move = best_action
+                iteration_start = time.perf_counter()
+                nodes_before = context.num_nodes
+                try:
+                    utility_value, best_action = self.max_value(-math.inf, math.inf, context)
+                except SearchTimeout:
+                    # Put back the marks of the abandoned iteration.
+                    self.marks = saved_marks
+                    break
+
+                self.depth_reports.append({
+                    'max_depth': max_depth,
+                    'value': utility_value,
+                    'action': (int(best_action[0]), int(best_action[1])),
+                    'nodes': context.num_nodes - nodes_before,
+                    'seconds': time.perf_counter() - iteration_start
+                })
+                if GenGameBoard.DEBUGGING_ON:
+                    print(self.depth_reports[-1])
+
+                # Stop once deeper search cannot change the answer.
+                if max_depth + 1 >= self.num_empty or abs(utility_value) >= self.win_utility:
+                    break
+
+                # Later iterations may be abandoned at the deadline.
+                context.deadline = start + time_budget_ms / 1000
+        finally:
+            context.end_iterations(saved_depth)
         return best_action
 
-    def max_value(self, alpha, beta):
+    def deepen(self, search_iteration, context, value=None, time_budget_ms=None,
+               last_depth=None):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Iterative deepening driver for search engines: calls search_iteration(value),
+        which returns (value, best_action) at context.max_depth, for max_depth = 0, 1, ...
+        up to last_depth (default: the end of the game), passing on the previous value.
+        Stops early like iterative_deepening_search(); with time_budget_ms, iterations
+        after the first may be abandoned at the deadline. Each iteration searches the
+        previous best move first. Returns the last completed (value, best_action).
+        """
+        start = time.perf_counter()
+        saved_depth = context.max_depth
+        saved_marks = np.copy(self.marks)
+        if last_depth is None:
+            last_depth = self.num_empty - 1
+        best_action = None
+        try:
+            for max_depth in range(max(last_depth, 0) + 1):
+                context.max_depth = max_depth
+                context.root_first_move = best_action
+                try:
+                    value, best_action = search_iteration(value)
+                except SearchTimeout:
+                    self.marks = saved_marks
+                    break
+
+                if max_depth + 1 >= self.num_empty or abs(value) >= self.win_utility:
+                    break
+                if time_budget_ms is not None:
+                    context.deadline = start + time_budget_ms / 1000
+        finally:
+            context.end_iterations(saved_depth)
+        return value, best_action
+
+    def get_table_key(self, min_node, canonical=False):
+        """
+        Returns (key, symmetry) identifying the position in the transposition table.
+        The key is the canonical one when canonical is set (symmetry then maps the
+        board onto the canonical orientation) and the plain hash otherwise.
+        """
+        if canonical:
+            key, symmetry = self.get_canonical_key()
+        else:
+            key, symmetry = self.position_hashes[0], 0
+        if min_node:
+            key ^= self.min_node_key
+        return key, symmetry
+
+    def probe_table(self, alpha, beta, context, min_node=False):
+        """
+        Looks the position up in the transposition table.
+        Returns the stored (value, action) if it was searched at least as deep and its
+        bound settles the (alpha, beta) window, and None otherwise.
+        """
+        table = context.transposition_table
+        if table is None:
+            return None
+
+        key, symmetry = self.get_table_key(min_node, context.canonical_table_keys)
+        remaining = context.max_depth + 1 - context.depth
+        stored = table.lookup(key, remaining, alpha, beta)
+        if stored is None:
+            context.tt_misses = context.tt_misses + 1
+            return None
+
+        context.tt_hits = context.tt_hits + 1
+        if symmetry:
+            stored = stored[0], np.array(from_canonical(symmetry, stored[1], self.board_size,
+                                                                 self.num_cols))
+        return stored
+
+    def store_table(self, value, alpha, beta, best_action, context, min_node=False):
+        """
+        Stores a search result in the transposition table along with its bound type
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        table = context.transposition_table
+        if table is None:
+            return
+
+        key, symmetry = self.get_table_key(min_node, context.canonical_table_keys)
+        if symmetry:
+            best_action = to_canonical(symmetry, best_action, self.board_size, self.num_cols)
+        remaining = context.max_depth + 1 - context.depth
+        win = self.win_utility
+        if (value >= win and value > alpha) or (value <= -win and value < beta):
+            # A win or loss found within the horizon holds at any depth.
+            remaining = math.inf
+        table.record(key, value, remaining, alpha, beta, best_action)
+        context.tt_stores = context.tt_stores + 1
+
+    @staticmethod
+    def check_deadline(context):
+        """
+        Raises SearchTimeout if a time-budgeted search is past its deadline.
+        The clock is only read every 1024 nodes.
+        """
+        if context.deadline is not None and context.num_nodes % 1024 == 0 \
+                and time.perf_counter() > context.deadline:
+            raise SearchTimeout()
+
+    def get_ordered_actions(self, context):
+        """
+        Returns the moves to search from the current node, in search order.
+        At the root, symmetric moves lead to equivalent positions, so only one of each
+        is kept. The move_orderer (if any) sorts the moves, and at the root the previous
+        iteration's best move goes first.
+        """
+        depth = context.depth
+        actions = self.get_actions(unique=depth == 0)
+        if context.move_orderer is not None:
+            actions = context.move_orderer.order(actions, depth)
+        if depth == 0 and context.root_first_move is not None:
+            actions = self.move_to_front(actions, context.root_first_move)
+        return actions
+
+    def record_cutoff(self, action, context, actions):
+        """
+        Tells the move_orderer (if any) that the action caused a cutoff at this depth,
+        counts the cutoff in the SearchStats (if any) and tells the hooks (if any);
+        actions are the node's moves in search order.
+        """
+        if context.hooks is not None:
+            context.hooks.cutoff(self, context, action)
+        if context.stats is not None:
+            first_action = actions[0]
+            context.stats.record_cutoff(context.depth, action[0] == first_action[0]
+                                        and action[1] == first_action[1])
+        if context.move_orderer is not None:
+            remaining = context.max_depth + 1 - context.depth
+            context.move_orderer.record_cutoff(action, context.depth, remaining)
+
+    @staticmethod
+    def move_to_front(actions, first_action):
+        """
+        Returns the actions as a list with first_action (if present) moved to the front.
+        """
+        actions = list(actions)
+        for index, action in enumerate(actions):
+            if action[0] == first_action[0] and action[1] == first_action[1]:
+                actions.insert(0, actions.pop(index))
+                break
+        return actions
+
+    def max_value(self, alpha, beta, context=None):
         """
         Finds the action that gives highest minimax value for computer
         Returns both best action and the resulting value
+        Without a SearchContext, searches from depth 0 with a new default one.
         """
-        print_current_depth(GenGameBoard.DEBUGGING_ON)
-        if self.is_terminal() or GenGameBoard.depth > GenGameBoard.MAX_DEPTH:
-            return self.get_utility(), np.array([-1, -1])
+        if context is None:
+            context = self.new_context()
+            try:
+                return self.max_value(alpha, beta, context)
+            finally:
+                self.add_stats(context)
+
+        if context.stats is not None:
+            context.stats.record_node(context.depth)
+        context.num_nodes = context.num_nodes + 1
+        if context.hooks is not None:
+            context.hooks.enter_node(self, context)
+        self.check_deadline(context)
+        terminal = self.is_terminal()
+        if terminal or context.depth > context.max_depth:
+            return self.get_leaf_value(terminal, context), np.array([-1, -1])
+
+        # Reuse a stored result for this position if it settles the search.
+        stored = self.probe_table(alpha, beta, context)
+        if stored is not None:
+            return stored
+        original_alpha = alpha
 
         # Set lowest possible utility_value so we can move up.
         utility_value = -math.inf
+        best_action = None
 
         # Loop through available spaces on the board.
-        for action in self.get_actions():
+        actions = self.get_ordered_actions(context)
+        for action in actions:
             # Move one level deeper and make a move.
-            GenGameBoard.depth = GenGameBoard.depth + 1
-            self.marks[action[0]][action[1]] = GenGameBoard.COMPUTER
+            context.depth = context.depth + 1
+            self.place(action[0], action[1], GenGameBoard.COMPUTER)
 
             # Calculate minimum value.
-            min_val = self.min_value(alpha, beta)
+            min_val = self.min_value(alpha, beta, context)
 
             # Move one level back up.
-            GenGameBoard.depth = GenGameBoard.depth - 1
+            context.depth = context.depth - 1
 
             # Is the minimum value more desirable (a larger number for MAX)?
             if min_val > utility_value:
@@ -302,60 +800,94 @@ class GenGameBoard:
                 best_action = action
 
             # Backtrack to our prior state.
-            self.marks[action[0]][action[1]] = ' '
+            self.undo(action[0], action[1])
 
-            if utility_value >= 10 ** self.board_size:
-                GenGameBoard.utility_max = GenGameBoard.utility_max + 1
-                return utility_value, best_action
+            if utility_value >= self.win_utility:
+                context.utility_max = context.utility_max + 1
+                self.record_cutoff(best_action, context, actions)
+                break
             if utility_value >= beta:
-                GenGameBoard.num_pruned = GenGameBoard.num_pruned + 1
-                return utility_value, best_action
+                context.num_pruned = context.num_pruned + 1
+                self.record_cutoff(best_action, context, actions)
+                break
             alpha = max(alpha, utility_value)
 
         # Return the best utility value and the best action.
+        self.store_table(utility_value, original_alpha, beta, best_action, context)
         return utility_value, best_action
 
-    def min_value(self, alpha, beta):
+    def min_value(self, alpha, beta, context=None):
         """
         Finds the action that gives lowest minimax value for computer
         Returns the resulting value
+        Without a SearchContext, searches from depth 0 with a new default one.
         """
-        print_current_depth(GenGameBoard.DEBUGGING_ON)
-        if self.is_terminal() or GenGameBoard.depth > GenGameBoard.MAX_DEPTH:
-            return self.get_utility()
+        if context is None:
+            context = self.new_context()
+            try:
+                return self.min_value(alpha, beta, context)
+            finally:
+                self.add_stats(context)
+
+        if context.stats is not None:
+            context.stats.record_node(context.depth)
+        context.num_nodes = context.num_nodes + 1
+        if context.hooks is not None:
+            context.hooks.enter_node(self, context)
+        self.check_deadline(context)
+        terminal = self.is_terminal()
+        if terminal or context.depth > context.max_depth:
+            return self.get_leaf_value(terminal, context)
+
+        # Reuse a stored result for this position if it settles the search.
+        stored = self.probe_table(alpha, beta, context, min_node=True)
+        if stored is not None:
+            return stored[0]
+        original_beta = beta
 
         # Set larges possible utility_value so we can move down.
         utility_value = math.inf
+        best_action = None
 
         # Loop through available spaces on the board.
-        for action in self.get_actions():
+        actions = self.get_ordered_actions(context)
+        for action in actions:
             # Move one level deeper.
-            GenGameBoard.depth = GenGameBoard.depth + 1
-            self.marks[action[0]][action[1]] = GenGameBoard.PLAYER
+            context.depth = context.depth + 1
+            self.place(action[0], action[1], GenGameBoard.PLAYER)
 
             # Calculate minimum value.
-            utility_value = min(utility_value, self.max_value(alpha, beta)[0])
+            max_val = self.max_value(alpha, beta, context)[0]
+            if max_val < utility_value:
+                utility_value = max_val
+                best_action = action
 
             # Backtrack to prior state.
-            self.marks[action[0]][action[1]] = ' '
-            GenGameBoard.depth = GenGameBoard.depth - 1
+            self.undo(action[0], action[1])
+            context.depth = context.depth - 1
 
-            if utility_value <= -(10 ** self.board_size):
-                GenGameBoard.utility_min = GenGameBoard.utility_min + 1
-                return utility_value
+            if utility_value <= -self.win_utility:
+                context.utility_min = context.utility_min + 1
+                self.record_cutoff(best_action, context, actions)
+                break
             if utility_value <= alpha:
-                GenGameBoard.num_pruned = GenGameBoard.num_pruned + 1
-                return utility_value
+                context.num_pruned = context.num_pruned + 1
+                self.record_cutoff(best_action, context, actions)
+                break
 
             # Set the MIN utility value (beta)
             beta = min(beta, utility_value)
 
         # Return the best utility value.
+        self.store_table(utility_value, alpha, original_beta, best_action, context, min_node=True)
         return utility_value
 
 
-def main():
-    """ Runs the main program for the game. """
+def main(ponderer=None):
+    """
+    Runs the main program for the game.
+    With a Ponderer (see pondering.py), the computer searches while the player thinks.
+    """
 
     # Print out the header info
     print('Artificial Intelligence, Lewis University')
@@ -383,6 +915,8 @@ def main():
         # Try to make the move and check if it was possible
         # If not possible get col,row inputs from player
         row, col = -1, -1
+        if ponderer is not None:
+            ponderer.start(board)
         while not board.make_move(row, col, GenGameBoard.PLAYER):
             print("Player's Move")
             row, col = input("Choose your move (row, column): ").split(',')
@@ -404,7 +938,10 @@ def main():
             break
 
         # *** Computer's move ***
-        board.make_computer_move()
+        if ponderer is not None:
+            ponderer.make_computer_move(board)
+        else:
+            board.make_computer_move()
 
         # Print out the board again
         board.print_board()
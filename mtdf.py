@@ -0,0 +1,150 @@
+"""
+MTD(f): the root value found by a series of zero-window alpha-beta searches.
+
+Each pass calls max_value() with a window of width one, (beta - 1, beta), which
+only answers whether the value is below beta. The answer narrows the interval
+known to hold the value, and the next pass tests the new bound, until the
+interval closes. Values are integers, so the result is exact. The passes revisit
+the same tree, so they are only cheap with a transposition table: the memory of
+earlier passes settles most nodes. MTDFEngine therefore brings its own table for
+contexts that have none.
+
+The first guess is the score of the engine's previous move (it rarely changes
+much from one move to the next), and under a time budget each deeper iteration
+starts from the value of the one before. The number of passes and the nodes of
+each pass are kept in MTDFEngine.passes.
+
+Select it like the PVS engine:
+
+    GenGameBoard.engine = MTDFEngine()
+
+and compare it with alpha-beta on the benchmark positions with:
+
+    python mtdf.py --sizes 4 5
+"""
+
+import argparse
+import math
+import time
+
+from benchmark import BENCHMARK_SETS, SET_NAMES, make_board
+from mp2 import SearchContext
+from ordering import MoveOrderer
+from transposition import TranspositionTable
+
+
+class MTDFEngine:
+    """
+    MTD(f) engine over the memory-enhanced max_value(), for SearchContext.engine
+    """
+
+    def __init__(self, table_entries=1 << 18):
+        """
+        Constructor method - table_entries sizes the table used for contexts without one
+        """
+        self.table = TranspositionTable(table_entries)
+        self.previous_score = None  # value of the engine's last search: the next first guess
+        self.passes = []  # one {'beta', 'value', 'nodes'} dict per zero-window pass
+
+    def search_depth(self, board, guess, context):
+        """
+        Returns (value, best_action) at context.max_depth, found by zero-window passes
+        starting from the guess. The best action is the one of the last pass that
+        failed high, as that pass proved its move reaches the value.
+        """
+        lower, upper = -math.inf, math.inf
+        value, best_action, action = guess, None, None
+        while lower < upper:
+            # Test a bound inside the interval; a table filled by other searches
+            # may answer outside it.
+            beta = max(min(value, upper), lower + 1)
+            nodes_before = context.num_nodes
+            context.depth = 0
+            value, action = board.max_value(beta - 1, beta, context)
+            self.passes.append({'beta': beta, 'value': value,
+                                'nodes': context.num_nodes - nodes_before})
+            if value < beta:
+                upper = min(upper, value)
+            else:
+                lower = max(lower, value)
+                best_action = action
+        return value, best_action if best_action is not None else action
+
+    def search(self, board, context, time_budget_ms=None):
+        """
+        Returns (value, best_action) for the computer at context.max_depth, or, with
+        time_budget_ms, of the deepest iteration completed in that many milliseconds.
+        Contexts without a transposition table use the engine's own.
+        """
+        saved_table = context.transposition_table
+        if saved_table is None:
+            context.transposition_table = self.table
+        self.passes = []
+        guess = self.previous_score if self.previous_score is not None else 0
+        try:
+            if time_budget_ms is None:
+                value, best_action = self.search_depth(board, guess, context)
+            else:
+                value, best_action = board.deepen(
+                    lambda value: self.search_depth(board, value, context), context, guess,
+                    time_budget_ms)
+        finally:
+            context.transposition_table = saved_table
+        self.previous_score = value
+        return value, best_action
+
+
+def run_position(rows, max_depth, engine):
+    """
+    Searches the position with a transposition table and move orderer, with
+    max_value() or, given one, the engine. Returns (value, nodes, seconds).
+    """
+    board = make_board(rows)
+    context = SearchContext(max_depth, TranspositionTable(1 << 18),
+                            MoveOrderer(*board.geometry), engine=engine)
+    start = time.perf_counter()
+    if engine is None:
+        value = board.max_value(-math.inf, math.inf, context)[0]
+    else:
+        value = engine.search(board, context)[0]
+    return value, context.num_nodes, time.perf_counter() - start
+
+
+def compare_position(rows, max_depth):
+    """
+    Returns (same value, alpha-beta nodes, seconds, MTD(f) nodes, seconds, passes) for
+    the position.
+    """
+    value, nodes, seconds = run_position(rows, max_depth, None)
+    engine = MTDFEngine()
+    mtdf_value, mtdf_nodes, mtdf_seconds = run_position(rows, max_depth, engine)
+    return value == mtdf_value, nodes, seconds, mtdf_nodes, mtdf_seconds, len(engine.passes)
+
+
+def main():
+    """ Prints alpha-beta and MTD(f) node counts and times on the benchmark positions. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[4, 5],
+                        choices=sorted(BENCHMARK_SETS))
+    args = parser.parse_args()
+
+    print(f"{'position':<28} {'ab nodes':>9} {'ab time':>8} {'mtdf nodes':>10} "
+          f"{'mtdf time':>9} {'passes':>6} {'same':>5}")
+    totals = [0, 0, 0.0, 0.0]
+    for size in args.sizes:
+        benchmark_set = BENCHMARK_SETS[size]
+        for set_name in SET_NAMES:
+            for name, rows in benchmark_set[set_name].items():
+                same, nodes, seconds, mtdf_nodes, mtdf_seconds, passes = compare_position(
+                    rows, benchmark_set['max_depth'])
+                totals = [totals[0] + nodes, totals[1] + mtdf_nodes,
+                          totals[2] + seconds, totals[3] + mtdf_seconds]
+                key = f'{size}/{set_name}/{name}'
+                print(f"{key:<28} {nodes:>9} {seconds:>7.3f}s {mtdf_nodes:>10} "
+                      f"{mtdf_seconds:>8.3f}s {passes:>6} {str(same):>5}")
+    print(f"{'total':<28} {totals[0]:>9} {totals[2]:>7.3f}s {totals[1]:>10} "
+          f"{totals[3]:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
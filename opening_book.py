@@ -0,0 +1,270 @@
+"""
+Opening book: stored computer replies for the first plies of a game.
+
+The first computer move is the most expensive search of a game and its answer
+never changes, so build_book() searches every early position once, offline,
+and writes the replies to a compact binary file. Positions are stored by
+canonical key (see symmetry.py), so rotations and reflections share an entry,
+and the reply is kept in the canonical orientation.
+
+The book covers the positions with fewer than `plies` marks where the computer
+(O) is to move: the empty board, and positions reached by alternating moves
+starting with X. The file is a header followed by ENTRY_DTYPE records sorted by
+key; OpeningBook memory-maps it and finds an entry with a binary search.
+
+Building is resumable: each finished position is appended to '<path>.partial'
+straight away, and a restarted build skips the positions found there (or in an
+existing book). Build, or report how much of a book is covered, with:
+
+    python opening_book.py --size 4 --plies 2 --depth 8 --path book_4.bin
+    python opening_book.py --size 4 --plies 2 --path book_4.bin --status
+
+and set GenGameBoard.opening_book (or SearchContext.opening_book) to an
+OpeningBook to consult it before searching.
+"""
+
+import argparse
+import math
+import os
+import struct
+import time
+
+import numpy as np
+
+from mp2 import GenGameBoard, SearchContext
+from ordering import MoveOrderer
+from symmetry import from_canonical, to_canonical
+from transposition import TranspositionTable
+
+# File header: magic, board size, plies covered, number of entries
+HEADER = struct.Struct('<8sBBxxI')
+MAGIC = b'TTTBOOK1'
+
+# One book entry: canonical key, value, canonical reply and the depth searched
+ENTRY_DTYPE = np.dtype([('key', '<u8'), ('value', '<i4'), ('row', 'u1'), ('col', 'u1'),
+                        ('depth', 'u1'), ('pad', 'u1')])
+
+# Default search depth of the book per board size
+BOOK_DEPTHS = {3: 9, 4: 8, 5: 6}
+
+
+class OpeningBook:
+    """
+    Read-only, memory-mapped opening book for one board size
+    """
+
+    def __init__(self, path):
+        """
+        Constructor method - maps the entries of the book file into memory
+        """
+        with open(path, 'rb') as book_file:
+            magic, self.board_size, self.plies, num_entries = \
+                HEADER.unpack(book_file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not an opening book')
+        if num_entries:
+            self.entries = np.memmap(path, dtype=ENTRY_DTYPE, mode='r', offset=HEADER.size,
+                                     shape=(num_entries,))
+        else:
+            self.entries = np.zeros(0, dtype=ENTRY_DTYPE)
+        self.keys = self.entries['key']
+
+    def __len__(self):
+        """ Returns the number of positions in the book. """
+        return len(self.entries)
+
+    def probe(self, key):
+        """
+        Returns the book entry stored for the canonical key, or None if there is none.
+        """
+        index = int(np.searchsorted(self.keys, key))
+        if index < len(self.keys) and int(self.keys[index]) == key:
+            return self.entries[index]
+        return None
+
+    def lookup(self, board, min_depth=0):
+        """
+        Returns the book's (row, col) reply for the board, or None if the position is not
+        in the book or was searched less than min_depth deep (unless searched to the end),
+        or if the board is not the book's n x n board won by n in a row.
+        """
+        if board.geometry != (self.board_size,) * 3:
+            return None
+        key, symmetry = board.get_canonical_key()
+        entry = self.probe(key)
+        if entry is None:
+            return None
+        depth = int(entry['depth'])
+        if depth < min_depth and depth + 1 < board.num_empty:
+            return None
+        return from_canonical(symmetry, (int(entry['row']), int(entry['col'])), self.board_size)
+
+
+def get_book_positions(board_size, plies):
+    """
+    Returns the canonical positions of the book, as a list of (key, marks) pairs in
+    order of increasing number of marks.
+    """
+    board = GenGameBoard(board_size)
+    level = {board.get_canonical_key()[0]: np.copy(board.marks)}
+    positions = [next(iter(level.items()))]
+    for num_marks in range(1, plies):
+        mark = GenGameBoard.PLAYER if num_marks % 2 else GenGameBoard.COMPUTER
+        next_level = {}
+        for marks in level.values():
+            board.marks = np.copy(marks)
+            if board.is_terminal():
+                continue
+            for row, col in board.get_actions(unique=True):
+                board.place(row, col, mark)
+                next_level.setdefault(board.get_canonical_key()[0], np.copy(board.marks))
+                board.undo(row, col)
+        level = next_level
+
+        # The computer is to move after each X move.
+        if mark == GenGameBoard.PLAYER:
+            for key, marks in level.items():
+                board.marks = np.copy(marks)
+                if not board.is_terminal():
+                    positions.append((key, marks))
+    return positions
+
+
+def search_position(board_size, marks, depth):
+    """
+    Searches one book position and returns its ENTRY_DTYPE record.
+    """
+    board = GenGameBoard(board_size)
+    board.marks = np.copy(marks)
+    context = SearchContext(depth, TranspositionTable(1 << 18), MoveOrderer(board_size))
+    value, action = board.max_value(-math.inf, math.inf, context)
+
+    key, symmetry = board.get_canonical_key()
+    row, col = to_canonical(symmetry, (int(action[0]), int(action[1])), board_size)
+    return np.array([(key, value, row, col, depth, 0)], dtype=ENTRY_DTYPE)
+
+
+def read_entries(path):
+    """
+    Returns the entries of a book file or of a '.partial' progress file (empty if missing).
+    A partly written record at the end of a progress file is ignored.
+    """
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=ENTRY_DTYPE)
+    with open(path, 'rb') as entry_file:
+        data = entry_file.read()
+    if data.startswith(MAGIC):
+        data = data[HEADER.size:]
+    usable = len(data) - len(data) % ENTRY_DTYPE.itemsize
+    return np.frombuffer(data[:usable], dtype=ENTRY_DTYPE).copy()
+
+
+def write_book(path, board_size, plies, entries):
+    """
+    Writes the entries, sorted by key, as a book file (replacing it in one step).
+    """
+    entries = np.sort(entries, order='key')
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as book_file:
+        book_file.write(HEADER.pack(MAGIC, board_size, plies, len(entries)))
+        book_file.write(entries.tobytes())
+    os.replace(temporary_path, path)
+
+
+def get_coverage(path, board_size, plies):
+    """
+    Returns (covered, total): the book positions already searched (in the book file or
+    its progress file) and the number of book positions.
+    """
+    entries = np.concatenate([read_entries(path), read_entries(path + '.partial')])
+    done = set(entries['key'].tolist())
+    keys = [key for key, _ in get_book_positions(board_size, plies)]
+    return sum(1 for key in keys if key in done), len(keys)
+
+
+def load_progress(path):
+    """
+    Returns the entries already searched for the book at path: those of the book file
+    and of its progress file. A record left half written at the end of the progress
+    file by an interrupted build is cut off, so new records can be appended.
+    """
+    partial_path = path + '.partial'
+    partial_entries = read_entries(partial_path)
+    if os.path.exists(partial_path):
+        os.truncate(partial_path, partial_entries.nbytes)
+    return np.concatenate([read_entries(path), partial_entries])
+
+
+def build_book(path, board_size, plies, depth, report=print):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Searches every book position not yet covered and writes the book to path.
+    Progress goes to '<path>.partial' as each position finishes, so an interrupted
+    build picks up where it stopped. report(text) is called after each position.
+    """
+    entries = load_progress(path)
+    done = set(entries['key'].tolist())
+    positions = get_book_positions(board_size, plies)
+    covered = sum(1 for key, _ in positions if key in done)
+
+    start = time.perf_counter()
+    with open(path + '.partial', 'ab') as partial_file:
+        for key, marks in positions:
+            if key in done:
+                continue
+            entry = search_position(board_size, marks, depth)
+            partial_file.write(entry.tobytes())
+            partial_file.flush()
+            entries = np.concatenate([entries, entry])
+            done.add(key)
+            covered = covered + 1
+            report(f"covered {covered}/{len(positions)} positions "
+                   f"({covered / len(positions):.0%}) in {time.perf_counter() - start:.1f}s")
+
+    # Keep one entry per position (the first), then publish the book.
+    _, first = np.unique(entries['key'], return_index=True)
+    write_book(path, board_size, plies, entries[first])
+    os.remove(path + '.partial')
+    return OpeningBook(path)
+
+
+def time_reply(board, book):
+    """
+    Returns the seconds taken by alpha_beta_search() to MAX_DEPTH with the given book (or None).
+    """
+    context = SearchContext(GenGameBoard.MAX_DEPTH, opening_book=book)
+    start = time.perf_counter()
+    board.alpha_beta_search(context=context)
+    return time.perf_counter() - start
+
+
+def main():
+    """ Builds an opening book, or reports its coverage, and times a book reply. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--plies', type=int, default=2,
+                        help='cover positions with fewer than this many marks')
+    parser.add_argument('--depth', type=int, default=None,
+                        help='search depth (default: per-size table)')
+    parser.add_argument('--path', default=None, help='book file (default: book_<size>.bin)')
+    parser.add_argument('--status', action='store_true', help='only report the coverage')
+    args = parser.parse_args()
+    path = args.path or f'book_{args.size}.bin'
+
+    if args.status:
+        covered, total = get_coverage(path, args.size, args.plies)
+        print(f"{path}: covered {covered}/{total} positions ({covered / total:.0%})")
+        return
+
+    depth = args.depth if args.depth is not None else BOOK_DEPTHS.get(args.size, 4)
+    book = build_book(path, args.size, args.plies, depth)
+    print(f"{path}: {len(book)} positions, {os.path.getsize(path)} bytes")
+
+    board = GenGameBoard(args.size)
+    board.place(0, 0, GenGameBoard.PLAYER)
+    print(f"reply to a corner opening: search {time_reply(board, None) * 1000:.1f} ms, "
+          f"book {time_reply(board, book) * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Move ordering for the alpha-beta search.
+
+Alpha-beta prunes the most when the best move of a node is searched first. A
+MoveOrderer sorts the moves of each node by:
+
+    1. the killer moves of that ply (the last two moves that caused a cutoff
+       at the same depth elsewhere in the tree),
+    2. then the history score of the move (raised by remaining_depth ** 2 each
+       time it causes a cutoff anywhere) plus a static score that favours
+       squares on more winning lines and nearer the center.
+
+Pass a MoveOrderer to the SearchContext (or set GenGameBoard.move_orderer) to
+use it. Run this module directly to compare nodes and cutoffs with and without
+ordering:
+
+    python ordering.py --sizes 3 4 5
+"""
+
+import argparse
+import time
+
+from mp2 import GenGameBoard, SearchContext, get_win_lines
+
+# Number of killer moves kept per ply
+NUM_KILLERS = 2
+
+
+def get_static_scores(board_size, win_length=None, num_cols=None):
+    """
+    Returns scores[row][col]: the number of winning lines through each square,
+    with ties broken towards the center (the geometry is as in get_win_lines()).
+    """
+    num_cols = board_size if num_cols is None else num_cols
+    lines_through = get_win_lines(board_size, win_length, num_cols)[1]
+    center_row, center_col = (board_size - 1) / 2, (num_cols - 1) / 2
+    scores = []
+    for row in range(board_size):
+        scores.append([])
+        for col in range(num_cols):
+            distance = abs(row - center_row) + abs(col - center_col)
+            scores[row].append(len(lines_through[row][col]) + 1 / (1 + distance))
+    return scores
+
+
+class MoveOrderer:
+    """
+    Orders moves by killer moves, then history plus a static center/line-count score
+    """
+
+    def __init__(self, board_size, win_length=None, num_cols=None):
+        """
+        Constructor method - empty killer and history tables for the board size
+        (board_size rows by num_cols columns, won by win_length in a row, as for
+        GenGameBoard; MoveOrderer(*board.geometry) fits the board)
+        """
+        self.board_size = board_size
+        self.num_cols = board_size if num_cols is None else num_cols
+        if win_length is None:
+            win_length = min(board_size, self.num_cols)
+        self.geometry = (board_size, win_length, self.num_cols)
+        self.static_scores = get_static_scores(*self.geometry)
+        self.killers = []
+        self.history = [[0] * self.num_cols for _ in range(board_size)]
+
+    def order(self, actions, ply):
+        """
+        Returns the actions as a list sorted into search order for the given ply.
+        """
+        killers = self.killers[ply] if ply < len(self.killers) else []
+        history = self.history
+        static_scores = self.static_scores
+
+        def sort_key(action):
+            row, col = int(action[0]), int(action[1])
+            if (row, col) in killers:
+                return 0, killers.index((row, col))
+            return 1, -(history[row][col] + static_scores[row][col])
+
+        return sorted(actions, key=sort_key)
+
+    def record_cutoff(self, action, ply, remaining_depth):
+        """
+        Records that the action caused a cutoff at the given ply, with remaining_depth
+        plies left to search below it.
+        """
+        row, col = int(action[0]), int(action[1])
+        self.history[row][col] = self.history[row][col] + remaining_depth * remaining_depth
+
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if (row, col) in killers:
+            killers.remove((row, col))
+        killers.insert(0, (row, col))
+        del killers[NUM_KILLERS:]
+
+    def age(self, plies):
+        """
+        Keeps what was learned for a search from a position plies moves later: the
+        killer moves move up by plies, and history scores are halved.
+        """
+        del self.killers[:plies]
+        self.history = [[score // 2 for score in row] for row in self.history]
+
+    def clear(self):
+        """ Forgets all killer moves and history scores. """
+        self.killers = []
+        self.history = [[0] * self.num_cols for _ in range(self.board_size)]
+
+
+# Opening X moves and search depth per board size for the benchmark.
+BENCHMARK_POSITIONS = {
+    3: ([(0, 0)], 8),
+    4: ([(0, 0), (2, 1)], 5),
+    5: ([(1, 1), (3, 2)], 3),
+    6: ([(2, 2)], 2)
+}
+
+
+def run_search(board_size, orderer):
+    """
+    Searches the benchmark position of the board size with the given orderer (or None).
+    Returns the nodes visited, the cutoffs and the elapsed seconds.
+    """
+    player_moves, max_depth = BENCHMARK_POSITIONS[board_size]
+    board = GenGameBoard(board_size)
+    for row, col in player_moves:
+        board.place(row, col, GenGameBoard.PLAYER)
+
+    context = SearchContext(max_depth, move_orderer=orderer)
+    start = time.perf_counter()
+    board.alpha_beta_search(context=context)
+    elapsed = time.perf_counter() - start
+    cutoffs = context.num_pruned + context.utility_max + context.utility_min
+    return context.num_nodes, cutoffs, elapsed
+
+
+def main():
+    """ Compares nodes and cutoffs of the search with and without move ordering. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 4, 5, 6],
+                        choices=sorted(BENCHMARK_POSITIONS))
+    args = parser.parse_args()
+
+    print(f"{'':>2} {'unordered':^32} | {'ordered':^32} |")
+    print(f"{'n':>2} {'nodes':>9} {'cut/node':>8} {'time':>7} | {'nodes':>9} {'cut/node':>8} "
+          f"{'time':>7} | {'nodes saved':>11}")
+    for board_size in args.sizes:
+        nodes, cutoffs, elapsed = run_search(board_size, None)
+        ordered_nodes, ordered_cutoffs, ordered_elapsed = \
+            run_search(board_size, MoveOrderer(board_size))
+        print(f"{board_size:>2} {nodes:>9} {cutoffs / nodes:>8.3f} {elapsed:>6.2f}s | "
+              f"{ordered_nodes:>9} {ordered_cutoffs / ordered_nodes:>8.3f} "
+              f"{ordered_elapsed:>6.2f}s | {1 - ordered_nodes / nodes:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Root-split parallel alpha-beta search over a process pool.
+
+Each root move of max_value is searched by min_value in a worker process. The
+best exact root value found so far is shared through a small shared-memory
+array. Every task reads it when it starts, and again every POLL_NODES nodes
+while it searches: when another worker has raised it, the search is abandoned
+and the move searched again with the tighter alpha. A small transposition
+table per task keeps what the abandoned search found for the new one. So moves
+get the bound of every move finished before them and prune more, as they would
+in the serial search.
+
+The result is exactly the serial max_value result: the serial search picks
+the first root move (in search order) with the best value. A worker searching
+a move that comes before the move holding the shared bound uses alpha one
+below the bound (values are integers), so a tie is still searched exactly and
+the earliest best move wins.
+
+Run this module directly to measure the speedup per board size:
+
+    python parallel_search.py --sizes 3 4 5 --workers 1 2 4
+"""
+
+import argparse
+import concurrent.futures
+import math
+import multiprocessing
+import time
+
+import numpy as np
+
+from mp2 import GenGameBoard, SearchContext
+from ordering import BENCHMARK_POSITIONS
+from search_hooks import SearchHooks
+from transposition import TranspositionTable
+
+# Shared [value, root move index] of the best exact root value, set in each worker
+SHARED_BEST = None
+
+# Nodes a worker searches between reads of the shared best value
+POLL_NODES = 1024
+
+
+class BoundRaised(Exception):
+    """
+    Raised inside a worker's search when another worker has raised the task's alpha
+    """
+
+    def __init__(self, alpha):
+        super().__init__(alpha)
+        self.alpha = alpha
+
+
+def init_worker(shared_best):
+    """ Stores the shared best-value array in the worker process. """
+    global SHARED_BEST  # pylint: disable=global-statement
+    SHARED_BEST = shared_best
+
+
+def get_shared_alpha(index):
+    """
+    Returns the alpha the root move with the given index is searched with: the shared
+    best value, or one below it for a move before the current best, so that a tie is
+    still searched exactly.
+    """
+    with SHARED_BEST.get_lock():
+        best_value, best_index = SHARED_BEST[0], SHARED_BEST[1]
+    return best_value if best_index < index else best_value - 1
+
+
+class SharedBoundPoller:  # pylint: disable=too-few-public-methods
+    """
+    Search hook reading the shared best value every POLL_NODES nodes, and raising
+    BoundRaised when it gives the root move a higher alpha than the one searched with
+    """
+
+    def __init__(self, index, alpha):
+        """
+        Constructor method - index is the root move's, alpha the one it is searched with
+        """
+        self.index = index
+        self.alpha = alpha
+
+    def on_enter_node(self, _board, context):
+        """ Polls the shared best value every POLL_NODES nodes. """
+        if context.num_nodes % POLL_NODES == 0:
+            alpha = get_shared_alpha(self.index)
+            if alpha > self.alpha:
+                raise BoundRaised(alpha)
+
+
+def search_root_move(marks, win_length, max_depth, action, index):
+    """
+    Worker task: searches one root move with min_value on a board of the marks' shape
+    won by win_length in a row, again with a tighter alpha whenever another worker
+    raises the shared best value during the search.
+    Returns (index, value, exact, nodes, restarts); exact is False when the value is
+    only an upper bound because the move cannot beat the shared best value.
+    """
+    board = GenGameBoard(len(marks), win_length, len(marks[0]))
+    board.marks = marks
+    board.place(action[0], action[1], GenGameBoard.COMPUTER)
+    saved_marks = np.copy(board.marks)
+    poller = SharedBoundPoller(index, get_shared_alpha(index))
+    context = SearchContext(max_depth, TranspositionTable(1 << 14), depth=1,
+                            hooks=SearchHooks(poller))
+    restarts = 0
+    while True:
+        try:
+            value = board.min_value(poller.alpha, math.inf, context)
+            break
+        except BoundRaised as raised:
+            # Put back the marks of the abandoned search.
+            board.marks = np.copy(saved_marks)
+            context.depth = 1
+            poller.alpha = raised.alpha
+            restarts = restarts + 1
+    exact = value > poller.alpha
+
+    # Share an improved bound with the tasks that have not started yet.
+    if exact:
+        with SHARED_BEST.get_lock():
+            if value > SHARED_BEST[0] or (value == SHARED_BEST[0] and index < SHARED_BEST[1]):
+                SHARED_BEST[0], SHARED_BEST[1] = value, index
+    return index, value, exact, context.num_nodes, restarts
+
+
+class RootSplitSearch:
+    """
+    Parallel replacement for GenGameBoard.max_value at the root, using a process pool.
+    Searches one board at a time; use it as a context manager or call close().
+    """
+
+    def __init__(self, workers=None):
+        """
+        Constructor method - starts the pool of worker processes
+        """
+        self.workers = workers or multiprocessing.cpu_count()
+        self.shared_best = multiprocessing.Array('d', [-math.inf, math.inf])
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, initializer=init_worker, initargs=(self.shared_best,))
+        self.num_nodes = 0
+        self.num_restarts = 0  # root moves searched again after the shared bound rose
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ Shuts the worker processes down. """
+        self.executor.shutdown()
+
+    def search(self, board, max_depth=GenGameBoard.MAX_DEPTH):
+        """
+        Returns (utility_value, best_action) for the board, identical to
+        board.max_value(-inf, inf, SearchContext(max_depth)). Nodes visited by the
+        workers are added up in self.num_nodes, their searches abandoned for a tighter
+        bound in self.num_restarts.
+        """
+        context = SearchContext(max_depth)
+        actions = [] if board.is_terminal() else list(board.get_ordered_actions(context))
+        if not actions or context.max_depth < 0:
+            return board.max_value(-math.inf, math.inf, context)
+
+        with self.shared_best.get_lock():
+            self.shared_best[0], self.shared_best[1] = -math.inf, math.inf
+        futures = [self.executor.submit(search_root_move, np.copy(board.marks), board.win_length,
+                                        max_depth, (int(action[0]), int(action[1])), index)
+                   for index, action in enumerate(actions)]
+
+        best_value, best_index = -math.inf, None
+        self.num_nodes, self.num_restarts = 1, 0
+        for future in concurrent.futures.as_completed(futures):
+            if future.cancelled():
+                continue
+            index, value, exact, nodes, restarts = future.result()
+            self.num_nodes = self.num_nodes + nodes
+            self.num_restarts = self.num_restarts + restarts
+            if exact and (value > best_value or (value == best_value and index < best_index)):
+                best_value, best_index = value, index
+
+                # A win cannot be beaten: later moves are not needed (as in the serial search).
+                if value >= board.win_utility:
+                    for later in futures[index + 1:]:
+                        later.cancel()
+
+        return best_value, actions[best_index]
+
+
+def time_serial(board, max_depth):
+    """ Returns (value, action, seconds) of the serial root search to max_depth. """
+    start = time.perf_counter()
+    value, action = board.max_value(-math.inf, math.inf, SearchContext(max_depth))
+    return value, action, time.perf_counter() - start
+
+
+def time_parallel(board, workers, max_depth):
+    """ Returns (value, action, seconds) of the root-split search with the worker count. """
+    with RootSplitSearch(workers) as parallel:
+        parallel.search(board, max_depth)  # start the worker processes
+        start = time.perf_counter()
+        value, action = parallel.search(board, max_depth)
+        return value, action, time.perf_counter() - start
+
+
+def benchmark(board_size, worker_counts):
+    """
+    Prints the serial and parallel search times of the benchmark position of the size.
+    """
+    player_moves, max_depth = BENCHMARK_POSITIONS[board_size]
+    board = GenGameBoard(board_size)
+    for row, col in player_moves:
+        board.place(row, col, GenGameBoard.PLAYER)
+    value, action, serial_time = time_serial(board, max_depth)
+
+    for workers in worker_counts:
+        parallel_value, parallel_action, parallel_time = time_parallel(board, workers, max_depth)
+        same = parallel_value == value and tuple(parallel_action) == tuple(action)
+        print(f"{board_size:>2} {workers:>7} {serial_time:>7.2f}s {parallel_time:>8.2f}s "
+              f"{serial_time / parallel_time:>7.2f}x {str(same):>5}")
+
+
+def main():
+    """ Measures the speedup of the root-split search over the serial search. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 4, 5],
+                        choices=sorted(BENCHMARK_POSITIONS))
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"{'n':>2} {'workers':>7} {'serial':>8} {'parallel':>9} {'speedup':>8} {'same':>5}")
+    for board_size in args.sizes:
+        benchmark(board_size, args.workers)
+
+
+if __name__ == "__main__":
+    main()
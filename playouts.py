@@ -0,0 +1,161 @@
+"""
+Vectorized random playouts: thousands of games finished from one position at once.
+
+random_playouts() plays B random games from a GenGameBoard position in lockstep
+with NumPy. Each game's remaining moves are a random permutation of the empty
+squares (drawn as argsort of random keys), so step t plays the t-th square of
+every game at once. A (squares, lines) membership matrix turns those moves into
+per-line mark counts, a game is won when one of its counts reaches n, and games
+that have finished are masked out of later steps. The result is the outcome of
+each game (1 for an O win, -1 for an X win, 0 for a draw) and its length in
+moves, reproducible from a seed.
+
+Compare its games/second with a Python loop over place()/check_for_win():
+
+    python playouts.py --sizes 3 5 7 9 --games 20000
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from mp2 import GenGameBoard, get_win_lines
+
+# Line membership matrices for each board size, built once by get_line_masks()
+LINE_MASKS = {}
+
+# Games played at once; bounds the memory of the random keys and line counts
+CHUNK_SIZE = 8192
+
+
+def get_line_masks(board_size, win_length=None, num_cols=None):
+    """
+    Returns the (squares, lines) int16 matrix with a 1 where a square (row * num_cols
+    + col) lies on a winning line; (n * n, 2n + 2) for an n x n board. The geometry
+    is as in get_win_lines().
+    """
+    num_cols = board_size if num_cols is None else num_cols
+    geometry = (board_size, win_length, num_cols)
+    if geometry not in LINE_MASKS:
+        lines = get_win_lines(*geometry)[0]
+        masks = np.zeros((board_size * num_cols, len(lines)), dtype=np.int16)
+        for index, line in enumerate(lines):
+            for row, col in line:
+                masks[row * num_cols + col, index] = 1
+        LINE_MASKS[geometry] = masks
+    return LINE_MASKS[geometry]
+
+
+def play_chunk(board, num_games, mark, rng):
+    """
+    Plays num_games random games from the board with mark to move.
+    Returns (outcomes, lengths) as int8 and int16 arrays.
+    """
+    masks = get_line_masks(*board.geometry)
+    empty = np.flatnonzero(board.marks.ravel() == ' ')
+    counts = {player: np.tile(np.array(board.get_line_counts(player), dtype=np.int16),
+                              (num_games, 1))
+              for player in (GenGameBoard.PLAYER, GenGameBoard.COMPUTER)}
+    outcomes = np.zeros(num_games, dtype=np.int8)
+    lengths = np.full(num_games, len(empty), dtype=np.int16)
+
+    # Each row is one game's order of play over the empty squares.
+    order = empty[np.argsort(rng.random((num_games, len(empty))), axis=1)]
+    active = np.ones(num_games, dtype=bool)
+    for step in range(len(empty)):
+        player_counts = counts[mark]
+        player_counts += masks[order[:, step]] * active[:, None]
+        won = active & (player_counts == board.win_length).any(axis=1)
+        outcomes[won] = 1 if mark == GenGameBoard.COMPUTER else -1
+        lengths[won] = step + 1
+        active &= ~won
+        if not active.any():
+            break
+        mark = GenGameBoard.PLAYER if mark == GenGameBoard.COMPUTER else GenGameBoard.COMPUTER
+    return outcomes, lengths
+
+
+def random_playouts(board, num_games, seed=None, mark=GenGameBoard.COMPUTER):
+    """
+    Finishes num_games random games from the board's position, mark to move first.
+    Returns (outcomes, lengths): per game 1 if O won, -1 if X won, 0 for a draw, and the
+    number of moves played. seed is an int or a numpy Generator.
+    """
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    if board.is_terminal():
+        outcome = 1 if board.check_for_win(GenGameBoard.COMPUTER) \
+            else -1 if board.check_for_win(GenGameBoard.PLAYER) else 0
+        return np.full(num_games, outcome, dtype=np.int8), np.zeros(num_games, dtype=np.int16)
+
+    outcomes, lengths = [], []
+    for start in range(0, num_games, CHUNK_SIZE):
+        chunk = play_chunk(board, min(CHUNK_SIZE, num_games - start), mark, rng)
+        outcomes.append(chunk[0])
+        lengths.append(chunk[1])
+    return np.concatenate(outcomes), np.concatenate(lengths)
+
+
+def get_win_rates(outcomes):
+    """ Returns the share of O wins, X wins and draws among the outcomes. """
+    games = max(len(outcomes), 1)
+    return {GenGameBoard.COMPUTER: np.count_nonzero(outcomes == 1) / games,
+            GenGameBoard.PLAYER: np.count_nonzero(outcomes == -1) / games,
+            'draw': np.count_nonzero(outcomes == 0) / games}
+
+
+def loop_playouts(board, num_games, seed=None, mark=GenGameBoard.COMPUTER):
+    """
+    Reference implementation: the same random games with a Python loop over
+    place()/check_for_win(). Returns the outcomes.
+    """
+    generator = random.Random(seed)
+    outcomes = []
+    for _ in range(num_games):
+        squares = [(int(row), int(col)) for row, col in board.get_actions()]
+        generator.shuffle(squares)
+        player, played, outcome = mark, [], 0
+        for row, col in squares:
+            board.place(row, col, player)
+            played.append((row, col))
+            if board.check_for_win(player):
+                outcome = 1 if player == GenGameBoard.COMPUTER else -1
+                break
+            player = GenGameBoard.PLAYER if player == GenGameBoard.COMPUTER \
+                else GenGameBoard.COMPUTER
+        for row, col in played:
+            board.undo(row, col)
+        outcomes.append(outcome)
+    return np.array(outcomes, dtype=np.int8)
+
+
+def main():
+    """ Prints playout speed and win rates from the empty board of each size. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 5, 7, 9])
+    parser.add_argument('--games', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'n':>2} {'games/s':>10} {'loop games/s':>12} {'speedup':>8} "
+          f"{'O wins':>7} {'X wins':>7} {'draws':>7} {'moves':>6}")
+    for board_size in args.sizes:
+        board = GenGameBoard(board_size)
+        start = time.perf_counter()
+        outcomes, lengths = random_playouts(board, args.games, args.seed)
+        rate = args.games / (time.perf_counter() - start)
+
+        loop_games = max(args.games // 20, 1)
+        start = time.perf_counter()
+        loop_playouts(board, loop_games, args.seed)
+        loop_rate = loop_games / (time.perf_counter() - start)
+
+        rates = get_win_rates(outcomes)
+        print(f"{board_size:>2} {rate:>10.0f} {loop_rate:>12.0f} {rate / loop_rate:>7.1f}x "
+              f"{rates[GenGameBoard.COMPUTER]:>7.1%} {rates[GenGameBoard.PLAYER]:>7.1%} "
+              f"{rates['draw']:>7.1%} {lengths.mean():>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Pondering: search on the computer's time while the player is thinking.
+
+After the computer moves, Ponderer.start() searches in a background thread the
+computer's answer to each likely player reply: every reply on small boards, or
+else the replies blocking the computer's threats followed by the squares on the
+most winning lines. Answers are stored by position. When the player's actual
+move was pondered, the answer is played at once (a ponder hit). Otherwise the
+search starts afresh, but with the transposition table and move orderer the
+pondering filled, so work done on the reply (even an interrupted search) is not
+repeated.
+
+The background search is stopped as soon as the player has moved, by moving its
+deadline into the past. Ponderer.get_stats() reports the ponder-hit rate, the
+search time the hits saved and the computer's latency per move.
+
+Play a game with pondering on, or measure it against a simulated player who
+thinks for a while before each move:
+
+    python pondering.py
+    python pondering.py --simulate --size 4 --games 3 --think-ms 300
+"""
+
+import argparse
+import math
+import random
+import threading
+import time
+
+import numpy as np
+
+import mp2
+from mp2 import GenGameBoard, SearchContext, SearchTimeout
+from ordering import MoveOrderer, get_static_scores
+from tactics import get_threat_squares, get_tactical_move
+from transposition import TranspositionTable
+
+# Boards with at most this many empty squares have every reply pondered
+ALL_REPLIES_LIMIT = 16
+
+
+class Ponderer:  # pylint: disable=too-many-instance-attributes
+    """
+    Background search of the computer's answers to the player's likely replies
+    """
+
+    def __init__(self, max_depth=None, max_replies=8, table_entries=1 << 18):
+        """
+        Constructor method - max_depth defaults to GenGameBoard.MAX_DEPTH; max_replies
+        bounds the replies pondered on boards larger than ALL_REPLIES_LIMIT squares
+        """
+        self.max_depth = max_depth if max_depth is not None else GenGameBoard.MAX_DEPTH
+        self.max_replies = max_replies
+        self.transposition_table = TranspositionTable(table_entries)
+        self.move_orderer = None  # MoveOrderer for the board size of the game
+        self.static_scores = None
+        self.answers = {}  # position hash -> (action, seconds the search took)
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.context = None  # context of the background search in progress
+
+        self.hits = 0  # computer moves answered from pondering
+        self.misses = 0  # computer moves searched after the player moved
+        self.saved_seconds = 0.0  # search time of the answers played from pondering
+        self.latencies = []  # seconds from the player's move to the computer's answer
+
+    def new_context(self, geometry):
+        """
+        Returns a SearchContext sharing the ponderer's table and move orderer, for
+        boards of the geometry (see GenGameBoard.geometry).
+        """
+        if self.move_orderer is None or self.move_orderer.geometry != geometry:
+            self.move_orderer = MoveOrderer(*geometry)
+            self.static_scores = get_static_scores(*geometry)
+            self.transposition_table.clear()
+        return SearchContext(self.max_depth, self.transposition_table, self.move_orderer,
+                             prefilter=True)
+
+    def get_replies(self, board):
+        """
+        Returns the player's replies to ponder, most likely first: all of them on small
+        boards, otherwise blocks of the computer's threats, then the squares on the
+        most winning lines, up to max_replies.
+        """
+        replies = [(int(row), int(col)) for row, col in board.get_actions()]
+        if len(replies) > ALL_REPLIES_LIMIT:
+            blocks = get_threat_squares(board, GenGameBoard.COMPUTER, GenGameBoard.PLAYER)
+            replies.sort(key=lambda square: (square not in blocks,
+                                             -self.static_scores[square[0]][square[1]]))
+            replies = replies[:self.max_replies]
+        return replies
+
+    def start(self, board):
+        """ Starts pondering the replies to the board's position (X to move). """
+        self.stop()
+        self.answers = {}
+        self.stop_event.clear()
+        self.new_context(board.geometry)
+        ponder_board = GenGameBoard(*board.geometry)
+        ponder_board.marks = np.copy(board.marks)
+        self.thread = threading.Thread(target=self.ponder, args=(ponder_board,), daemon=True)
+        self.thread.start()
+
+    def ponder(self, board):
+        """ Thread target: searches the computer's answer to each reply in turn. """
+        for row, col in self.get_replies(board):
+            board.place(row, col, GenGameBoard.PLAYER)
+            if not board.is_terminal():
+                context = self.context = self.new_context(board.geometry)
+                if self.stop_event.is_set():
+                    return
+                start = time.perf_counter()
+                try:
+                    action = board.alpha_beta_search(context=context)
+                except SearchTimeout:
+                    return
+                self.answers[board.position_hashes[0]] = \
+                    (action, time.perf_counter() - start)
+            board.undo(row, col)
+            if self.stop_event.is_set():
+                return
+
+    def stop(self):
+        """ Stops the background search and waits for the thread to finish. """
+        self.stop_event.set()
+        context = self.context
+        if context is not None:
+            context.deadline = -math.inf
+        if self.thread is not None:
+            self.thread.join()
+        self.thread, self.context = None, None
+
+    def get_move(self, board):
+        """
+        Stops pondering and returns the computer's move for the board (O to move):
+        the pondered answer on a hit, else the result of a search.
+        """
+        start = time.perf_counter()
+        self.stop()
+        answer = self.answers.get(board.position_hashes[0])
+        if answer is not None:
+            action, seconds = answer
+            self.hits = self.hits + 1
+            self.saved_seconds = self.saved_seconds + seconds
+        else:
+            action = board.alpha_beta_search(context=self.new_context(board.geometry))
+            self.misses = self.misses + 1
+        self.latencies.append(time.perf_counter() - start)
+        return action
+
+    def make_computer_move(self, board):
+        """ Plays the computer's move like GenGameBoard.make_computer_move(). """
+        best_action = self.get_move(board)
+        row = best_action[0] + 1
+        col = best_action[1] + 1
+        board.make_move(row, col, GenGameBoard.COMPUTER)
+        print("Computer chose: " + str(row) + "," + str(col))
+
+    def get_stats(self):
+        """ Returns the ponder-hit rate, the search time saved and the latency per move. """
+        moves = self.hits + self.misses
+        return {'moves': moves, 'hits': self.hits,
+                'hit_rate': self.hits / moves if moves else None,
+                'saved_seconds': self.saved_seconds,
+                'mean_latency': sum(self.latencies) / moves if moves else None,
+                'max_latency': max(self.latencies, default=None)}
+
+
+def get_simulated_reply(board, generator):
+    """ Move of the simulated player: a win or a forced block if any, else random. """
+    tactic = get_tactical_move(board, GenGameBoard.PLAYER, GenGameBoard.COMPUTER)
+    if tactic is not None:
+        return tactic[1]
+    row, col = generator.choice(list(board.get_actions()))
+    return int(row), int(col)
+
+
+def simulate_game(board_size, think_ms, ponderer, seed):
+    """
+    Plays a game against a simulated player who thinks think_ms before each move.
+    Returns the computer's latency per move: with the ponderer's get_move(), or
+    with a plain search when ponderer is None.
+    """
+    generator = random.Random(seed)
+    board = GenGameBoard(board_size)
+    latencies = []
+    while True:
+        if ponderer is not None:
+            ponderer.start(board)
+        time.sleep(think_ms / 1000)
+        board.place(*get_simulated_reply(board, generator), GenGameBoard.PLAYER)
+        if board.is_terminal():
+            break
+
+        start = time.perf_counter()
+        if ponderer is not None:
+            action = ponderer.get_move(board)
+        else:
+            context = SearchContext(GenGameBoard.MAX_DEPTH, prefilter=True)
+            action = board.alpha_beta_search(context=context)
+        latencies.append(time.perf_counter() - start)
+        board.place(action[0], action[1], GenGameBoard.COMPUTER)
+        if board.is_terminal():
+            break
+    if ponderer is not None:
+        ponderer.stop()
+    return latencies
+
+
+def main():
+    """ Plays a game with pondering, or measures pondering against a simulated player. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--simulate', action='store_true',
+                        help='play simulated games instead of an interactive one')
+    parser.add_argument('--size', type=int, default=4, help='board size of simulated games')
+    parser.add_argument('--depth', type=int, default=GenGameBoard.MAX_DEPTH)
+    parser.add_argument('--games', type=int, default=3)
+    parser.add_argument('--think-ms', type=int, default=300,
+                        help='thinking time of the simulated player per move')
+    args = parser.parse_args()
+    GenGameBoard.MAX_DEPTH = args.depth
+
+    if not args.simulate:
+        ponderer = Ponderer()
+        mp2.main(ponderer)
+        ponderer.stop()
+        print(ponderer.get_stats())
+        return
+
+    plain, pondered = [], []
+    ponderer = Ponderer()
+    for game in range(args.games):
+        plain.extend(simulate_game(args.size, args.think_ms, None, game))
+        pondered.extend(simulate_game(args.size, args.think_ms, ponderer, game))
+    stats = ponderer.get_stats()
+    print(f"without pondering: {sum(plain) / len(plain) * 1000:.1f} ms per move, "
+          f"worst {max(plain) * 1000:.1f} ms")
+    print(f"with pondering:    {stats['mean_latency'] * 1000:.1f} ms per move, "
+          f"worst {stats['max_latency'] * 1000:.1f} ms")
+    print(f"ponder hits {stats['hits']}/{stats['moves']} ({stats['hit_rate']:.0%}), "
+          f"{stats['saved_seconds']:.2f}s of search saved")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Principal Variation Search: a negamax engine selectable in place of max_value().
+
+PVSEngine searches with one negamax function instead of the max_value()/min_value()
+pair: values are from the point of view of the side to move, and bounds are
+fail-soft. The first move of a node (the principal variation) is searched with
+the full window, and the others with a null window that only proves them no
+better; a move that turns out better is searched again with the full window.
+
+The root is searched by iterative deepening up to the context's max_depth (or
+until a time budget runs out), with an aspiration window around the previous
+iteration's value. When the value falls outside the window, that side is opened
+and the iteration searched again, so the root value is exactly the one
+max_value() finds at the same depth. Move ordering, the transposition table, the
+SearchStats and the hooks of the context are used as in max_value().
+
+Select it for one search or for every default search with
+
+    board.alpha_beta_search(context=SearchContext(4, engine=PVSEngine()))
+    GenGameBoard.engine = PVSEngine()
+
+and compare its node counts with alpha-beta on the 4x4 and 5x5 benchmark
+positions with:
+
+    python pvs.py --sizes 4 5
+"""
+
+import argparse
+import math
+
+import numpy as np
+
+from benchmark import BENCHMARK_SETS, SET_NAMES, make_board
+from mp2 import GenGameBoard, SearchContext
+from ordering import MoveOrderer
+from transposition import TranspositionTable
+
+
+def negamax(board, alpha, beta, color, context):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-branches
+    # pylint: disable=too-many-locals
+    """
+    Returns (value, best_action) of the position for the side to move: the computer
+    when color is 1, the player when it is -1. Values are fail-soft: at most alpha
+    when no move reaches alpha, at least beta when a move reaches beta.
+    """
+    if context.stats is not None:
+        context.stats.record_node(context.depth)
+    context.num_nodes = context.num_nodes + 1
+    if context.hooks is not None:
+        context.hooks.enter_node(board, context)
+    board.check_deadline(context)
+    terminal = board.is_terminal()
+    if terminal or context.depth > context.max_depth:
+        return color * board.get_leaf_value(terminal, context), np.array([-1, -1])
+
+    # The table holds values from the computer's point of view.
+    min_node = color < 0
+    window = (-beta, -alpha) if min_node else (alpha, beta)
+    stored = board.probe_table(window[0], window[1], context, min_node)
+    if stored is not None:
+        return color * stored[0], stored[1]
+
+    mark = GenGameBoard.PLAYER if min_node else GenGameBoard.COMPUTER
+    win = board.win_utility
+    best_value, best_action = -math.inf, None
+    actions = board.get_ordered_actions(context)
+    for index, action in enumerate(actions):
+        context.depth = context.depth + 1
+        board.place(action[0], action[1], mark)
+        if index == 0:
+            value = -negamax(board, -beta, -alpha, -color, context)[0]
+        else:
+            # Prove the move no better than alpha; search it fully if it is.
+            value = -negamax(board, -alpha - 1, -alpha, -color, context)[0]
+            if alpha < value < beta:
+                value = -negamax(board, -beta, -value, -color, context)[0]
+        board.undo(action[0], action[1])
+        context.depth = context.depth - 1
+
+        if value > best_value:
+            best_value, best_action = value, action
+        if best_value >= win:
+            if min_node:
+                context.utility_min = context.utility_min + 1
+            else:
+                context.utility_max = context.utility_max + 1
+            board.record_cutoff(best_action, context, actions)
+            break
+        if best_value >= beta:
+            context.num_pruned = context.num_pruned + 1
+            board.record_cutoff(best_action, context, actions)
+            break
+        alpha = max(alpha, best_value)
+
+    board.store_table(color * best_value, window[0], window[1], best_action, context, min_node)
+    return best_value, best_action
+
+
+class PVSEngine:
+    """
+    Principal Variation Search engine with aspiration windows, for SearchContext.engine
+    """
+
+    def __init__(self, aspiration_window=None):
+        """
+        Constructor method - aspiration_window is the half-width of the window around
+        the previous iteration's value (default: a tenth of a win, 10^(n-1))
+        """
+        self.aspiration_window = aspiration_window
+        self.researches = 0  # iterations searched again after leaving the aspiration window
+
+    def search_root(self, board, guess, context):
+        """
+        Returns (value, best_action) of one iteration at context.max_depth, searching
+        with a window around the guess (the full window without one) and widening it
+        until the value falls inside.
+        """
+        if guess is None:
+            alpha, beta = -math.inf, math.inf
+        else:
+            delta = self.aspiration_window or board.win_utility // 10
+            alpha, beta = guess - delta, guess + delta
+        while True:
+            context.depth = 0
+            value, action = negamax(board, alpha, beta, 1, context)
+            if alpha < value < beta:
+                return value, action
+            self.researches = self.researches + 1
+            if value <= alpha:
+                alpha = -math.inf
+            else:
+                beta = math.inf
+
+    def search(self, board, context, time_budget_ms=None):
+        """
+        Returns (value, best_action) for the computer, searched by iterative deepening
+        to context.max_depth, or until time_budget_ms milliseconds pass (the first
+        iteration always completes). Each iteration searches the previous best move
+        first, within an aspiration window around the previous value.
+        """
+        last_depth = context.max_depth if time_budget_ms is None else None
+        return board.deepen(lambda guess: self.search_root(board, guess, context), context,
+                            time_budget_ms=time_budget_ms, last_depth=last_depth)
+
+
+def compare_position(rows, max_depth, with_helpers):
+    """
+    Searches the position with max_value() and with the PVS engine.
+    Returns (alpha-beta value, nodes, PVS value, nodes); with_helpers gives both a
+    transposition table and a move orderer.
+    """
+    values, nodes = [], []
+    for engine in (None, PVSEngine()):
+        board = make_board(rows)
+        context = SearchContext(max_depth, engine=engine)
+        if with_helpers:
+            context.transposition_table = TranspositionTable(1 << 16)
+            context.move_orderer = MoveOrderer(*board.geometry)
+        if engine is None:
+            value = board.max_value(-math.inf, math.inf, context)[0]
+        else:
+            value = engine.search(board, context)[0]
+        values.append(value)
+        nodes.append(context.num_nodes)
+    return values[0], nodes[0], values[1], nodes[1]
+
+
+def main():
+    """ Prints the alpha-beta and PVS node counts of the benchmark positions. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[4, 5],
+                        choices=sorted(BENCHMARK_SETS))
+    parser.add_argument('--helpers', action='store_true',
+                        help='give both searches a transposition table and a move orderer')
+    args = parser.parse_args()
+
+    print(f"{'position':<28} {'alpha-beta':>10} {'pvs':>8} {'ratio':>6} {'same':>5}")
+    totals = [0, 0]
+    for size in args.sizes:
+        benchmark_set = BENCHMARK_SETS[size]
+        for set_name in SET_NAMES:
+            for name, rows in benchmark_set[set_name].items():
+                value, nodes, pvs_value, pvs_nodes = compare_position(
+                    rows, benchmark_set['max_depth'], args.helpers)
+                totals = [totals[0] + nodes, totals[1] + pvs_nodes]
+                key = f'{size}/{set_name}/{name}'
+                print(f"{key:<28} {nodes:>10} {pvs_nodes:>8} "
+                      f"{pvs_nodes / nodes:>6.2f} {str(value == pvs_value):>5}")
+    print(f"{'total':<28} {totals[0]:>10} {totals[1]:>8} {totals[1] / totals[0]:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Hooks for watching the alpha-beta search without editing it.
+
+A SearchHooks registry holds callbacks for four events:
+
+    on_enter_node(board, context)          max_value()/min_value() visit a node
+    on_cutoff(board, context, action)      the action cut off the rest of a node's moves
+    on_leaf(board, context, value)         a terminal or depth-cutoff node was evaluated
+    on_search_done(board, context, action) alpha_beta_search() chose the action
+
+Set it as SearchContext.hooks (or GenGameBoard.hooks for default searches). Without
+hooks the search pays one `is None` test per node. The registry builds one
+dispatcher per event when callbacks change, so an event with a single callback
+calls it directly and an event without callbacks calls a no-op.
+
+SamplingProfiler is a bundled hook that attributes the search time to the depth
+(and node type) being searched and writes it as collapsed stacks, the input
+format of flamegraph.pl and speedscope. Profile a search, and measure what the
+hooks cost, with:
+
+    python search_hooks.py --size 4 --output search.folded
+"""
+
+import argparse
+import math
+import time
+
+from benchmark import BENCHMARK_SETS, SET_NAMES, make_board
+from mp2 import SearchContext
+
+# Events a callback can be registered for
+EVENTS = ('on_enter_node', 'on_cutoff', 'on_leaf', 'on_search_done')
+
+
+def ignore_event(*_args):
+    """ Dispatcher of an event without callbacks. """
+
+
+def get_dispatcher(callbacks):
+    """ Returns a function calling every callback in turn with its arguments. """
+    if not callbacks:
+        return ignore_event
+    if len(callbacks) == 1:
+        return callbacks[0]
+
+    def dispatch(*args):
+        for callback in callbacks:
+            callback(*args)
+    return dispatch
+
+
+class SearchHooks:
+    """
+    Registry of the callbacks watching a search, with one dispatcher per event
+    """
+
+    def __init__(self, *hooks):
+        """
+        Constructor method - registers the on_* methods of each hook object given
+        """
+        self.callbacks = {event: [] for event in EVENTS}
+        self.enter_node = self.cutoff = self.leaf = self.search_done = ignore_event
+        for hook in hooks:
+            self.add(hook)
+
+    def register(self, event, callback):
+        """ Calls callback on each event (one of EVENTS) and returns it. """
+        if event not in self.callbacks:
+            raise ValueError(f'unknown search event {event!r}, expected one of {EVENTS}')
+        self.callbacks[event].append(callback)
+        self.update_dispatchers()
+        return callback
+
+    def unregister(self, event, callback):
+        """ Stops calling callback on the event. """
+        self.callbacks[event].remove(callback)
+        self.update_dispatchers()
+
+    def add(self, hook):
+        """ Registers every on_* method of the hook object that names an event. """
+        for event in EVENTS:
+            callback = getattr(hook, event, None)
+            if callback is not None:
+                self.register(event, callback)
+
+    def update_dispatchers(self):
+        """ Rebuilds the dispatcher the search calls for each event. """
+        self.enter_node = get_dispatcher(tuple(self.callbacks['on_enter_node']))
+        self.cutoff = get_dispatcher(tuple(self.callbacks['on_cutoff']))
+        self.leaf = get_dispatcher(tuple(self.callbacks['on_leaf']))
+        self.search_done = get_dispatcher(tuple(self.callbacks['on_search_done']))
+
+
+class SamplingProfiler:
+    """
+    Hook sampling the search stack every `interval` seconds
+
+    At the first node or leaf after each interval, the time since the previous
+    sample is added to the current stack: the root frame, then one max_value or
+    min_value frame per depth (the root is a max node), then 'leaf' while a leaf is
+    evaluated.
+    """
+
+    def __init__(self, interval=0.0005, root='alpha_beta_search'):
+        """
+        Constructor method - starts with no samples
+        """
+        self.interval = interval
+        self.root = root
+        self.samples = {}  # stack (tuple of frames) -> seconds
+        self.stacks = {}  # (depth, leaf) -> stack, built once each
+        self.last_sample = None  # time.perf_counter() of the previous sample
+
+    def get_stack(self, depth, leaf):
+        """ Returns the stack of frames of a node at the depth. """
+        key = (depth, leaf)
+        stack = self.stacks.get(key)
+        if stack is None:
+            frames = [self.root] + [('max_value' if ply % 2 == 0 else 'min_value') + f'[{ply}]'
+                                    for ply in range(depth + 1)]
+            stack = self.stacks[key] = tuple(frames + ['leaf'] if leaf else frames)
+        return stack
+
+    def sample(self, depth, leaf):
+        """ Adds the time since the last sample to the stack, once the interval has passed. """
+        now = time.perf_counter()
+        if self.last_sample is None:
+            self.last_sample = now
+        elif now - self.last_sample >= self.interval:
+            stack = self.get_stack(depth, leaf)
+            self.samples[stack] = self.samples.get(stack, 0.0) + now - self.last_sample
+            self.last_sample = now
+
+    def on_enter_node(self, _board, context):
+        """ Samples the search at a node. """
+        self.sample(context.depth, False)
+
+    def on_leaf(self, _board, context, _value):
+        """ Samples the search at a leaf. """
+        self.sample(context.depth, True)
+
+    def on_search_done(self, _board, _context, _action):
+        """ Stops timing until the next search starts. """
+        self.last_sample = None
+
+    def get_collapsed(self):
+        """ Returns the samples as collapsed-stack lines, weighted in microseconds. """
+        return [f"{';'.join(stack)} {round(seconds * 1e6)}"
+                for stack, seconds in sorted(self.samples.items()) if round(seconds * 1e6)]
+
+    def write_collapsed(self, path):
+        """ Writes the samples as a collapsed-stack file for flamegraph tools. """
+        with open(path, 'w', encoding='utf-8') as collapsed_file:
+            for line in self.get_collapsed():
+                collapsed_file.write(line + '\n')
+
+
+def time_positions(board_size, hooks):
+    """ Returns the seconds taken to search the benchmark positions of the size. """
+    benchmark_set = BENCHMARK_SETS[board_size]
+    seconds = 0.0
+    for set_name in SET_NAMES:
+        for rows in benchmark_set[set_name].values():
+            board = make_board(rows)
+            context = SearchContext(benchmark_set['max_depth'], hooks=hooks)
+            start = time.perf_counter()
+            action = board.max_value(-math.inf, math.inf, context)[1]
+            if hooks is not None:
+                hooks.search_done(board, context, action)
+            seconds = seconds + time.perf_counter() - start
+    return seconds
+
+
+def main():
+    """ Times the search without hooks, with an empty registry and with the profiler. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=4, choices=sorted(BENCHMARK_SETS))
+    parser.add_argument('--repeats', type=int, default=5, help='runs per setup (best kept)')
+    parser.add_argument('--output', help='write the profile as a collapsed-stack file')
+    args = parser.parse_args()
+
+    profiler = SamplingProfiler()
+    setups = {'no hooks': None, 'empty registry': SearchHooks(),
+              'sampling profiler': SearchHooks(profiler)}
+    best = dict.fromkeys(setups, math.inf)
+    # Alternate the setups so that drifting machine load affects them alike.
+    for _ in range(args.repeats):
+        for name, hooks in setups.items():
+            best[name] = min(best[name], time_positions(args.size, hooks))
+    for name, seconds in best.items():
+        print(f"{name:<18} {seconds:.4f}s ({seconds / best['no hooks'] - 1:+.1%})")
+
+    if args.output:
+        profiler.write_collapsed(args.output)
+        print(f"wrote {len(profiler.samples)} stacks to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Search memory kept between the computer's moves of a game.
+
+The position the computer searches on its next move is two plies below the root
+of its last search, so most of what that search learned still applies. A
+SearchMemory keeps the transposition table and move orderer from one search to
+the next, aged rather than cleared: table entries of earlier searches still
+answer lookups but give way to new results, killer moves move up by the plies
+played and history scores are halved. The table's max_entries caps the memory
+a game can use. new_game() forgets everything; it is also done automatically
+when a search starts from a position that cannot follow the last one.
+
+Install it for every search with the class defaults:
+
+    GenGameBoard.search_memory = SearchMemory()
+
+and compare the time per move over full games with fresh searches using:
+
+    python search_memory.py --sizes 4 5 --games 3
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from mp2 import GenGameBoard, SearchContext
+from ordering import MoveOrderer
+from pondering import get_simulated_reply
+from symmetry import from_canonical
+from transposition import TranspositionTable
+
+# Default search depth per board size for the benchmark.
+BENCHMARK_DEPTHS = {3: 9, 4: 5, 5: 4, 6: 3}
+
+
+class SearchMemory:
+    """
+    Transposition table and move orderer kept, and aged, across the moves of a game
+    """
+
+    def __init__(self, max_entries=1 << 18):
+        """
+        Constructor method - max_entries caps the table entries kept for a game
+        """
+        self.transposition_table = TranspositionTable(max_entries)
+        self.move_orderer = None  # MoveOrderer for the board size of the game
+        self.root_empty = None  # empty squares at the root of the last search
+        self.num_searches = 0  # searches since the game started
+
+    def new_game(self):
+        """ Forgets the table entries, killer moves and history of the last game. """
+        self.transposition_table.clear()
+        self.move_orderer = None
+        self.root_empty = None
+        self.num_searches = 0
+
+    def prepare(self, board):
+        """
+        Ages the memory for a search from the board's position, or starts a new game
+        when the board geometry changed or the board has more empty squares than the root
+        of the last search.
+        """
+        if self.move_orderer is None or self.move_orderer.geometry != board.geometry \
+                or board.num_empty > self.root_empty:
+            self.new_game()
+            self.move_orderer = MoveOrderer(*board.geometry)
+        else:
+            self.transposition_table.new_generation()
+            self.move_orderer.age(self.root_empty - board.num_empty)
+        self.root_empty = board.num_empty
+        self.num_searches = self.num_searches + 1
+
+    def attach(self, board, context):
+        """ Prepares the memory for a search from the board and gives it to the context. """
+        self.prepare(board)
+        context.transposition_table = self.transposition_table
+        context.move_orderer = self.move_orderer
+        key, symmetry = board.get_table_key(False, context.canonical_table_keys)
+        entry = self.transposition_table.probe(key)
+        if entry is not None and entry.best_move is not None:
+            context.root_first_move = entry.best_move if not symmetry else \
+                from_canonical(symmetry, entry.best_move, board.board_size, board.num_cols)
+        return context
+
+
+def time_search(board, context):
+    """ Returns (action, nodes, seconds) of a search with the context. """
+    start = time.perf_counter()
+    action = board.alpha_beta_search(context=context)
+    return action, context.num_nodes, time.perf_counter() - start
+
+
+def play_game(board_size, max_depth, memory, seed, max_entries=1 << 18):
+    """
+    Plays a game against a simulated player, the computer searching with the memory.
+    Each position is also searched fresh, with an empty table and orderer of the
+    same size. Returns a (fresh seconds, fresh nodes, memory seconds, memory nodes)
+    tuple per computer move.
+    """
+    generator = random.Random(seed)
+    board = GenGameBoard(board_size)
+    memory.new_game()
+    moves = []
+    while True:
+        board.place(*get_simulated_reply(board, generator), GenGameBoard.PLAYER)
+        if board.is_terminal():
+            break
+
+        fresh = SearchContext(max_depth, TranspositionTable(max_entries),
+                              MoveOrderer(board_size), prefilter=True)
+        _, fresh_nodes, fresh_seconds = time_search(board, fresh)
+        context = memory.attach(board, SearchContext(max_depth, prefilter=True))
+        action, nodes, seconds = time_search(board, context)
+        moves.append((fresh_seconds, fresh_nodes, seconds, nodes))
+
+        board.place(int(action[0]), int(action[1]), GenGameBoard.COMPUTER)
+        if board.is_terminal():
+            break
+    return moves
+
+
+def main():
+    """ Prints the time and nodes per move of fresh searches and of the search memory. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[4, 5])
+    parser.add_argument('--depth', type=int, default=None,
+                        help='MAX_DEPTH for every size (default: per-size table)')
+    parser.add_argument('--games', type=int, default=3)
+    parser.add_argument('--entries', type=int, default=1 << 18, help='table entry cap')
+    parser.add_argument('--per-move', action='store_true',
+                        help='print every move of every game')
+    args = parser.parse_args()
+
+    memory = SearchMemory(args.entries)
+    print(f"{'n':>2} {'depth':>5} {'moves':>5} {'fresh ms':>9} {'kept ms':>8} "
+          f"{'fresh nodes':>11} {'kept nodes':>10} {'speedup':>8}")
+    for board_size in args.sizes:
+        depth = args.depth if args.depth is not None else BENCHMARK_DEPTHS.get(board_size, 2)
+        moves = []
+        for game in range(args.games):
+            game_moves = play_game(board_size, depth, memory, game, args.entries)
+            moves.extend(game_moves)
+            if args.per_move:
+                for number, (fresh, fresh_nodes, kept, kept_nodes) in enumerate(game_moves):
+                    print(f"   game {game} move {number + 1:>2}: {fresh * 1000:>8.1f} ms "
+                          f"{kept * 1000:>8.1f} ms {fresh_nodes:>9} {kept_nodes:>9} nodes")
+        fresh = statistics.mean(move[0] for move in moves)
+        kept = statistics.mean(move[2] for move in moves)
+        print(f"{board_size:>2} {depth:>5} {len(moves):>5} {fresh * 1000:>9.1f} "
+              f"{kept * 1000:>8.1f} {sum(move[1] for move in moves):>11} "
+              f"{sum(move[3] for move in moves):>10} {fresh / kept:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Structured statistics of one search.
+
+Give a SearchContext a SearchStats (or call alpha_beta_search(return_stats=True))
+and max_value()/min_value() count the nodes and cutoffs at each depth. When the
+search ends the context's counters, the elapsed time and the derived figures --
+effective branching factor, first-move cutoff rate, cache hit rates and
+nodes/second -- are available from the object and as JSON. Without a
+SearchStats the search only pays one `is None` test per node, and setting
+GenGameBoard.collect_stats turns them on for every default search. Measure what
+gathering them costs with:
+
+    python benchmark.py --with-stats --baseline benchmark_baseline.json
+"""
+
+import json
+
+
+class SearchStats:
+    """
+    Per-depth node and cutoff counts of a search, plus its counters and timing
+    """
+
+    def __init__(self):
+        """
+        Constructor method - starts with no nodes counted
+        """
+        self.nodes_per_depth = []  # nodes visited at each depth (root = 0)
+        self.cutoffs_per_depth = []  # beta/alpha and win/loss cutoffs at each depth
+        self.first_move_cutoffs = 0  # cutoffs caused by the first move searched
+        self.counters = {}  # SearchContext counters when the search ended
+        self.elapsed = 0.0  # seconds taken by the search
+
+    def record_node(self, depth):
+        """ Counts a node visited at the depth. """
+        try:
+            self.nodes_per_depth[depth] = self.nodes_per_depth[depth] + 1
+        except IndexError:
+            while len(self.nodes_per_depth) <= depth:
+                self.nodes_per_depth.append(0)
+                self.cutoffs_per_depth.append(0)
+            self.nodes_per_depth[depth] = 1
+
+    def record_cutoff(self, depth, first_move):
+        """ Counts a cutoff at the depth; first_move tells if the first move caused it. """
+        self.cutoffs_per_depth[depth] = self.cutoffs_per_depth[depth] + 1
+        if first_move:
+            self.first_move_cutoffs = self.first_move_cutoffs + 1
+
+    def finish(self, counters, elapsed):
+        """ Records the context's counters and the seconds the search took. """
+        self.counters = dict(counters)
+        self.elapsed = elapsed
+
+    @property
+    def num_nodes(self):
+        """ The number of nodes visited. """
+        return sum(self.nodes_per_depth)
+
+    @property
+    def num_cutoffs(self):
+        """ The number of cutoffs. """
+        return sum(self.cutoffs_per_depth)
+
+    @property
+    def effective_branching_factor(self):
+        """
+        The branching factor b of a uniform tree as deep as the search with as many nodes:
+        1 + b + b^2 + ... + b^d = nodes. None if the search did not go below the root.
+        """
+        depth, nodes = len(self.nodes_per_depth) - 1, self.num_nodes
+        if depth < 1:
+            return None
+        low, high = 0.0, float(nodes)
+        for _ in range(100):
+            middle = (low + high) / 2
+            if sum(middle ** ply for ply in range(depth + 1)) < nodes:
+                low = middle
+            else:
+                high = middle
+        return (low + high) / 2
+
+    @property
+    def first_move_cutoff_rate(self):
+        """ The share of cutoffs caused by the first move searched (None without cutoffs). """
+        return self.first_move_cutoffs / self.num_cutoffs if self.num_cutoffs else None
+
+    @property
+    def tt_hit_rate(self):
+        """ The share of transposition table lookups that answered (None without lookups). """
+        lookups = self.counters.get('tt_hits', 0) + self.counters.get('tt_misses', 0)
+        return self.counters.get('tt_hits', 0) / lookups if lookups else None
+
+    @property
+    def nodes_per_second(self):
+        """ Nodes visited per second of search (None before the search ends). """
+        return self.num_nodes / self.elapsed if self.elapsed else None
+
+    def to_dict(self):
+        """ Returns the statistics as a JSON-ready dict. """
+        return {
+            'nodes': self.num_nodes,
+            'nodes_per_depth': list(self.nodes_per_depth),
+            'cutoffs': self.num_cutoffs,
+            'cutoffs_per_depth': list(self.cutoffs_per_depth),
+            'effective_branching_factor': self.effective_branching_factor,
+            'first_move_cutoff_rate': self.first_move_cutoff_rate,
+            'tt_hit_rate': self.tt_hit_rate,
+            'book_hits': self.counters.get('book_hits', 0),
+            'tablebase_hits': self.counters.get('tablebase_hits', 0),
+            'elapsed': self.elapsed,
+            'nodes_per_second': self.nodes_per_second,
+            'counters': dict(self.counters)
+        }
+
+    def to_json(self, **kwargs):
+        """ Returns the statistics as a JSON string (kwargs go to json.dumps). """
+        return json.dumps(self.to_dict(), **kwargs)
@@ -0,0 +1,94 @@
+"""
+The 8 symmetries (rotations and reflections) of a square board.
+
+Boards hash each mark under every symmetry at once (see get_zobrist_keys in
+mp2.py), so the canonical key of a position -- the same for all 8 of its
+images -- is just the smallest of its 8 hashes. Moves stored under a canonical
+key are kept in the canonical orientation and mapped back with the inverse
+symmetry. At the root, moves that are images of each other under a symmetry of
+the position lead to equivalent positions, so only one of them is searched.
+
+An m x n board with m != n only has 4 symmetries: the rotations by 90 degrees
+and the diagonal mirrors do not map it onto itself, so their tables are the
+identity there.
+"""
+
+# Maps (row, col) to its image under each symmetry of an m x n board
+# (last_row = m - 1, last_col = n - 1; the ones swapping rows and columns need m == n)
+SYMMETRIES = (
+    lambda row, col, last_row, last_col: (row, col),  # identity
+    lambda row, col, last_row, last_col: (col, last_row - row),  # rotate 90 degrees clockwise
+    lambda row, col, last_row, last_col: (last_row - row, last_col - col),  # rotate 180 degrees
+    lambda row, col, last_row, last_col: (last_col - col, row),  # rotate 270 degrees clockwise
+    lambda row, col, last_row, last_col: (row, last_col - col),  # mirror left to right
+    lambda row, col, last_row, last_col: (last_row - row, col),  # mirror top to bottom
+    lambda row, col, last_row, last_col: (col, row),  # mirror on the main diagonal
+    lambda row, col, last_row, last_col: (last_col - col, last_row - row)  # the other diagonal
+)
+
+# Index of the symmetry that undoes each symmetry
+INVERSES = (0, 3, 2, 1, 4, 5, 6, 7)
+
+# Symmetries that swap rows and columns, valid on square boards only
+TRANSPOSING = (1, 3, 6, 7)
+
+# Image tables for each board size, built once by get_symmetry_tables()
+SYMMETRY_TABLES = {}
+
+
+def get_symmetry_tables(board_size, num_cols=None):
+    """
+    Returns tables[symmetry][row][col], the (row, col) image of each position
+    under each of the 8 symmetries of the board size (board_size rows by num_cols
+    columns, square by default).
+    """
+    num_cols = board_size if num_cols is None else num_cols
+    if (board_size, num_cols) not in SYMMETRY_TABLES:
+        tables = []
+        for index, symmetry in enumerate(SYMMETRIES):
+            if board_size != num_cols and index in TRANSPOSING:
+                symmetry = SYMMETRIES[0]
+            tables.append([[symmetry(row, col, board_size - 1, num_cols - 1)
+                            for col in range(num_cols)] for row in range(board_size)])
+        SYMMETRY_TABLES[(board_size, num_cols)] = tables
+    return SYMMETRY_TABLES[(board_size, num_cols)]
+
+
+def transform(symmetry, action, board_size, num_cols=None):
+    """ Returns the (row, col) image of the action under the symmetry. """
+    return get_symmetry_tables(board_size, num_cols)[symmetry][action[0]][action[1]]
+
+
+def canonical_key(position_hashes):
+    """
+    Returns (key, symmetry) for a position given its hash under each symmetry:
+    the smallest hash, and the symmetry that maps the position to that orientation.
+    """
+    return min((key, symmetry) for symmetry, key in enumerate(position_hashes))
+
+
+def to_canonical(symmetry, action, board_size, num_cols=None):
+    """ Maps an action on the board into the canonical orientation. """
+    return transform(symmetry, action, board_size, num_cols)
+
+
+def from_canonical(symmetry, action, board_size, num_cols=None):
+    """ Maps an action stored in the canonical orientation back onto the board. """
+    return transform(INVERSES[symmetry], action, board_size, num_cols)
+
+
+def unique_actions(actions, position_hashes, board_size, num_cols=None):
+    """
+    Drops every action that is the image of an earlier (row-major) action under a
+    symmetry leaving the position unchanged, i.e. one whose hash equals the identity's.
+    """
+    tables = get_symmetry_tables(board_size, num_cols)
+    stabilizer = [tables[symmetry] for symmetry, key in enumerate(position_hashes)
+                  if key == position_hashes[0] and symmetry != 0]
+    if not stabilizer:
+        return actions
+
+    kept = [action for action in actions
+            if all(tuple(table[action[0]][action[1]]) >= (action[0], action[1])
+                   for table in stabilizer)]
+    return kept
@@ -0,0 +1,366 @@
+"""
+Solved-game tablebase for small boards, built by retrograde analysis.
+
+Every board of size n is given a perfect index: the base-3 number whose digit
+row * n + col is 0 for an empty square, 1 for X and 2 for O. The table holds one
+byte per index: the game-theoretic value (O wins, draw or X wins) and the
+number of plies to the end of the game with best play (the winner hurries, the
+loser delays), or ILLEGAL for a board that cannot arise in a game X starts.
+
+build_tablebase() works backwards from the full boards: a position with k marks
+is solved from its children with k + 1 marks, all positions of a level at once
+with NumPy. That is 3^9 bytes for 3x3 and 3^16 bytes (43 MB) for 4x4, written to
+a file that Tablebase memory-maps, so a position's value is one array read and
+the best move is one read per empty square.
+
+    python tablebase.py --size 3 --check 1000
+    python tablebase.py --size 4 --check 200
+
+Set GenGameBoard.tablebase (or SearchContext.tablebase) to a Tablebase to have
+alpha_beta_search() answer from it.
+"""
+
+import argparse
+import math
+import os
+import random
+import struct
+import time
+
+import numpy as np
+
+from mp2 import GenGameBoard, SearchContext, get_win_lines
+
+# File header: magic, board size, number of entries
+HEADER = struct.Struct('<8sBxxxQ')
+MAGIC = b'TTTBASE1'
+
+# Largest board size a tablebase can be built for (3^16 entries)
+MAX_TABLEBASE_SIZE = 4
+
+# Byte of a board that cannot arise in a game started by X
+ILLEGAL = 255
+
+# Square codes of the index digits
+EMPTY = 0
+X_CODE = 1
+O_CODE = 2
+
+# Boards examined per NumPy pass when classifying every index
+CHUNK_SIZE = 1 << 18
+
+
+def encode(value, distance):
+    """ Returns the table byte of a value (-1 X wins, 0 draw, 1 O wins) and distance. """
+    return (value + 1) * 32 + distance
+
+
+def decode(codes):
+    """ Returns the (value, distance) arrays of an array of table bytes. """
+    codes = np.asarray(codes, dtype=np.int16)
+    return codes // 32 - 1, codes % 32
+
+
+def rank_codes(codes, sign):
+    """
+    Returns how good each table byte is for the side with the sign (1 for O, -1 for X):
+    quick wins rank highest, then slower wins, draws, slow losses and quick losses.
+    """
+    values, distances = decode(codes)
+    return sign * values * (64 - distances)
+
+
+def get_powers(board_size):
+    """ Returns the int64 array of 3^square for every square. """
+    return 3 ** np.arange(board_size * board_size, dtype=np.int64)
+
+
+def get_digits(indexes, board_size):
+    """ Returns the (len(indexes), n * n) int8 array of the square codes of each index. """
+    powers = get_powers(board_size)
+    digits = np.empty((len(indexes), len(powers)), dtype=np.int8)
+    for square, power in enumerate(powers):
+        digits[:, square] = (indexes // power) % 3
+    return digits
+
+
+def get_completed_lines(digits, board_size, code):
+    """
+    Returns (won, common) for the side with the code: whether each board has a completed
+    line of that side, and the bitmask of the squares shared by all of its completed
+    lines (the side's last move must be one of them).
+    """
+    won = np.zeros(len(digits), dtype=bool)
+    common = np.full(len(digits), (1 << (board_size * board_size)) - 1, dtype=np.int64)
+    for line in get_win_lines(board_size)[0]:
+        squares = [row * board_size + col for row, col in line]
+        complete = (digits[:, squares] == code).all(axis=1)
+        won |= complete
+        common = np.where(complete, common & sum(1 << square for square in squares), common)
+    return won, common
+
+
+def classify(indexes, board_size):
+    """
+    Classifies a chunk of indexes. Returns (levels, values): the number of marks of each
+    board (ILLEGAL for boards no game reaches) and the value of the finished boards
+    (X_CODE or O_CODE for the winner, EMPTY for a full board, -1 if not finished).
+    """
+    digits = get_digits(indexes, board_size)
+    num_x = np.count_nonzero(digits == X_CODE, axis=1)
+    num_o = np.count_nonzero(digits == O_CODE, axis=1)
+
+    won, common = {}, {}
+    for code in (X_CODE, O_CODE):
+        won[code], common[code] = get_completed_lines(digits, board_size, code)
+
+    legal = ((num_x == num_o) | (num_x == num_o + 1)) & ~(won[X_CODE] & won[O_CODE])
+    legal &= ~won[X_CODE] | ((num_x == num_o + 1) & (common[X_CODE] != 0))
+    legal &= ~won[O_CODE] | ((num_x == num_o) & (common[O_CODE] != 0))
+
+    levels = np.where(legal, num_x + num_o, ILLEGAL).astype(np.uint8)
+    values = np.full(len(indexes), -1, dtype=np.int8)
+    values[num_x + num_o == board_size * board_size] = EMPTY
+    values[won[X_CODE]] = X_CODE
+    values[won[O_CODE]] = O_CODE
+    return levels, values
+
+
+def solve_level(table, indexes, board_size):
+    """
+    Solves the unfinished positions at the indexes, all with the same number of marks,
+    from their already solved children. X moves when the counts are equal.
+    """
+    digits = get_digits(indexes, board_size)
+    sign = np.where(np.count_nonzero(digits == X_CODE, axis=1) ==
+                    np.count_nonzero(digits == O_CODE, axis=1), -1, 1)
+    mover_code = np.where(sign < 0, X_CODE, O_CODE)
+
+    # Keep the child best for the mover: a quick win, then a draw, then a slow loss.
+    best_key = np.full(len(indexes), -math.inf)
+    best_code = np.zeros(len(indexes), dtype=np.uint8)
+    for square, power in enumerate(get_powers(board_size)):
+        empty = digits[:, square] == EMPTY
+        child_codes = table[indexes + power * mover_code * empty]
+        keys = np.where(empty, rank_codes(child_codes, sign), -math.inf)
+        better = keys > best_key
+        best_key = np.where(better, keys, best_key)
+        best_code = np.where(better, child_codes, best_code)
+
+    # Same value, one more ply to the end.
+    table[indexes] = best_code + 1
+
+
+def build_table(board_size, report=None):
+    """
+    Returns the table bytes of every index of the board size.
+    report(text), if given, is called as each level is solved.
+    """
+    num_squares = board_size * board_size
+    num_indexes = 3 ** num_squares
+    table = np.full(num_indexes, ILLEGAL, dtype=np.uint8)
+    levels = np.empty(num_indexes, dtype=np.uint8)
+
+    # Mark every board with its number of marks and score the finished ones.
+    winner_values = {X_CODE: -1, O_CODE: 1, EMPTY: 0}
+    for start in range(0, num_indexes, CHUNK_SIZE):
+        indexes = np.arange(start, min(start + CHUNK_SIZE, num_indexes), dtype=np.int64)
+        chunk_levels, values = classify(indexes, board_size)
+        levels[indexes] = chunk_levels
+        for code, value in winner_values.items():
+            finished = (values == code) & (chunk_levels != ILLEGAL)
+            table[indexes[finished]] = encode(value, 0)
+
+    # Work back from the fullest boards to the empty one.
+    for level in range(num_squares - 1, -1, -1):
+        indexes = np.flatnonzero((levels == level) & (table == ILLEGAL)).astype(np.int64)
+        for start in range(0, len(indexes), CHUNK_SIZE):
+            solve_level(table, indexes[start:start + CHUNK_SIZE], board_size)
+        if report is not None:
+            report(f"solved {len(indexes)} positions with {level} marks")
+    return table
+
+
+def build_tablebase(path, board_size, report=None):
+    """
+    Builds the tablebase of the board size and writes it to path.
+    Returns a dict with the positions counted and the run time and memory used.
+    """
+    if not 1 <= board_size <= MAX_TABLEBASE_SIZE:
+        raise ValueError(f'tablebases go up to {MAX_TABLEBASE_SIZE}x{MAX_TABLEBASE_SIZE}')
+    start = time.perf_counter()
+    table = build_table(board_size, report)
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as table_file:
+        table_file.write(HEADER.pack(MAGIC, board_size, len(table)))
+        table_file.write(table.tobytes())
+    os.replace(temporary_path, path)
+
+    values = decode(table[table != ILLEGAL])[0]
+    return {
+        'positions': len(values),
+        'o_wins': int(np.count_nonzero(values == 1)),
+        'draws': int(np.count_nonzero(values == 0)),
+        'x_wins': int(np.count_nonzero(values == -1)),
+        'seconds': round(time.perf_counter() - start, 3),
+        'table_bytes': len(table),
+        'peak_memory_bytes': get_peak_memory()
+    }
+
+
+def get_peak_memory():
+    """ Returns the peak resident memory of the process in bytes (None if unknown). """
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    # Linux reports kilobytes, macOS bytes.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if peak > 1 << 32 else peak * 1024
+
+
+class Tablebase:
+    """
+    Read-only, memory-mapped tablebase for one board size
+    """
+
+    def __init__(self, path):
+        """
+        Constructor method - maps the table of the file into memory
+        """
+        with open(path, 'rb') as table_file:
+            magic, self.board_size, num_entries = HEADER.unpack(table_file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a tablebase')
+        self.table = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER.size,
+                               shape=(num_entries,))
+        self.powers = [int(power) for power in get_powers(self.board_size)]
+
+    def get_codes(self, board):
+        """
+        Returns the board's square codes in index order, or None if it holds other marks
+        or is not the table's n x n board won by n in a row.
+        """
+        if board.geometry != (self.board_size,) * 3:
+            return None
+        code_of = {' ': EMPTY, GenGameBoard.PLAYER: X_CODE, GenGameBoard.COMPUTER: O_CODE}
+        codes = [code_of.get(mark) for row in board.marks for mark in row]
+        return None if None in codes else codes
+
+    def probe_codes(self, codes):
+        """ Returns (value, distance) of the square codes, or None for an illegal board. """
+        code = int(self.table[sum(code * power for code, power in zip(codes, self.powers))])
+        if code == ILLEGAL:
+            return None
+        return code // 32 - 1, code % 32
+
+    def probe(self, board):
+        """
+        Returns (value, distance) of the board with the side to move of a game X started
+        (X when the counts are equal): value is 1 if O wins, 0 for a draw, -1 if X wins,
+        and distance the plies left with best play. None if the board is not in the table.
+        """
+        codes = self.get_codes(board)
+        return None if codes is None else self.probe_codes(codes)
+
+    def get_best_action(self, board):
+        """
+        Returns the best (row, col) for the computer (O) to play, with ties going to the
+        quickest win or slowest loss and then to the first square, or None if the board is
+        not in the table or is finished. O may also be the side that started the game.
+        """
+        codes = self.get_codes(board)
+        if codes is None:
+            return None
+
+        # With equal counts O started: swap the sides so the table's X moves instead.
+        num_x, num_o = codes.count(X_CODE), codes.count(O_CODE)
+        if num_x == num_o:
+            codes = [(3 - code) % 3 for code in codes]
+            mover_code, sign = X_CODE, -1
+        else:
+            mover_code, sign = O_CODE, 1
+
+        position = self.probe_codes(codes)
+        if position is None or position[1] == 0:
+            return None
+        base = sum(code * power for code, power in zip(codes, self.powers))
+        best_key, best_square = -math.inf, None
+        for square, code in enumerate(codes):
+            if code == EMPTY:
+                key = int(rank_codes(self.table[base + mover_code * self.powers[square]], sign))
+                if key > best_key:
+                    best_key, best_square = key, square
+        return divmod(best_square, self.board_size)
+
+
+def random_position(board_size, generator):
+    """
+    Returns a board after a random number of random moves (X first) that is not finished,
+    with O to move.
+    """
+    while True:
+        board = GenGameBoard(board_size)
+        squares = [(row, col) for row in range(board_size) for col in range(board_size)]
+        generator.shuffle(squares)
+        num_moves = 2 * generator.randrange((len(squares) + 1) // 2) + 1
+        for turn, (row, col) in enumerate(squares[:num_moves]):
+            board.place(row, col, GenGameBoard.PLAYER if turn % 2 == 0 else GenGameBoard.COMPUTER)
+            if board.is_terminal():
+                break
+        else:
+            return board
+
+
+def check_against_search(tablebase, num_positions, min_marks=0, seed=0):
+    """
+    Compares the tablebase with a full-depth alpha-beta search on random positions with
+    O to move and at least min_marks marks. Returns the number of positions whose value
+    or best-move value disagreed.
+    """
+    generator = random.Random(seed)
+    size = tablebase.board_size
+    mismatches = checked = 0
+    while checked < num_positions:
+        board = random_position(size, generator)
+        if size * size - board.num_empty < min_marks:
+            continue
+        checked = checked + 1
+        value = board.max_value(-math.inf, math.inf, SearchContext(board.num_empty))[0]
+        row, col = tablebase.get_best_action(board)
+        board.place(row, col, GenGameBoard.COMPUTER)
+        best_value = board.min_value(-math.inf, math.inf, SearchContext(board.num_empty + 1,
+                                                                         depth=1))
+        board.undo(row, col)
+        expected = (value > 0) - (value < 0)
+        if tablebase.probe(board)[0] != expected or best_value != value:
+            mismatches = mismatches + 1
+    return mismatches
+
+
+def main():
+    """ Builds a tablebase, reports its size and cost, and checks it against the search. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=3, choices=range(1, MAX_TABLEBASE_SIZE + 1))
+    parser.add_argument('--path', default=None, help='table file (default: tablebase_<size>.bin)')
+    parser.add_argument('--check', type=int, default=100,
+                        help='random positions compared with a full-depth search')
+    parser.add_argument('--min-marks', type=int, default=None,
+                        help='fewest marks of a checked position (default: 0 for 3x3, 7 for 4x4)')
+    args = parser.parse_args()
+    path = args.path or f'tablebase_{args.size}.bin'
+
+    summary = build_tablebase(path, args.size, report=print)
+    for name, value in summary.items():
+        print(f"{name:>18}: {value}")
+
+    tablebase = Tablebase(path)
+    min_marks = args.min_marks if args.min_marks is not None else (7 if args.size > 3 else 0)
+    start = time.perf_counter()
+    mismatches = check_against_search(tablebase, args.check, min_marks)
+    print(f"checked {args.check} random positions against the search in "
+          f"{time.perf_counter() - start:.1f}s: {mismatches} mismatches")
+
+
+if __name__ == "__main__":
+    main()
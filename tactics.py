@@ -0,0 +1,77 @@
+"""
+Tactical prefilter: moves decided from the line counts, without searching.
+
+A board keeps the number of X and O marks on every winning line up to date
+(see GenGameBoard.place() and get_line_counts()), so threats can be read off
+the lines directly:
+
+    win    a line holds k - 1 of the mover's marks and none of the opponent's
+           (k = win_length, n on an n x n board): completing it wins at once;
+    block  else, such a line of the opponent's: every other move loses at once;
+    fork   else, a square on lines holding k - 2 of the mover's marks and none
+           of the opponent's, left needing two different squares: it makes two
+           threats, and an opponent without a threat of their own can only
+           block one.
+
+Each check is a pass over the winning lines, plus a scan of the few lines that
+hold a threat. alpha_beta_search() plays such a move without searching when its
+SearchContext has prefilter set (GenGameBoard.tactical_prefilter, off by default,
+for default searches), and counts it in tactical_wins, tactical_blocks or
+tactical_forks.
+"""
+
+
+def get_threat_squares(board, mark, other):
+    """
+    Returns the empty squares where the mark would complete a line: one per line
+    holding k - 1 of the mark and none of the other mark, without repeats.
+    """
+    counts, other_counts = board.get_line_counts(mark), board.get_line_counts(other)
+    marks = board.marks
+    squares = []
+    for index, count in enumerate(counts):
+        if count == board.win_length - 1 and other_counts[index] == 0:
+            for row, col in board.win_lines[index]:
+                if marks[row][col] == ' ':
+                    if (row, col) not in squares:
+                        squares.append((row, col))
+                    break
+    return squares
+
+
+def get_fork_squares(board, mark, other):
+    """
+    Returns the empty squares where the mark would make two threats at once: squares
+    on lines holding k - 2 of the mark and none of the other mark whose threats need
+    two or more different squares (overlapping windows of a row may need the same one).
+    """
+    if board.win_length < 3:
+        return []
+    counts, other_counts = board.get_line_counts(mark), board.get_line_counts(other)
+    marks = board.marks
+    completions = {}  # square -> squares completing the lines the square would threaten
+    for index, count in enumerate(counts):
+        if count == board.win_length - 2 and other_counts[index] == 0:
+            empty = [(row, col) for row, col in board.win_lines[index] if marks[row][col] == ' ']
+            for square in empty:
+                completions.setdefault(square, set()).update(
+                    other_square for other_square in empty if other_square != square)
+    return [square for square, needed in completions.items() if len(needed) >= 2]
+
+
+def get_tactical_move(board, mark, other):
+    """
+    Returns (kind, (row, col)) when the move of the mark (against the other mark) is
+    decided: 'win', else 'block' (the first threat square if there are several, as the
+    game is lost anyway), else 'fork'. Returns None when the search has to decide.
+    """
+    if board.is_terminal():
+        return None
+    for kind, squares in (('win', get_threat_squares(board, mark, other)),
+                          ('block', get_threat_squares(board, mark=other, other=mark))):
+        if squares:
+            return kind, squares[0]
+    forks = get_fork_squares(board, mark, other)
+    if forks:
+        return 'fork', forks[0]
+    return None
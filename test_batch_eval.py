@@ -0,0 +1,54 @@
+""" The unit tests for the vectorized batch evaluation. """
+import unittest
+
+from parameterized import parameterized
+import numpy as np
+
+from batch_eval import EMPTY, O_CODE, X_CODE, encode_marks, evaluate_batch, random_boards
+from mp2 import GenGameBoard
+
+
+class TestBatchEval(unittest.TestCase):
+    """ Will run tests checking evaluate_batch() against GenGameBoard. """
+
+    def test_encode_marks(self):
+        """ Tests that marks are encoded as X, O and empty codes. """
+        codes = encode_marks([['X', 'O'], [' ', 'A']])
+        np.testing.assert_equal(codes, [[X_CODE, O_CODE], [EMPTY, EMPTY]])
+        self.assertEqual(np.int8, codes.dtype)
+
+    @parameterized.expand([
+        ('3x3 boards', 3),
+        ('4x4 boards', 4),
+        ('5x5 boards', 5)
+    ])
+    def test_matches_gen_game_board(self, _test_name, size):
+        """ Tests that every result matches the GenGameBoard methods on random boards. """
+        boards = random_boards(300, size, np.random.default_rng(size))
+        result = evaluate_batch(boards, chunk_size=64)
+        symbols = np.array([' ', GenGameBoard.PLAYER, GenGameBoard.COMPUTER])
+
+        for index, codes in enumerate(boards):
+            test_board = GenGameBoard(size)
+            test_board.marks = symbols[codes]
+            x_won = test_board.check_for_win(GenGameBoard.PLAYER)
+            o_won = test_board.check_for_win(GenGameBoard.COMPUTER)
+
+            self.assertEqual(test_board.is_terminal(), result.terminal[index])
+            self.assertEqual(test_board.get_utility(), result.utility[index])
+            self.assertEqual(X_CODE if x_won else O_CODE if o_won else EMPTY,
+                             result.winner[index])
+            if not test_board.is_terminal():
+                self.assertEqual(test_board.get_est_utility(), result.scores[index])
+
+    def test_known_board(self):
+        """ Tests the results for a single hand-made board. """
+        codes = encode_marks([['X', 'O', 'X'], [' ', ' ', ' '], [' ', ' ', ' ']])
+        result = evaluate_batch(codes[np.newaxis])
+        self.assertEqual(-117, result.scores[0])
+        self.assertFalse(result.terminal[0])
+        self.assertEqual(0, result.utility[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
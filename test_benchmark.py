@@ -0,0 +1,65 @@
+""" The unit tests for the search benchmark suite. """
+import json
+import os
+import unittest
+
+from parameterized import parameterized
+import numpy as np
+
+from benchmark import BENCHMARK_SETS, COUNTERS, SET_NAMES, compare_results, make_board, \
+    run_benchmarks
+
+# Baseline report stored next to the benchmark, holding the golden node counts
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'benchmark_baseline.json')
+
+
+class TestBenchmark(unittest.TestCase):
+    """ Will run tests on the benchmark positions, golden node counts and comparisons. """
+
+    @parameterized.expand([(str(size), size) for size in sorted(BENCHMARK_SETS)])
+    def test_positions_have_o_to_move(self, _test_name, size):
+        """ Tests that every benchmark position is unfinished with O to move. """
+        for set_name in SET_NAMES:
+            for rows in BENCHMARK_SETS[size][set_name].values():
+                test_board = make_board(rows)
+                self.assertEqual(size, test_board.board_size)
+                self.assertFalse(test_board.is_terminal())
+                num_x = np.count_nonzero(test_board.marks == 'X')
+                self.assertEqual(num_x - 1, np.count_nonzero(test_board.marks == 'O'))
+
+    def test_golden_node_counts(self):
+        """ Tests that the search visits exactly the nodes recorded in the baseline. """
+        with open(BASELINE_PATH, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        report = run_benchmarks(repeats=1)
+        self.assertEqual(sorted(baseline['results']), sorted(report['results']))
+        for key, result in report['results'].items():
+            expected = baseline['results'][key]
+            for name in COUNTERS + ('value', 'action'):
+                self.assertEqual(expected[name], result[name], f'{key}: {name}')
+
+    def test_compare_results(self):
+        """ Tests that slower positions and extra nodes are reported as regressions. """
+        def report(**results):
+            return {'results': {key: {'num_nodes': nodes, 'seconds': seconds}
+                                for key, (nodes, seconds) in results.items()}}
+
+        baseline = report(a=(100, 1.0), b=(100, 1.0), c=(100, 1.0), d=(100, 0.001))
+        current = report(a=(100, 1.05), b=(120, 1.0), c=(90, 1.2), d=(100, 0.002),
+                         e=(5, 0.1))
+        regressions, changes = compare_results(baseline, current, 0.10)
+        self.assertEqual(['b: 120 nodes, baseline 100', 'c: 1.2000s, baseline 1.0000s (+20%)'],
+                         regressions)
+        self.assertEqual(['c: 90 nodes, baseline 100', 'e: not in the baseline'], changes)
+
+        # A slower total is a regression even when each position is within the threshold.
+        regressions, _ = compare_results(report(a=(1, 1.0), b=(1, 1.0)),
+                                         report(a=(1, 1.09), b=(1, 1.09)), 0.05)
+        self.assertEqual(['a: 1.0900s, baseline 1.0000s (+9%)',
+                          'b: 1.0900s, baseline 1.0000s (+9%)',
+                          'total: 2.1800s, baseline 2.0000s (+9%)'], regressions)
+
+
+if __name__ == '__main__':
+    unittest.main()
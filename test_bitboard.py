@@ -0,0 +1,123 @@
+""" The unit tests for the BitBoard backend. """
+import math
+import unittest
+
+from parameterized import parameterized
+import numpy.testing
+import numpy as np
+
+from bitboard import BitBoard, get_win_masks
+from mp2 import GenGameBoard, SearchContext
+
+
+class TestBitBoard(unittest.TestCase):
+    """ Will run tests checking that BitBoard matches GenGameBoard. """
+
+    def test_win_masks(self):
+        """ Tests that there are 2n+2 winning lines of n squares each. """
+        masks = get_win_masks(4)
+        self.assertEqual(10, len(masks))
+        self.assertTrue(all(bin(mask).count('1') == 4 for mask in masks))
+
+    def test_rejects_other_geometries(self):
+        """ Tests that only n x n boards won by n in a row are built. """
+        self.assertEqual((4, 4, 4), BitBoard(4, 4, 4).geometry)
+        for win_length, num_cols in ((3, None), (None, 5)):
+            with self.assertRaises(ValueError):
+                BitBoard(4, win_length, num_cols)
+
+    def test_marks_round_trip(self):
+        """ Tests that marks assigned to the board are rendered back unchanged. """
+        marks = [['X', 'O', ' '], [' ', 'X', ' '], ['O', ' ', ' ']]
+        test_board = BitBoard(3)
+        test_board.marks = np.copy(marks)
+        numpy.testing.assert_equal(test_board.marks, marks)
+
+    @parameterized.expand([
+        ('win by X (row)', [['O', 'O', 'X'], ['X', 'X', 'X'], ['O', ' ', ' ']]),
+        ('win by O (col)', [['O', 'O', 'X'], ['O', 'X', 'X'], ['O', 'X', ' ']]),
+        ('win by X (diagonal)', [[' ', ' ', 'X'], [' ', 'X', ' '], ['X', 'O', 'O']]),
+        ('no winner', [['X', 'O', 'X'], [' ', ' ', ' '], [' ', ' ', ' ']]),
+        ('full board', [['X', 'O', 'X'], ['X', 'O', 'O'], ['O', 'X', 'X']])
+    ])
+    def test_matches_string_board(self, _test_name, marks):
+        """ Tests that the board queries agree with GenGameBoard. """
+        string_board = GenGameBoard(3)
+        string_board.marks = np.copy(marks)
+        bit_board = BitBoard(3)
+        bit_board.marks = np.copy(marks)
+
+        for mark in (GenGameBoard.PLAYER, GenGameBoard.COMPUTER):
+            self.assertEqual(string_board.check_for_win(mark), bit_board.check_for_win(mark))
+        self.assertEqual(string_board.no_more_moves(), bit_board.no_more_moves())
+        self.assertEqual(string_board.is_terminal(), bit_board.is_terminal())
+        self.assertEqual(string_board.get_utility(), bit_board.get_utility())
+        numpy.testing.assert_equal(np.reshape(bit_board.get_actions(), (-1, 2)),
+                                   string_board.get_actions().reshape(-1, 2))
+        if not string_board.is_terminal():
+            self.assertEqual(string_board.get_est_utility(), bit_board.get_est_utility())
+
+    def test_make_move(self):
+        """ Tests that make_move() rejects taken squares like GenGameBoard. """
+        test_board = BitBoard(3)
+        self.assertTrue(test_board.make_move(2, 3, GenGameBoard.COMPUTER))
+        self.assertFalse(test_board.make_move(2, 3, GenGameBoard.COMPUTER))
+        self.assertEqual(GenGameBoard.COMPUTER, test_board.marks[1][2])
+
+    @parameterized.expand([
+        ('O to move', [['X', 'O', 'X'], [' ', 'O', ' '], [' ', 'X', ' ']]),
+        ('O must block', [['X', ' ', ' '], [' ', 'O', ' '], ['X', ' ', ' ']]),
+        ('opening reply', [[' ', ' ', ' '], [' ', 'X', ' '], [' ', ' ', ' ']])
+    ])
+    def test_search_matches_string_board(self, _test_name, marks):
+        """ Tests that max_value() returns the same value and action on both backends. """
+        string_board = GenGameBoard(3)
+        string_board.marks = np.copy(marks)
+        bit_board = BitBoard(3)
+        bit_board.marks = np.copy(marks)
+
+        expected = string_board.max_value(-math.inf, math.inf)
+        actual = bit_board.max_value(-math.inf, math.inf)
+        self.assertEqual(expected[0], actual[0])
+        numpy.testing.assert_equal(actual[1], expected[1])
+        numpy.testing.assert_equal(bit_board.marks, marks)
+
+    def test_time_budgeted_search(self):
+        """ Tests that the time-budgeted search runs and keeps num_empty up to date. """
+        marks = [['X', ' ', ' '], [' ', 'O', ' '], ['X', ' ', ' ']]
+        bit_board = BitBoard(3)
+        bit_board.marks = np.copy(marks)
+        self.assertEqual(6, bit_board.num_empty)
+        bit_board.place(0, 1, GenGameBoard.COMPUTER)
+        bit_board.undo(0, 1)
+        bit_board.undo(0, 1)
+        self.assertEqual(6, bit_board.num_empty)
+
+        action = bit_board.alpha_beta_search(time_budget_ms=100, context=SearchContext(9))
+        self.assertEqual((1, 0), tuple(action))
+        self.assertEqual(6, bit_board.num_empty)
+        numpy.testing.assert_equal(bit_board.marks, marks)
+
+    def test_default_search_with_prefilter(self):
+        """ Tests that the default alpha_beta_search(), prefilter on, works as on GenGameBoard. """
+        marks = [['X', ' ', ' '], [' ', 'O', ' '], ['X', ' ', ' ']]
+        string_board = GenGameBoard(3)
+        string_board.marks = np.copy(marks)
+        bit_board = BitBoard(3)
+        bit_board.marks = np.copy(marks)
+        for mark in (GenGameBoard.PLAYER, GenGameBoard.COMPUTER):
+            self.assertEqual(string_board.get_line_counts(mark), bit_board.get_line_counts(mark))
+
+        blocks = GenGameBoard.tactical_blocks
+        GenGameBoard.tactical_prefilter = True
+        try:
+            self.assertEqual((1, 0), tuple(bit_board.alpha_beta_search()))
+            bit_board.make_computer_move()
+        finally:
+            GenGameBoard.tactical_prefilter = False
+        self.assertEqual(GenGameBoard.COMPUTER, bit_board.marks[1][0])
+        self.assertEqual(blocks + 2, GenGameBoard.tactical_blocks)
+
+
+if __name__ == '__main__':
+    unittest.main()
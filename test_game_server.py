@@ -0,0 +1,125 @@
+""" The unit tests for the asyncio game server. """
+import asyncio
+import json
+import unittest
+
+from parameterized import parameterized
+
+from game_server import GameServer, count_leaves, get_latency_stats, percentile
+
+
+class TestGameServer(unittest.IsolatedAsyncioTestCase):
+    """ Will run tests sending JSON-line requests to a GameServer. """
+
+    async def asyncSetUp(self):
+        """ Starts a server with two search threads. """
+        self.server = GameServer(workers=2, max_pending=4)
+
+    async def asyncTearDown(self):
+        """ Stops the search threads. """
+        self.server.close()
+
+    async def send(self, **request):
+        """ Sends one request line and returns the response. """
+        return await self.server.handle_line(json.dumps(request))
+
+    async def test_plays_a_game(self):
+        """ Tests that a game runs to a result with legal computer moves. """
+        response = await self.send(op='new', size=3, max_depth=8, id='a')
+        self.assertEqual({'id': 'a', 'session': 1, 'board': ['   '] * 3, 'ok': True}, response)
+
+        # The computer cannot lose 3x3 at full depth, so the game ends lost or drawn.
+        free = [(row, col) for row in range(1, 4) for col in range(1, 4)]
+        while response.get('result') is None:
+            row, col = next((row, col) for row, col in free
+                            if response['board'][row - 1][col - 1] == ' ')
+            response = await self.send(op='move', session=1, row=row, col=col)
+            self.assertTrue(response['ok'])
+            self.assertEqual('X', response['board'][row - 1][col - 1])
+            if response['computer_move'] is not None:
+                computer_row, computer_col = response['computer_move']
+                self.assertEqual('O', response['board'][computer_row - 1][computer_col - 1])
+        self.assertIn(response['result'], ('lost', 'draw'))
+
+        stats = await self.send(op='stats', session=1)
+        self.assertGreater(stats['moves'], 2)
+        self.assertLessEqual(stats['p50_ms'], stats['max_ms'])
+        response = await self.send(op='move', session=1, row=1, col=1)
+        self.assertEqual('the game is over', response['error'])
+
+    @parameterized.expand([
+        ('unknown op', {'op': 'jump'}, 'unknown op'),
+        ('unknown session', {'op': 'move', 'session': 9, 'row': 1, 'col': 1}, 'unknown session'),
+        ('board too big', {'op': 'new', 'size': 12}, 'size must be an integer from 2 to 9'),
+        ('outside the board', {'op': 'move', 'session': 1, 'row': 4, 'col': 1},
+         'not a valid row or column'),
+        ('boolean row', {'op': 'move', 'session': 1, 'row': True, 'col': 1},
+         'not a valid row or column'),
+        ('boolean size', {'op': 'new', 'size': True}, 'size must be an integer from 2 to 9'),
+        ('deeper than the board', {'op': 'new', 'size': 3, 'max_depth': 9},
+         'max_depth must be an integer from 0 to 8'),
+        ('deep untimed search', {'op': 'new', 'size': 9, 'max_depth': 4},
+         'this max_depth needs a time_budget_ms on this board'),
+        ('boolean time budget', {'op': 'new', 'size': 9, 'max_depth': 4, 'time_budget_ms': True},
+         'time_budget_ms must be a number from 0 to 60000'),
+        ('huge time budget', {'op': 'new', 'size': 9, 'max_depth': 4, 'time_budget_ms': 1e9},
+         'time_budget_ms must be a number from 0 to 60000')
+    ])
+    async def test_rejects_bad_requests(self, _test_name, request, expected_error):
+        """ Tests that bad requests get an error response. """
+        await self.send(op='new', size=3)
+        response = await self.send(**request)
+        self.assertEqual({'ok': False, 'error': expected_error}, response)
+
+    def test_count_leaves(self):
+        """ Tests the leaf count bounding searches without a time budget. """
+        self.assertEqual(9 * 8 * 7, count_leaves(9, 2))
+        self.assertEqual(362880, count_leaves(9, 8))
+        self.assertEqual(9, count_leaves(9, 0))
+
+    async def test_sessions_are_served_concurrently(self):
+        """ Tests that quick moves are answered while a slow search is still running. """
+        await self.send(op='new', size=5, max_depth=3)
+        await self.send(op='new', size=3, max_depth=0)
+        slow = asyncio.create_task(self.send(op='move', session=1, row=3, col=3))
+        quick = await self.send(op='move', session=2, row=2, col=2)
+        self.assertTrue(quick['ok'])
+        self.assertFalse(slow.done())
+        self.assertTrue((await slow)['ok'])
+
+    async def test_serves_tcp_connections(self):
+        """ Tests a request and response over a TCP connection. """
+        tcp_server = await self.server.serve_tcp('127.0.0.1', 0)
+        port = tcp_server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'{"op": "new", "size": 4, "id": 1}\nnot json\n')
+        responses = [json.loads(await reader.readline()) for _ in range(2)]
+        writer.close()
+        await writer.wait_closed()
+        tcp_server.close()
+        await tcp_server.wait_closed()
+
+        self.assertIn({'id': 1, 'session': 1, 'board': ['    '] * 4, 'ok': True}, responses)
+        self.assertIn({'ok': False, 'error': 'invalid JSON'}, responses)
+
+
+class TestLatencyStats(unittest.TestCase):
+    """ Will run tests on the latency percentile helpers. """
+
+    def test_percentile(self):
+        """ Tests nearest-rank percentiles. """
+        values = list(range(1, 101))
+        self.assertEqual(50, percentile(values, 50))
+        self.assertEqual(99, percentile(values, 99))
+        self.assertEqual(7, percentile([7], 90))
+        self.assertIsNone(percentile([], 50))
+
+    def test_get_latency_stats(self):
+        """ Tests that latencies in seconds are reported in milliseconds. """
+        stats = get_latency_stats([0.003, 0.001, 0.002])
+        self.assertEqual({'moves': 3, 'p50_ms': 2.0, 'p90_ms': 3.0, 'p99_ms': 3.0,
+                          'max_ms': 3.0}, stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
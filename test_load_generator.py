@@ -0,0 +1,23 @@
+""" The unit tests for the game server load generator. """
+import asyncio
+import unittest
+
+from load_generator import get_parser, run
+
+
+class TestLoadGenerator(unittest.TestCase):
+    """ Will run tests driving an in-process game server with simulated players. """
+
+    def test_players_finish_their_games(self):
+        """ Tests that every player finishes its games and every move is timed. """
+        args = get_parser().parse_args(['--spawn', '--players', '20', '--games', '2',
+                                        '--connections', '3', '--max-depth', '1'])
+        summary = asyncio.run(run(args))
+        self.assertEqual(40, summary['games'])
+        self.assertEqual(40, sum(summary['results'].values()))
+        self.assertEqual(summary['client_latency']['moves'], summary['server_latency']['moves'])
+        self.assertGreater(summary['moves_per_second'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
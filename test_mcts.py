@@ -0,0 +1,83 @@
+""" The unit tests for the Monte Carlo Tree Search engine. """
+import unittest
+
+import numpy as np
+
+from bitboard import BitBoard
+from mcts import MCTSEngine, NodeStore
+from mp2 import GenGameBoard, SearchContext
+
+
+class TestMCTS(unittest.TestCase):
+    """ Will run tests against the MCTS engine and its node store. """
+
+    def test_node_store_keeps_children_together(self):
+        """ Children are added as one block and the arrays grow as needed. """
+        store = NodeStore(capacity=4)
+        store.add_children(0, [5, 6, 7])
+        store.add_children(2, [1, 2, 3, 4])
+        self.assertEqual(len(store), 8)
+        self.assertEqual((store.first_child[0], store.num_children[0]), (1, 3))
+        self.assertEqual(list(store.moves[4:8]), [1, 2, 3, 4])
+        self.assertEqual(store.first_child[1], -1)
+
+        store.visits[0:4] = [3, 1, 1, 1]
+        store.rewards[1:4] = [0, 1, 0.5]
+        self.assertEqual(store.select_child(0, 0.0), 2)
+        store.visits[1] = 2
+        self.assertEqual(store.get_best_child(), 1)
+
+    def test_playout_budget_and_visits(self):
+        """ Every playout visits the root and exactly one root child. """
+        board = GenGameBoard(5)
+        board.place(2, 2, GenGameBoard.PLAYER)
+        engine = MCTSEngine(playouts=300, seed=0)
+        context = SearchContext(4)
+        value, action = engine.search(board, context)
+        store = engine.store
+        first = store.first_child[0]
+        self.assertEqual(engine.num_playouts, 300)
+        self.assertEqual(store.visits[0], 300)
+        self.assertEqual(store.visits[first:first + store.num_children[0]].sum(), 300)
+        self.assertEqual(context.num_nodes, len(store))
+        self.assertTrue(0 <= value <= 1)
+        self.assertEqual(board.marks[action[0], action[1]], ' ')
+
+    def test_bitboard_plays_the_same_tree(self):
+        """ A BitBoard gives the same playouts and move as a GenGameBoard. """
+        results = []
+        for board in (GenGameBoard(4), BitBoard(4)):
+            board.place(1, 1, GenGameBoard.PLAYER)
+            board.place(0, 3, GenGameBoard.COMPUTER)
+            engine = MCTSEngine(playouts=200, seed=3)
+            value, action = engine.search(board, SearchContext(4))
+            results.append((value, tuple(action), list(engine.store.visits[:len(engine.store)])))
+        self.assertEqual(results[0], results[1])
+
+    def test_finds_the_win_and_the_block(self):
+        """ Without the prefilter, playouts still find a win and a forced block. """
+        for marks, expected in ((['O', 'O', ' ', 'X', 'X', ' ', 'X', ' ', ' '], (0, 2)),
+                                (['X', 'X', ' ', ' ', 'O', ' ', ' ', ' ', ' '], (0, 2))):
+            board = GenGameBoard(3)
+            board.marks = np.array(marks).reshape(3, 3)
+            action = MCTSEngine(playouts=1000, seed=1).search(board, SearchContext(4))[1]
+            self.assertEqual(tuple(action), expected)
+
+    def test_engine_is_selectable_and_repeatable(self):
+        """ alpha_beta_search() uses the engine; a seed makes it repeatable. """
+        actions = []
+        for _ in range(2):
+            board = GenGameBoard(6)
+            board.place(0, 0, GenGameBoard.PLAYER)
+            context = SearchContext(4, engine=MCTSEngine(playouts=200, seed=7))
+            actions.append(tuple(board.alpha_beta_search(context=context)))
+        self.assertEqual(actions[0], actions[1])
+
+        timed = MCTSEngine(seed=7)
+        board = GenGameBoard(6)
+        board.alpha_beta_search(30, SearchContext(4, engine=timed))
+        self.assertGreater(timed.num_playouts, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,19 @@
 """ The unit tests for the GenGameBoard class. """
+import concurrent.futures
 import io
 import math
+import random
 import sys
+import time
 import unittest
 
 from parameterized import parameterized
 import numpy.testing
 import numpy as np
 
-from mp2 import GenGameBoard
+from mp2 import GenGameBoard, SearchContext, get_win_lines
+from ordering import MoveOrderer
+from transposition import TranspositionTable
 
 
 # We can do pruning and stop searching branches when we know the MIN state is already
@@ -221,7 +226,36 @@ class TestGenGameBoard(unittest.TestCase):
         self.assertEqual(expected_result, actual_result)
 
     @parameterized.expand([
-        ('return True if board is full', 2, [['A', 'B'], ['C'], ['D']], True),
+        ('3x3 board', 3),
+        ('5x5 board', 5)
+    ])
+    def test_get_win_lines(self, _test_name, size):
+        """ Tests that get_win_lines() builds 2n+2 lines and at most 4 lines per square. """
+        lines, lines_through = get_win_lines(size)
+        self.assertEqual(2 * size + 2, len(lines))
+        self.assertTrue(all(len(line) == size for line in lines))
+        self.assertEqual(4, len(lines_through[size // 2][size // 2]))
+        self.assertEqual(3, len(lines_through[0][0]))
+        self.assertEqual(2, len(lines_through[0][1]))
+
+    def test_place_and_undo_track_wins(self):
+        """ Tests that place() and undo() keep the cached win and terminal state current. """
+        test_board = GenGameBoard(3)
+        test_board.marks = np.copy([['X', 'X', ' '], ['O', 'O', ' '], [' ', ' ', ' ']])
+        self.assertFalse(test_board.is_terminal())
+
+        test_board.place(0, 2, 'X')
+        self.assertTrue(test_board.check_for_win('X'))
+        self.assertFalse(test_board.check_for_win('O'))
+        self.assertTrue(test_board.is_terminal())
+
+        test_board.undo(0, 2)
+        self.assertFalse(test_board.check_for_win('X'))
+        self.assertFalse(test_board.is_terminal())
+        self.assertEqual(5, test_board.num_empty)
+
+    @parameterized.expand([
+        ('return True if board is full', 2, [['A', 'B'], ['C', 'D']], True),
         ('return False if board is not full', 2, [['A', 'B'], ['C', ' ']], False)
     ])
     def test_no_more_moves(self, _test_name, size, marks, expected_result):
@@ -231,6 +265,14 @@ class TestGenGameBoard(unittest.TestCase):
         actual_result = GenGameBoard.no_more_moves(test_board)
         self.assertEqual(expected_result, actual_result)
 
+    def test_marks_must_fit_the_board(self):
+        """ Tests that marks of another shape than the board are rejected. """
+        test_board = GenGameBoard(2)
+        for marks in (np.array([['A', 'B'], ['C'], ['D']], dtype=object),
+                      np.full((3, 3), ' '), np.full(4, ' ')):
+            with self.assertRaises(ValueError):
+                test_board.marks = marks
+
     @parameterized.expand([
         (
             'return True for win by X (row)',
@@ -275,6 +317,36 @@ class TestGenGameBoard(unittest.TestCase):
         actual_result = GenGameBoard.get_est_utility(test_board)
         self.assertEqual(expected_result, actual_result)
 
+    def test_get_est_utility_is_incremental(self):
+        """ Tests that place()/undo() keep get_est_utility() equal to a fresh count. """
+        test_board = GenGameBoard(4)
+        for row, col, mark in [(0, 0, 'X'), (1, 1, 'O'), (0, 3, 'X'), (3, 0, 'O')]:
+            test_board.place(row, col, mark)
+            fresh_board = GenGameBoard(4)
+            fresh_board.marks = np.copy(test_board.marks)
+            self.assertEqual(fresh_board.get_est_utility(), test_board.get_est_utility())
+
+        test_board.undo(1, 1)
+        test_board.undo(0, 0)
+        fresh_board = GenGameBoard(4)
+        fresh_board.marks = np.copy(test_board.marks)
+        self.assertEqual(fresh_board.get_est_utility(), test_board.get_est_utility())
+
+    def test_depth_cutoff_uses_estimate(self):
+        """ Tests that max_value() scores positions at the depth cutoff with the estimate. """
+        test_board = GenGameBoard(3)
+        test_board.marks = np.copy([['X', ' ', ' '], [' ', ' ', ' '], [' ', ' ', ' ']])
+        saved_depth = GenGameBoard.MAX_DEPTH
+        GenGameBoard.MAX_DEPTH = 0
+        try:
+            actual_result = GenGameBoard.max_value(test_board, -math.inf, math.inf)
+        finally:
+            GenGameBoard.MAX_DEPTH = saved_depth
+
+        # Taking the center is the best one-ply estimate: -27 + 4 lines gaining an O (4 * 9).
+        self.assertEqual(9, actual_result[0])
+        numpy.testing.assert_equal(actual_result[1], [1, 1])
+
     @parameterized.expand([
         # ('Estimate at -117', [['X', 'O', 'X'], [' ', ' ', ' '], [' ', ' ', ' ']], -117),
         # ('Estimate at -27', [['X', ' ', ' '], [' ', ' ', ' '], [' ', ' ', ' ']], -27),
@@ -387,6 +459,37 @@ class TestGenGameBoard(unittest.TestCase):
         # Compare the expectation with actual results.
         self.assertEqual(expected_utility, actual_result)
 
+    def test_iterative_deepening_search(self):
+        """ Tests that a time-budgeted search returns in time and leaves the board unchanged. """
+        test_board = GenGameBoard(5)
+        test_board.place(2, 2, 'X')
+        marks_before = np.copy(test_board.marks)
+
+        start = time.perf_counter()
+        best_action = test_board.alpha_beta_search(time_budget_ms=200)
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(' ', test_board.marks[best_action[0]][best_action[1]])
+        numpy.testing.assert_equal(test_board.marks, marks_before)
+        self.assertEqual(24, test_board.num_empty)
+
+        # Each report is one completed depth, and the answer is the last one's move.
+        reports = test_board.depth_reports
+        self.assertEqual(list(range(len(reports))), [report['max_depth'] for report in reports])
+        self.assertEqual(reports[-1]['action'], tuple(best_action))
+        self.assertTrue(all(report['nodes'] > 0 for report in reports))
+
+    def test_iterative_deepening_completes_small_boards(self):
+        """ Tests that iterative deepening stops at full depth with the plain search's move. """
+        marks = [['X', 'O', 'X'], [' ', 'O', ' '], [' ', 'X', ' ']]
+        test_board = GenGameBoard(3)
+        test_board.marks = np.copy(marks)
+        expected = test_board.alpha_beta_search()
+        actual = test_board.alpha_beta_search(time_budget_ms=10000)
+        numpy.testing.assert_equal(actual, expected)
+        self.assertEqual(3, test_board.depth_reports[-1]['max_depth'])
+
     def test_alpha_beta_search(self):
         """ Tests the alpha_beta_search() function. """
         self.skipTest('Test not yet created.')
@@ -400,5 +503,108 @@ class TestGenGameBoard(unittest.TestCase):
         self.skipTest('Test not yet created.')
 
 
+class TestSearchContext(unittest.TestCase):
+    """ Will run tests checking that searches with their own SearchContext do not interfere. """
+
+    def test_search_context_keeps_its_own_state(self):
+        """ Tests that a search with a SearchContext leaves the class-level state alone. """
+        test_board = GenGameBoard(3)
+        test_board.place(0, 0, 'X')
+        GenGameBoard.num_nodes = 0
+        context = SearchContext(2)
+        test_board.alpha_beta_search(context=context)
+
+        self.assertEqual(0, GenGameBoard.num_nodes)
+        self.assertEqual(0, context.depth)
+        self.assertEqual(2, context.max_depth)
+        self.assertGreater(context.get_stats()['num_nodes'], 1)
+
+        # Without a context the counters go to the class totals as before.
+        test_board.alpha_beta_search()
+        self.assertGreater(GenGameBoard.num_nodes, 0)
+
+    def test_concurrent_searches_match_serial(self):
+        """ Tests that boards searched at the same time in threads get the serial results. """
+        generator = random.Random(0)
+        jobs = []
+        for index in range(120):
+            size = 3 if index % 2 else 4
+            marks = np.full((size, size), ' ', dtype='str')
+            squares = [(row, col) for row in range(size) for col in range(size)]
+            for turn, (row, col) in enumerate(generator.sample(squares, generator.randint(1, 4))):
+                marks[row][col] = 'X' if turn % 2 == 0 else 'O'
+            jobs.append((marks, 8 if size == 3 else 2, index % 3 == 0))
+
+        def search(job):
+            marks, max_depth, with_helpers = job
+            test_board = GenGameBoard(len(marks))
+            test_board.marks = np.copy(marks)
+            context = SearchContext(max_depth)
+            if with_helpers:
+                context.transposition_table = TranspositionTable(1024)
+                context.move_orderer = MoveOrderer(len(marks))
+            value, action = test_board.max_value(-math.inf, math.inf, context)
+            return value, tuple(int(square) for square in action), context.num_nodes
+
+        expected = [search(job) for job in jobs]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+            actual = list(executor.map(search, jobs))
+        self.assertEqual(expected, actual)
+
+
+class TestTacticalPrefilter(unittest.TestCase):
+    """ Will run tests against the threat and fork detection that may skip the search. """
+
+    @parameterized.expand([
+        ("finds an immediate win", ['O', 'O', ' ', 'X', 'X', ' ', 'X', ' ', ' '],
+         ('win', (0, 2))),
+        ("prefers winning to blocking", ['O', 'O', ' ', 'X', 'X', ' ', ' ', ' ', 'X'],
+         ('win', (0, 2))),
+        ("blocks the player's threat", ['X', 'X', ' ', ' ', 'O', ' ', ' ', ' ', ' '],
+         ('block', (0, 2))),
+        ("makes a fork", ['X', 'X', 'O', ' ', ' ', 'X', ' ', 'O', ' '],
+         ('fork', (2, 0))),
+        ("leaves quiet positions to the search", ['X', ' ', ' ', ' ', 'O', ' ', ' ', ' ', ' '],
+         None)
+    ])
+    def test_get_tactical_move(self, _test_name, marks, expected):
+        """ Tests get_tactical_move() on 3x3 positions with O to move. """
+        test_board = GenGameBoard(3)
+        test_board.marks = np.array(marks).reshape(3, 3)
+        self.assertEqual(test_board.get_tactical_move(), expected)
+
+    def test_tactical_moves_are_optimal(self):
+        """ Tests that every move the prefilter decides keeps the full search value. """
+        generator = random.Random(3)
+        decided = 0
+        for _ in range(150):
+            test_board = GenGameBoard(3)
+            for turn in range(generator.choice((1, 3, 5))):
+                row, col = generator.choice(list(test_board.get_actions()))
+                test_board.place(row, col, 'X' if turn % 2 == 0 else 'O')
+            tactic = test_board.get_tactical_move()
+            if test_board.is_terminal() or tactic is None:
+                continue
+
+            decided = decided + 1
+            value = test_board.max_value(-math.inf, math.inf, SearchContext(9))[0]
+            test_board.place(tactic[1][0], tactic[1][1], 'O')
+            self.assertEqual(test_board.min_value(-math.inf, math.inf, SearchContext(9, depth=1)),
+                             value)
+        self.assertGreater(decided, 20)
+
+    def test_prefilter_skips_the_search(self):
+        """ Tests that a decided move costs no search nodes and is counted. """
+        test_board = GenGameBoard(4)
+        for row, col in ((0, 0), (0, 1), (0, 2)):
+            test_board.place(row, col, 'X')
+        for row, col in ((1, 1), (2, 2)):
+            test_board.place(row, col, 'O')
+        context = SearchContext(4, prefilter=True)
+        numpy.testing.assert_array_equal(test_board.alpha_beta_search(context=context), [0, 3])
+        self.assertEqual(context.num_nodes, 0)
+        self.assertEqual(context.tactical_blocks, 1)
+
+
 if __name__ == '__main__':
     unittest.main()
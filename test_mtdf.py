@@ -0,0 +1,58 @@
+""" The unit tests for the MTD(f) engine. """
+import math
+import unittest
+
+from parameterized import parameterized
+
+from benchmark import BENCHMARK_SETS, SET_NAMES, make_board
+from mp2 import GenGameBoard, SearchContext
+from mtdf import MTDFEngine
+from transposition import TranspositionTable
+
+# Every benchmark position, searched less deeply than in the benchmark to keep tests fast
+POSITIONS = [(f'{size}/{set_name}/{name}', rows, min(BENCHMARK_SETS[size]['max_depth'], 3))
+             for size in (3, 4, 5) for set_name in SET_NAMES
+             for name, rows in BENCHMARK_SETS[size][set_name].items()]
+
+
+class TestMTDF(unittest.TestCase):
+    """ Will run tests against the MTD(f) engine. """
+
+    @parameterized.expand(POSITIONS)
+    def test_root_value_matches_alpha_beta(self, _test_name, rows, max_depth):
+        """ The zero-window passes converge on the max_value() root value. """
+        board = make_board(rows)
+        expected = board.max_value(-math.inf, math.inf, SearchContext(max_depth))[0]
+
+        engine = MTDFEngine(1 << 12)
+        context = SearchContext(max_depth)
+        value, action = engine.search(board, context)
+        self.assertEqual(value, expected)
+        self.assertEqual(board.marks[action[0], action[1]], ' ')
+        self.assertIsNone(context.transposition_table)
+        self.assertEqual(sum(search_pass['nodes'] for search_pass in engine.passes),
+                         context.num_nodes)
+
+    def test_first_guess_is_previous_score(self):
+        """ The first pass tests the score of the previous move. """
+        board = make_board(BENCHMARK_SETS[4]['midgame']['diagonal'])
+        engine = MTDFEngine(1 << 12)
+        value = engine.search(board, SearchContext(2, TranspositionTable(1 << 12)))[0]
+        self.assertEqual(engine.previous_score, value)
+
+        engine.search(board, SearchContext(2, TranspositionTable(1 << 12)))
+        self.assertEqual(engine.passes[0]['beta'], value)
+        self.assertEqual(len(engine.passes), 2)
+
+    def test_timed_search(self):
+        """ Under a time budget the engine deepens and returns a legal move. """
+        board = GenGameBoard(4)
+        board.place(0, 0, GenGameBoard.PLAYER)
+        context = SearchContext(GenGameBoard.MAX_DEPTH, engine=MTDFEngine(1 << 14))
+        action = board.alpha_beta_search(100, context)
+        self.assertEqual(board.marks[action[0], action[1]], ' ')
+        self.assertEqual(context.max_depth, GenGameBoard.MAX_DEPTH)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+""" The unit tests for the opening book. """
+import math
+import os
+import tempfile
+import unittest
+
+from parameterized import parameterized
+import numpy as np
+
+from mp2 import GenGameBoard, SearchContext
+from opening_book import OpeningBook, build_book, get_book_positions, get_coverage, \
+    search_position
+
+
+class TestOpeningBook(unittest.TestCase):
+    """ Will run tests building and reading opening books in a temporary directory. """
+
+    def setUp(self):
+        """ Creates the temporary directory holding the book. """
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, 'book_3.bin')
+
+    def tearDown(self):
+        """ Removes the temporary directory. """
+        self.directory.cleanup()
+
+    @parameterized.expand([
+        ('empty board only', 3, 1, 1),
+        ('one X mark', 3, 2, 1 + 3),
+        ('X, O and X', 3, 4, 1 + 3 + 38),
+        ('one X mark on 4x4', 4, 2, 1 + 3)
+    ])
+    def test_get_book_positions(self, _test_name, size, plies, expected_count):
+        """ Tests that the book holds one position per symmetry class with O to move. """
+        positions = get_book_positions(size, plies)
+        self.assertEqual(expected_count, len(positions))
+        self.assertEqual(len(positions), len({key for key, _ in positions}))
+        for _, marks in positions:
+            num_x, num_o = np.count_nonzero(marks == 'X'), np.count_nonzero(marks == 'O')
+            self.assertEqual(num_x, num_o + (1 if num_x else 0))
+
+    def test_replies_match_search(self):
+        """ Tests that the book's reply has the searched value in every orientation. """
+        book = build_book(self.path, 3, 2, 9, report=lambda text: None)
+        self.assertEqual(4, len(book))
+        for row in range(3):
+            for col in range(3):
+                test_board = GenGameBoard(3)
+                test_board.place(row, col, 'X')
+                expected = test_board.max_value(-math.inf, math.inf, SearchContext(9))[0]
+
+                book_row, book_col = book.lookup(test_board)
+                self.assertEqual(' ', test_board.marks[book_row][book_col])
+                test_board.place(book_row, book_col, 'O')
+                context = SearchContext(9, depth=1)
+                self.assertEqual(expected, test_board.min_value(-math.inf, math.inf, context))
+
+    def test_search_uses_the_book(self):
+        """ Tests that alpha_beta_search() answers book positions without searching. """
+        book = build_book(self.path, 3, 2, 2, report=lambda text: None)
+        test_board = GenGameBoard(3)
+        test_board.place(1, 1, 'X')
+
+        context = SearchContext(2, opening_book=book)
+        test_board.alpha_beta_search(context=context)
+        self.assertEqual((0, 1), (context.num_nodes, context.book_hits))
+
+        # A book searched less deeply than MAX_DEPTH is not used.
+        context = SearchContext(4, opening_book=book)
+        test_board.alpha_beta_search(context=context)
+        self.assertEqual(0, context.book_hits)
+        self.assertGreater(context.num_nodes, 0)
+
+    def test_ignores_other_geometries(self):
+        """ Tests that boards won by fewer in a row, or not square, are not looked up. """
+        book = build_book(self.path, 3, 2, 2, report=lambda text: None)
+        test_board = GenGameBoard(3)
+        test_board.place(1, 1, 'X')
+        self.assertIsNotNone(book.lookup(test_board))
+        for test_board in (GenGameBoard(3, 2), GenGameBoard(3, num_cols=4)):
+            test_board.place(1, 1, 'X')
+            self.assertIsNone(book.lookup(test_board))
+
+    def test_build_resumes(self):
+        """ Tests that a build keeps the finished positions of an interrupted build. """
+        positions = get_book_positions(3, 4)
+        with open(self.path + '.partial', 'wb') as partial_file:
+            for _, marks in positions[:10]:
+                partial_file.write(search_position(3, marks, 3).tobytes())
+            partial_file.write(b'\x01\x02\x03')  # half-written record
+        self.assertEqual((10, 42), get_coverage(self.path, 3, 4))
+
+        reports = []
+        book = build_book(self.path, 3, 4, 3, report=reports.append)
+        self.assertEqual(32, len(reports))
+        self.assertEqual('covered 42/42 positions (100%)', reports[-1].split(' in ')[0])
+        self.assertEqual(42, len(book))
+        self.assertFalse(os.path.exists(self.path + '.partial'))
+        self.assertEqual((42, 42), get_coverage(self.path, 3, 4))
+
+    def test_rejects_other_files(self):
+        """ Tests that a file without the book header is refused. """
+        with open(self.path, 'wb') as other_file:
+            other_file.write(b'not a book at all')
+        with self.assertRaises(ValueError):
+            OpeningBook(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
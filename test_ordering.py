@@ -0,0 +1,69 @@
+""" The unit tests for the MoveOrderer class and its use in the search. """
+import math
+import unittest
+
+from parameterized import parameterized
+import numpy as np
+
+from mp2 import GenGameBoard
+from ordering import MoveOrderer, get_static_scores
+
+
+class TestMoveOrderer(unittest.TestCase):
+    """ Will run tests against the move ordering stage. """
+
+    def tearDown(self):
+        """ Leaves the search without move ordering for the other tests. """
+        GenGameBoard.move_orderer = None
+
+    def test_static_scores(self):
+        """ Tests that the center beats the corners, which beat the edges. """
+        scores = get_static_scores(3)
+        self.assertGreater(scores[1][1], scores[0][0])
+        self.assertGreater(scores[0][0], scores[0][1])
+
+    def test_static_order(self):
+        """ Tests that with no history the center is searched first and edges last. """
+        orderer = MoveOrderer(3)
+        actions = orderer.order(GenGameBoard(3).get_actions(), 0)
+        self.assertEqual((1, 1), tuple(actions[0]))
+        self.assertEqual({(0, 1), (1, 0), (1, 2), (2, 1)},
+                         {tuple(action) for action in actions[-4:]})
+
+    def test_killer_moves_first(self):
+        """ Tests that the latest killer move of a ply is searched first at that ply only. """
+        orderer = MoveOrderer(3)
+        orderer.record_cutoff((0, 1), 2, 1)
+        orderer.record_cutoff((2, 1), 2, 1)
+        actions = [tuple(action) for action in orderer.order(GenGameBoard(3).get_actions(), 2)]
+        self.assertEqual([(2, 1), (0, 1)], actions[:2])
+        self.assertEqual((1, 1), tuple(orderer.order(GenGameBoard(3).get_actions(), 1)[0]))
+
+    def test_history_scores(self):
+        """ Tests that moves with deep cutoffs gain history and move forward. """
+        orderer = MoveOrderer(3)
+        orderer.record_cutoff((0, 1), 5, 3)
+        self.assertEqual(9, orderer.history[0][1])
+        self.assertEqual((0, 1), tuple(orderer.order(GenGameBoard(3).get_actions(), 0)[0]))
+
+    @parameterized.expand([
+        ('opening reply', [[' ', ' ', ' '], [' ', 'X', ' '], [' ', ' ', ' ']]),
+        ('midgame', [['X', ' ', ' '], [' ', 'O', ' '], [' ', ' ', 'X']])
+    ])
+    def test_search_value_unchanged(self, _test_name, marks):
+        """ Tests that ordering changes the nodes visited but not the search value. """
+        test_board = GenGameBoard(3)
+        test_board.marks = np.copy(marks)
+        GenGameBoard.num_nodes = 0
+        expected = test_board.max_value(-math.inf, math.inf)[0]
+        unordered_nodes = GenGameBoard.num_nodes
+
+        GenGameBoard.move_orderer = MoveOrderer(3)
+        GenGameBoard.num_nodes = 0
+        actual = test_board.max_value(-math.inf, math.inf)[0]
+        self.assertEqual(expected, actual)
+        self.assertLess(GenGameBoard.num_nodes, unordered_nodes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+""" The unit tests for the root-split parallel search. """
+import contextlib
+import math
+import unittest
+
+from parameterized import parameterized
+import numpy.testing
+import numpy as np
+
+from mp2 import GenGameBoard, SearchContext
+import parallel_search
+from parallel_search import RootSplitSearch, init_worker, search_root_move
+
+
+class RisingBound:
+    """
+    Stand-in for the shared [value, index] array: reads as no bound until it has been
+    read reads_before_rise times, then as value held by root move 0.
+    """
+
+    def __init__(self, value, reads_before_rise):
+        self.value = value
+        self.reads_left = reads_before_rise
+
+    @staticmethod
+    def get_lock():
+        """ Returns a lock that does nothing, as the test runs in one process. """
+        return contextlib.nullcontext()
+
+    def __getitem__(self, item):
+        self.reads_left = self.reads_left - 1
+        if self.reads_left >= 0:
+            return (-math.inf, math.inf)[item]
+        return (self.value, 0)[item]
+
+    def __setitem__(self, item, value):
+        pass
+
+
+class TestRootSplitSearch(unittest.TestCase):
+    """ Will run tests checking the parallel search against the serial max_value(). """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Starts one pool of two workers for all the tests. """
+        cls.parallel = RootSplitSearch(workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Stops the worker pool. """
+        cls.parallel.close()
+
+    @parameterized.expand([
+        ('O to move', 3, [['X', 'O', 'X'], [' ', 'O', ' '], [' ', 'X', ' ']]),
+        ('O can win', 3, [['X', 'O', 'X'], ['X', 'O', ' '], [' ', ' ', ' ']]),
+        ('opening reply', 3, [[' ', ' ', ' '], [' ', 'X', ' '], [' ', ' ', ' ']]),
+        ('4x4 midgame', 4, [['X', ' ', ' ', ' '], [' ', 'O', ' ', ' '],
+                            [' ', 'X', ' ', ' '], [' ', ' ', ' ', 'X']])
+    ])
+    def test_matches_serial_search(self, _test_name, size, marks):
+        """ Tests that the parallel search returns the serial value and action. """
+        test_board = GenGameBoard(size)
+        test_board.marks = np.copy(marks)
+        expected = test_board.max_value(-math.inf, math.inf, SearchContext(3))
+        actual = self.parallel.search(test_board, 3)
+
+        self.assertEqual(expected[0], actual[0])
+        numpy.testing.assert_equal(actual[1], expected[1])
+        numpy.testing.assert_equal(test_board.marks, marks)
+        self.assertGreater(self.parallel.num_nodes, 1)
+
+    def test_running_worker_gets_a_later_bound(self):
+        """ Tests that a bound raised during a worker's search cuts that search short. """
+        marks = np.full((4, 4), ' ')
+        marks[0][0], marks[1][1] = 'X', 'O'
+        action, max_depth = (3, 3), 4
+        test_board = GenGameBoard(4)
+        test_board.marks = np.copy(marks)
+        test_board.place(*action, GenGameBoard.COMPUTER)
+        expected = test_board.min_value(-math.inf, math.inf, SearchContext(max_depth, depth=1))
+
+        saved_poll, saved_best = parallel_search.POLL_NODES, parallel_search.SHARED_BEST
+        parallel_search.POLL_NODES = 64
+        try:
+            init_worker(RisingBound(expected + 10 ** 3, reads_before_rise=math.inf))
+            _, value, exact, full_nodes, restarts = search_root_move(
+                np.copy(marks), 4, max_depth, action, 1)
+            self.assertEqual((expected, True, 0), (value, exact, restarts))
+
+            # The bound rises once the first poll has seen no change.
+            init_worker(RisingBound(expected + 10 ** 3, reads_before_rise=4))
+            _, value, exact, nodes, restarts = search_root_move(
+                np.copy(marks), 4, max_depth, action, 1)
+        finally:
+            parallel_search.POLL_NODES, parallel_search.SHARED_BEST = saved_poll, saved_best
+        self.assertEqual((False, 1), (exact, restarts))
+        self.assertLessEqual(value, expected + 10 ** 3)
+        self.assertLess(nodes, full_nodes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+""" The unit tests for the vectorized playout kernel. """
+import unittest
+
+import numpy as np
+import numpy.testing
+
+from bitboard import BitBoard
+from mp2 import GenGameBoard
+from playouts import get_line_masks, get_win_rates, loop_playouts, random_playouts
+
+
+class TestPlayouts(unittest.TestCase):
+    """ Will run tests against random_playouts(). """
+
+    def test_line_masks(self):
+        """ Every square of an n x n board is on its row and column, some on diagonals. """
+        masks = get_line_masks(4)
+        self.assertEqual(masks.shape, (16, 10))
+        self.assertEqual(masks.sum(), 40)
+        self.assertEqual(list(masks[0]), [1, 0, 0, 0, 1, 0, 0, 0, 1, 0])
+
+    def test_seed_makes_games_repeatable(self):
+        """ The same seed plays the same games; lengths fit the empty squares. """
+        board = GenGameBoard(5)
+        board.place(2, 2, GenGameBoard.PLAYER)
+        first = random_playouts(board, 3000, seed=11)
+        second = random_playouts(board, 3000, seed=11)
+        numpy.testing.assert_array_equal(first[0], second[0])
+        numpy.testing.assert_array_equal(first[1], second[1])
+        self.assertTrue(np.all((first[1] >= 1) & (first[1] <= 24)))
+        self.assertTrue(np.all(first[1][first[0] == 0] == 24))
+
+    def test_bitboard_plays_the_same_games(self):
+        """ A BitBoard in the same position gives the same games as a GenGameBoard. """
+        games = []
+        for board in (GenGameBoard(4), BitBoard(4)):
+            board.place(0, 0, GenGameBoard.PLAYER)
+            board.place(1, 2, GenGameBoard.COMPUTER)
+            games.append(random_playouts(board, 500, seed=5))
+        numpy.testing.assert_array_equal(games[0][0], games[1][0])
+        numpy.testing.assert_array_equal(games[0][1], games[1][1])
+
+    def test_forced_and_finished_positions(self):
+        """ A last square that wins, and a finished game, have one outcome. """
+        board = GenGameBoard(3)
+        board.marks = np.array([['O', 'O', ' '], ['X', 'X', 'O'], ['X', 'O', 'X']])
+        outcomes, lengths = random_playouts(board, 100, seed=0)
+        self.assertTrue(np.all(outcomes == 1) and np.all(lengths == 1))
+
+        board.place(0, 2, GenGameBoard.COMPUTER)
+        outcomes, lengths = random_playouts(board, 10, seed=0)
+        self.assertTrue(np.all(outcomes == 1) and np.all(lengths == 0))
+
+    def test_matches_the_python_loop(self):
+        """ Win rates agree with the place()/check_for_win() loop and known 3x3 values. """
+        board = GenGameBoard(3)
+        rates = get_win_rates(random_playouts(board, 40000, seed=1)[0])
+        # Random play from the empty board: the first player wins 58.5%, draws 12.7%.
+        self.assertAlmostEqual(rates[GenGameBoard.COMPUTER], 0.585, delta=0.01)
+        self.assertAlmostEqual(rates['draw'], 0.127, delta=0.01)
+
+        board = GenGameBoard(4)
+        board.place(0, 0, GenGameBoard.PLAYER)
+        board.place(1, 1, GenGameBoard.COMPUTER)
+        board.place(2, 1, GenGameBoard.PLAYER)
+        vectorized = get_win_rates(random_playouts(board, 20000, seed=2)[0])
+        looped = get_win_rates(loop_playouts(board, 3000, seed=2))
+        for key, value in vectorized.items():
+            self.assertAlmostEqual(value, looped[key], delta=0.04)
+
+
+if __name__ == '__main__':
+    unittest.main()
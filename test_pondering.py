@@ -0,0 +1,58 @@
+""" The unit tests for pondering. """
+import time
+import unittest
+
+import numpy as np
+
+from mp2 import GenGameBoard
+from pondering import Ponderer
+
+
+class TestPondering(unittest.TestCase):
+    """ Will run tests against the Ponderer. """
+
+    def test_hit_answers_from_pondering(self):
+        """ Every 3x3 reply is pondered; the player's move is then a ponder hit. """
+        board = GenGameBoard(3)
+        board.place(1, 1, GenGameBoard.PLAYER)
+        board.place(0, 0, GenGameBoard.COMPUTER)
+        ponderer = Ponderer(max_depth=9)
+        ponderer.start(board)
+        ponderer.thread.join()
+        self.assertEqual(len(ponderer.answers), 7)
+
+        board.place(2, 2, GenGameBoard.PLAYER)
+        expected = GenGameBoard(3)
+        expected.marks = np.copy(board.marks)
+        action = ponderer.get_move(board)
+        self.assertEqual(tuple(action), tuple(expected.alpha_beta_search()))
+        stats = ponderer.get_stats()
+        self.assertEqual((stats['moves'], stats['hits'], stats['hit_rate']), (1, 1, 1.0))
+        self.assertGreater(stats['saved_seconds'], 0)
+
+    def test_miss_searches_and_stop_interrupts(self):
+        """ Stopping interrupts the background search; an unpondered reply is searched. """
+        board = GenGameBoard(5)
+        board.place(2, 2, GenGameBoard.PLAYER)
+        board.place(0, 0, GenGameBoard.COMPUTER)
+        ponderer = Ponderer(max_depth=6, max_replies=1)
+        ponderer.start(board)
+        replies = ponderer.get_replies(board)
+        self.assertEqual(len(replies), 1)
+        time.sleep(0.05)
+        start = time.perf_counter()
+        ponderer.stop()
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertIsNone(ponderer.thread)
+
+        row, col = next((int(row), int(col)) for row, col in board.get_actions()
+                        if (row, col) != replies[0])
+        board.place(row, col, GenGameBoard.PLAYER)
+        ponderer.max_depth = 2
+        action = ponderer.get_move(board)
+        self.assertEqual(board.marks[action[0], action[1]], ' ')
+        self.assertEqual((ponderer.hits, ponderer.misses), (0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+""" The unit tests for the Principal Variation Search engine. """
+import math
+import unittest
+
+from parameterized import parameterized
+
+from benchmark import BENCHMARK_SETS, SET_NAMES, make_board
+from mp2 import GenGameBoard, SearchContext
+from ordering import MoveOrderer
+from pvs import PVSEngine, negamax
+from transposition import TranspositionTable
+
+# Every benchmark position, searched less deeply than in the benchmark to keep tests fast
+POSITIONS = [(f'{size}/{set_name}/{name}', rows, min(BENCHMARK_SETS[size]['max_depth'], 3))
+             for size in (3, 4, 5) for set_name in SET_NAMES
+             for name, rows in BENCHMARK_SETS[size][set_name].items()]
+
+
+class TestPVS(unittest.TestCase):
+    """ Will run tests against the PVS engine. """
+
+    @parameterized.expand(POSITIONS)
+    def test_root_value_matches_alpha_beta(self, _test_name, rows, max_depth):
+        """ PVS with aspiration windows finds the max_value() root value at equal depth. """
+        board = make_board(rows)
+        expected = board.max_value(-math.inf, math.inf, SearchContext(max_depth))[0]
+
+        for engine in (PVSEngine(), PVSEngine(aspiration_window=1)):
+            value, action = engine.search(board, SearchContext(max_depth))
+            self.assertEqual(value, expected)
+            self.assertEqual(board.marks[action[0], action[1]], ' ')
+
+        context = SearchContext(max_depth, TranspositionTable(1 << 12),
+                                MoveOrderer(board.board_size))
+        self.assertEqual(PVSEngine().search(board, context)[0], expected)
+
+    def test_fail_soft_bounds(self):
+        """ Outside the window, negamax returns a bound on the true value. """
+        board = make_board(BENCHMARK_SETS[4]['midgame']['diagonal'])
+        exact = negamax(board, -math.inf, math.inf, 1, SearchContext(2))[0]
+        for alpha, beta in ((exact - 50, exact - 10), (exact + 10, exact + 50),
+                            (exact - 1, exact + 1)):
+            value = negamax(board, alpha, beta, 1, SearchContext(2))[0]
+            if value <= alpha:
+                self.assertGreaterEqual(value, exact)
+            elif value >= beta:
+                self.assertLessEqual(value, exact)
+            else:
+                self.assertEqual(value, exact)
+
+    def test_engine_is_selectable(self):
+        """ alpha_beta_search() leaves the search to the context's engine. """
+        board = GenGameBoard(3)
+        board.place(1, 1, GenGameBoard.PLAYER)
+        engine = PVSEngine()
+        context = SearchContext(9, engine=engine)
+        action = board.alpha_beta_search(context=context)
+        self.assertIn(tuple(action), ((0, 0), (0, 2), (2, 0), (2, 2)))
+        self.assertGreater(context.num_nodes, 0)
+
+        timed_action = board.alpha_beta_search(50, SearchContext(9, engine=engine))
+        self.assertEqual(board.marks[timed_action[0], timed_action[1]], ' ')
+
+
+if __name__ == '__main__':
+    unittest.main()
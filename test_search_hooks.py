@@ -0,0 +1,92 @@
+""" The unit tests for the search hooks. """
+import os
+import re
+import tempfile
+import unittest
+
+import numpy.testing
+
+from mp2 import GenGameBoard, SearchContext
+from search_hooks import SamplingProfiler, SearchHooks, ignore_event
+
+
+class EventCounter:
+    """ Hook counting the events it is told about. """
+
+    def __init__(self):
+        self.nodes, self.cutoffs, self.leaves, self.actions = 0, 0, 0, []
+
+    def on_enter_node(self, _board, _context):
+        """ Counts a node. """
+        self.nodes = self.nodes + 1
+
+    def on_cutoff(self, _board, _context, _action):
+        """ Counts a cutoff. """
+        self.cutoffs = self.cutoffs + 1
+
+    def on_leaf(self, _board, _context, _value):
+        """ Counts a leaf. """
+        self.leaves = self.leaves + 1
+
+    def on_search_done(self, _board, _context, action):
+        """ Keeps the chosen action. """
+        self.actions.append(action)
+
+
+class TestSearchHooks(unittest.TestCase):
+    """ Will run tests against the hook registry and the sampling profiler. """
+
+    def test_hooks_see_every_event(self):
+        """ Every node, cutoff, leaf and finished search reaches the hooks. """
+        board = GenGameBoard(3)
+        board.place(0, 0, GenGameBoard.PLAYER)
+        counter = EventCounter()
+        context = SearchContext(9, hooks=SearchHooks(counter))
+        action = board.alpha_beta_search(context=context)
+
+        self.assertEqual(counter.nodes, context.num_nodes)
+        self.assertEqual(counter.cutoffs,
+                         context.num_pruned + context.utility_max + context.utility_min)
+        self.assertGreater(counter.leaves, 0)
+        self.assertLess(counter.leaves, counter.nodes)
+        self.assertEqual(len(counter.actions), 1)
+        numpy.testing.assert_array_equal(counter.actions[0], action)
+
+    def test_register_and_unregister(self):
+        """ Dispatchers follow the registered callbacks; unknown events are refused. """
+        hooks = SearchHooks()
+        self.assertIs(hooks.enter_node, ignore_event)
+        seen = []
+        callback = hooks.register('on_enter_node', lambda board, context: seen.append(1))
+        self.assertIs(hooks.enter_node, callback)
+        hooks.register('on_enter_node', lambda board, context: seen.append(2))
+        hooks.enter_node(None, None)
+        self.assertEqual(seen, [1, 2])
+
+        hooks.unregister('on_enter_node', callback)
+        hooks.enter_node(None, None)
+        self.assertEqual(seen, [1, 2, 2])
+        with self.assertRaises(ValueError):
+            hooks.register('on_exit_node', callback)
+
+    def test_sampling_profiler_writes_collapsed_stacks(self):
+        """ The profile has one 'frame;frame;... microseconds' line per stack. """
+        profiler = SamplingProfiler(interval=0)
+        board = GenGameBoard(4)
+        board.place(0, 0, GenGameBoard.PLAYER)
+        board.alpha_beta_search(context=SearchContext(2, hooks=SearchHooks(profiler)))
+        self.assertIsNone(profiler.last_sample)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'search.folded')
+            profiler.write_collapsed(path)
+            with open(path, encoding='utf-8') as collapsed_file:
+                lines = collapsed_file.read().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            self.assertRegex(line, r'^alpha_beta_search(;(max|min)_value\[\d+\])+(;leaf)? \d+$')
+        self.assertTrue(any(re.search(r'min_value\[3\];leaf ', line) for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
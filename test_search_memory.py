@@ -0,0 +1,89 @@
+""" The unit tests for the search memory kept between moves. """
+import math
+import unittest
+
+from mp2 import GenGameBoard, SearchContext
+from ordering import MoveOrderer
+from search_memory import SearchMemory, play_game
+from symmetry import to_canonical
+from transposition import EXACT, TranspositionTable
+
+
+class TestSearchMemory(unittest.TestCase):
+    """ Will run tests against SearchMemory and the aging it relies on. """
+
+    def tearDown(self):
+        GenGameBoard.search_memory = None
+
+    def test_aging(self):
+        """ Aged entries still answer but lose their slot; killers move up, history halves. """
+        table = TranspositionTable(2)
+        table.store(1, 5, 6, EXACT, (0, 0))
+        table.store(2, 7, 2, EXACT, (1, 1))
+        self.assertEqual(table.always_slots[0].key, 2)
+        table.new_generation()
+        self.assertEqual(table.lookup(1, 6, -math.inf, math.inf), (5, (0, 0)))
+        table.store(3, 9, 1, EXACT, (2, 2))
+        self.assertEqual(table.depth_slots[0].key, 3)
+        self.assertIsNone(table.probe(1))
+        self.assertEqual(table.probe(2).generation, 0)
+
+        orderer = MoveOrderer(3)
+        for ply in range(4):
+            orderer.record_cutoff((ply % 3, 0), ply, 3)
+        orderer.age(2)
+        self.assertEqual(orderer.killers, [[(2, 0)], [(0, 0)]])
+        self.assertEqual(orderer.history[0][0], 9)
+
+    def test_prepare_and_new_game(self):
+        """ Later moves of a game age the memory; an earlier or other board starts afresh. """
+        memory = SearchMemory(1024)
+        board = GenGameBoard(4)
+        board.place(0, 0, GenGameBoard.PLAYER)
+        memory.attach(board, SearchContext(2))
+        orderer = memory.move_orderer
+        self.assertEqual((memory.num_searches, memory.transposition_table.generation), (1, 0))
+
+        board.place(1, 1, GenGameBoard.COMPUTER)
+        board.place(2, 1, GenGameBoard.PLAYER)
+        context = memory.attach(board, SearchContext(2))
+        self.assertIs(context.move_orderer, orderer)
+        self.assertIs(context.transposition_table, memory.transposition_table)
+        self.assertEqual((memory.num_searches, memory.transposition_table.generation), (2, 1))
+
+        memory.attach(GenGameBoard(4), SearchContext(2))
+        self.assertIsNot(memory.move_orderer, orderer)
+        self.assertEqual((memory.num_searches, memory.transposition_table.generation), (1, 0))
+        memory.attach(GenGameBoard(3), SearchContext(2))
+        self.assertEqual(memory.move_orderer.board_size, 3)
+
+    def test_root_move_with_canonical_keys(self):
+        """ A root move stored under the canonical key is mapped back onto the board. """
+        memory = SearchMemory(1024)
+        board = GenGameBoard(3)
+        board.place(1, 0, GenGameBoard.PLAYER)
+        memory.attach(board, SearchContext(2, canonical_table_keys=True))
+        key, symmetry = board.get_table_key(False, True)
+        self.assertNotEqual(symmetry, 0)
+        memory.transposition_table.store(key, 0, 2, EXACT, to_canonical(symmetry, (0, 2), 3))
+
+        context = memory.attach(board, SearchContext(2, canonical_table_keys=True))
+        self.assertEqual(tuple(context.root_first_move), (0, 2))
+        self.assertIsNone(memory.attach(board, SearchContext(2)).root_first_move)
+
+    def test_class_default_and_game(self):
+        """ Searches with the class defaults use the memory; a kept search visits fewer nodes. """
+        board = GenGameBoard(3)
+        board.place(1, 1, GenGameBoard.PLAYER)
+        GenGameBoard.search_memory = SearchMemory(1024)
+        board.alpha_beta_search()
+        self.assertEqual(GenGameBoard.search_memory.num_searches, 1)
+        self.assertGreater(len(GenGameBoard.search_memory.transposition_table), 0)
+
+        moves = play_game(4, 4, SearchMemory(), seed=0)
+        self.assertLessEqual(sum(move[3] for move in moves), sum(move[1] for move in moves))
+        self.assertEqual(moves[0][1], moves[0][3])
+
+
+if __name__ == '__main__':
+    unittest.main()
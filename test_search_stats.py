@@ -0,0 +1,69 @@
+""" The unit tests for the search statistics. """
+import json
+import math
+import unittest
+
+import numpy.testing
+
+from mp2 import GenGameBoard, SearchContext
+from search_stats import SearchStats
+from transposition import TranspositionTable
+
+
+class TestSearchStats(unittest.TestCase):
+    """ Will run tests against the SearchStats gathered by the search. """
+
+    def test_stats_match_the_search_counters(self):
+        """ Per-depth counts add up to the context's counters and leave the search unchanged. """
+        board = GenGameBoard(3)
+        board.place(0, 0, GenGameBoard.PLAYER)
+        plain_action = board.alpha_beta_search(context=SearchContext(9))
+
+        context = SearchContext(9, TranspositionTable(1 << 12))
+        action, stats = board.alpha_beta_search(context=context, return_stats=True)
+        numpy.testing.assert_array_equal(action, plain_action)
+        self.assertIs(stats, context.stats)
+        self.assertEqual(stats.nodes_per_depth[0], 1)
+        self.assertEqual(stats.num_nodes, context.num_nodes)
+        self.assertEqual(stats.num_cutoffs,
+                         context.num_pruned + context.utility_max + context.utility_min)
+        self.assertLessEqual(stats.first_move_cutoffs, stats.num_cutoffs)
+        self.assertEqual(stats.counters['tt_hits'], context.tt_hits)
+        self.assertGreater(stats.tt_hit_rate, 0)
+        self.assertGreater(stats.elapsed, 0)
+        self.assertGreater(stats.nodes_per_second, 0)
+
+        exported = json.loads(stats.to_json())
+        self.assertEqual(exported['nodes'], context.num_nodes)
+        self.assertEqual(exported['nodes_per_depth'], stats.nodes_per_depth)
+
+    def test_derived_figures(self):
+        """ The branching factor solves 1 + b + ... + b^d = nodes; rates need data. """
+        stats = SearchStats()
+        self.assertIsNone(stats.effective_branching_factor)
+        self.assertIsNone(stats.first_move_cutoff_rate)
+        self.assertIsNone(stats.tt_hit_rate)
+        self.assertIsNone(stats.nodes_per_second)
+
+        for depth, count in enumerate((1, 2, 4, 8)):
+            for _ in range(count):
+                stats.record_node(depth)
+        stats.record_cutoff(2, True)
+        stats.record_cutoff(3, False)
+        stats.finish({'tt_hits': 1, 'tt_misses': 3}, 0.5)
+        self.assertTrue(math.isclose(stats.effective_branching_factor, 2))
+        self.assertEqual(stats.cutoffs_per_depth, [0, 0, 1, 1])
+        self.assertEqual(stats.first_move_cutoff_rate, 0.5)
+        self.assertEqual(stats.tt_hit_rate, 0.25)
+        self.assertEqual(stats.nodes_per_second, 30)
+
+    def test_stats_are_off_by_default(self):
+        """ Searches only gather statistics when asked to. """
+        self.assertIsNone(GenGameBoard.new_context().stats)
+        board = GenGameBoard(3)
+        board.place(1, 1, GenGameBoard.PLAYER)
+        self.assertEqual(len(board.alpha_beta_search(context=SearchContext(2))), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
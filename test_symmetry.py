@@ -0,0 +1,98 @@
+""" The unit tests for the board symmetries and the canonical position keys. """
+import math
+import unittest
+
+from parameterized import parameterized
+import numpy.testing
+import numpy as np
+
+from mp2 import GenGameBoard
+from symmetry import INVERSES, from_canonical, get_symmetry_tables, to_canonical
+from transposition import TranspositionTable
+
+
+class TestSymmetry(unittest.TestCase):
+    """ Will run tests against the symmetry tables and their use by GenGameBoard. """
+
+    def setUp(self):
+        """ Saves the search depth, which some tests change. """
+        self.saved_depth = GenGameBoard.MAX_DEPTH
+
+    def tearDown(self):
+        """ Restores the search depth and leaves the search without a table. """
+        GenGameBoard.MAX_DEPTH = self.saved_depth
+        GenGameBoard.transposition_table = None
+        GenGameBoard.canonical_table_keys = False
+
+    def test_inverses(self):
+        """ Tests that each symmetry followed by its inverse maps every position to itself. """
+        tables = get_symmetry_tables(4)
+        for symmetry, inverse in enumerate(INVERSES):
+            for row in range(4):
+                for col in range(4):
+                    image = tables[symmetry][row][col]
+                    self.assertEqual((row, col), tables[inverse][image[0]][image[1]])
+
+    def test_canonical_key_of_rotations(self):
+        """ Tests that every rotation and reflection of a position has the same canonical key. """
+        marks = np.array([['X', 'O', ' '], [' ', ' ', ' '], [' ', ' ', 'X']])
+        keys = set()
+        for image in (marks, np.rot90(marks), np.rot90(marks, 2), np.fliplr(marks),
+                      np.flipud(marks), marks.T):
+            test_board = GenGameBoard(3)
+            test_board.marks = np.copy(image)
+            keys.add(test_board.get_canonical_key()[0])
+        self.assertEqual(1, len(keys))
+
+    def test_canonical_actions_round_trip(self):
+        """ Tests that an action mapped to the canonical orientation maps back to itself. """
+        for symmetry in range(8):
+            action = to_canonical(symmetry, (0, 2), 4)
+            self.assertEqual((0, 2), from_canonical(symmetry, action, 4))
+
+    @parameterized.expand([
+        ('empty 3x3', 3, [], [[0, 0], [0, 1], [1, 1]]),
+        ('empty 4x4', 4, [], [[0, 0], [0, 1], [1, 1]]),
+        ('3x3 with center taken', 3, [(1, 1)], [[0, 0], [0, 1]]),
+        ('3x3 with a corner taken', 3, [(0, 0)], [[0, 1], [0, 2], [1, 1], [1, 2], [2, 2]])
+    ])
+    def test_unique_actions(self, _test_name, size, player_moves, expected_actions):
+        """ Tests that get_actions(unique=True) keeps one move of each symmetric group. """
+        test_board = GenGameBoard(size)
+        for row, col in player_moves:
+            test_board.place(row, col, GenGameBoard.PLAYER)
+        numpy.testing.assert_equal(test_board.get_actions(unique=True), expected_actions)
+
+    def test_root_search_is_reduced(self):
+        """ Tests that the search of an empty 4x4 board only expands the unique root moves. """
+        test_board = GenGameBoard(4)
+        GenGameBoard.MAX_DEPTH = 0
+        GenGameBoard.num_nodes = 0
+        test_board.alpha_beta_search()
+
+        # The root and one child per unique move (corner, edge and center).
+        self.assertEqual(1 + 3, GenGameBoard.num_nodes)
+
+    @parameterized.expand([
+        ('opening reply', [[' ', ' ', ' '], [' ', 'X', ' '], [' ', ' ', ' ']]),
+        ('corner opening', [['X', ' ', ' '], [' ', ' ', ' '], [' ', ' ', ' ']]),
+        ('midgame', [['X', ' ', ' '], [' ', 'O', ' '], [' ', ' ', 'X']])
+    ])
+    def test_canonical_table_keys(self, _test_name, marks):
+        """ Tests that a canonically keyed table gives the same value and move as no table. """
+        GenGameBoard.MAX_DEPTH = 9
+        test_board = GenGameBoard(3)
+        test_board.marks = np.copy(marks)
+        expected = test_board.max_value(-math.inf, math.inf)
+
+        GenGameBoard.transposition_table = TranspositionTable(4096)
+        GenGameBoard.canonical_table_keys = True
+        GenGameBoard.tt_hits = 0
+        actual = test_board.max_value(-math.inf, math.inf)
+        self.assertEqual(expected[0], actual[0])
+        numpy.testing.assert_equal(actual[1], expected[1])
+        self.assertGreater(GenGameBoard.tt_hits, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
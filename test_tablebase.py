@@ -0,0 +1,100 @@
+""" The unit tests for the solved-game tablebase. """
+import math
+import os
+import tempfile
+import unittest
+
+from parameterized import parameterized
+import numpy as np
+
+from mp2 import GenGameBoard, SearchContext
+from tablebase import Tablebase, build_tablebase, check_against_search
+
+
+class TestTablebase(unittest.TestCase):
+    """ Will run tests against a 3x3 tablebase built in a temporary directory. """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Builds the 3x3 tablebase once for all the tests. """
+        cls.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        cls.path = os.path.join(cls.directory.name, 'tablebase_3.bin')
+        cls.summary = build_tablebase(cls.path, 3)
+        cls.tablebase = Tablebase(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        """ Removes the temporary directory. """
+        del cls.tablebase
+        cls.directory.cleanup()
+
+    def test_counts_every_legal_position(self):
+        """ Tests that the table holds the 5478 legal 3x3 positions. """
+        self.assertEqual(5478, self.summary['positions'])
+        self.assertEqual(3 ** 9, self.summary['table_bytes'])
+        self.assertEqual(5478, sum(self.summary[name] for name in ('o_wins', 'draws', 'x_wins')))
+
+    @parameterized.expand([
+        ('empty board is a draw', [[' ', ' ', ' '], [' ', ' ', ' '], [' ', ' ', ' ']], (0, 9)),
+        ('O wins at once', [['X', 'O', 'X'], ['X', 'O', ' '], [' ', ' ', ' ']], (1, 1)),
+        ('X has a fork', [['X', ' ', 'X'], [' ', 'O', ' '], ['O', ' ', 'X']], (-1, 2)),
+        ('X has won', [['X', 'X', 'X'], ['O', 'O', ' '], [' ', ' ', ' ']], (-1, 0)),
+        ('both have won', [['X', 'X', 'X'], ['O', 'O', 'O'], [' ', ' ', ' ']], None),
+        ('too many O marks', [['O', 'O', ' '], [' ', ' ', ' '], [' ', ' ', ' ']], None),
+        ('other marks', [['A', ' ', ' '], [' ', ' ', ' '], [' ', ' ', ' ']], None)
+    ])
+    def test_probe(self, _test_name, marks, expected):
+        """ Tests the stored value and distance to the end of known positions. """
+        test_board = GenGameBoard(3)
+        test_board.marks = np.copy(marks)
+        self.assertEqual(expected, self.tablebase.probe(test_board))
+
+    def test_matches_search(self):
+        """ Tests values and best moves against a full-depth search on random positions. """
+        self.assertEqual(0, check_against_search(self.tablebase, 150, seed=1))
+
+    @parameterized.expand([
+        ('takes the win', [['X', 'O', 'X'], ['X', 'O', ' '], [' ', ' ', ' ']], (2, 1)),
+        ('blocks the row', [['X', 'X', ' '], [' ', 'O', ' '], [' ', ' ', ' ']], (0, 2)),
+        ('O moves first', [[' ', ' ', ' '], [' ', ' ', ' '], [' ', ' ', ' ']], (0, 0)),
+        ('finished board', [['X', 'X', 'X'], ['O', 'O', ' '], [' ', ' ', ' ']], None)
+    ])
+    def test_get_best_action(self, _test_name, marks, expected):
+        """ Tests the computer's move chosen from the table. """
+        test_board = GenGameBoard(3)
+        test_board.marks = np.copy(marks)
+        self.assertEqual(expected, self.tablebase.get_best_action(test_board))
+
+    def test_search_uses_the_tablebase(self):
+        """ Tests that alpha_beta_search() answers from the table without searching. """
+        test_board = GenGameBoard(3)
+        test_board.place(0, 0, 'X')
+        expected = test_board.max_value(-math.inf, math.inf, SearchContext(9))[0]
+
+        context = SearchContext(2, tablebase=self.tablebase)
+        row, col = test_board.alpha_beta_search(context=context)
+        self.assertEqual((0, 1), (context.num_nodes, context.tablebase_hits))
+        test_board.place(row, col, 'O')
+        self.assertEqual(expected, test_board.min_value(-math.inf, math.inf,
+                                                        SearchContext(9, depth=1)))
+
+        # Boards of another size are searched as usual.
+        context = SearchContext(1, tablebase=self.tablebase)
+        GenGameBoard(4).alpha_beta_search(context=context)
+        self.assertEqual(0, context.tablebase_hits)
+
+    def test_ignores_other_geometries(self):
+        """ Tests that boards won by fewer in a row, or not square, are not in the table. """
+        for test_board in (GenGameBoard(3, 2), GenGameBoard(3, num_cols=4)):
+            test_board.place(1, 1, 'X')
+            self.assertIsNone(self.tablebase.probe(test_board))
+            self.assertIsNone(self.tablebase.get_best_action(test_board))
+
+    def test_rejects_large_boards(self):
+        """ Tests that tablebases are only built up to 4x4. """
+        with self.assertRaises(ValueError):
+            build_tablebase(os.path.join(self.directory.name, 'tablebase_5.bin'), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
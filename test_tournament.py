@@ -0,0 +1,94 @@
+""" The unit tests for the self-play tournament. """
+import argparse
+import math
+import unittest
+
+import numpy as np
+
+from mp2 import GenGameBoard, SearchContext
+from tournament import (PlayerConfig, WeightedBoard, format_config, format_ms, get_elo,
+                        get_score_interval, parse_config, run_tournament, summarize)
+
+
+class TestTournament(unittest.TestCase):
+    """ Will run tests against the configurations, statistics and games of a tournament. """
+
+    def test_parse_config(self):
+        """ Tests that settings are parsed, defaults kept and unknown names rejected. """
+        config = parse_config('max_depth=3,engine=pvs,prefilter=off,weights=0:1:10')
+        self.assertEqual(PlayerConfig(max_depth=3, engine='pvs', prefilter=False,
+                                      weights=(0, 1, 10)), config)
+        self.assertEqual(PlayerConfig(), parse_config(''))
+        self.assertEqual(config, parse_config(format_config(config)))
+        self.assertEqual('defaults', format_config(PlayerConfig()))
+        for text in ('depth=3', 'engine=minimax', 'memory=maybe', 'max_depth=x'):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_config(text)
+
+    def test_weighted_board(self):
+        """ Tests that powers of ten give the default evaluation, other weights another move. """
+        board = GenGameBoard(4)
+        weighted = WeightedBoard(4, weights=(1, 10, 100, 1000))
+        marks = np.array([['X', ' ', ' ', 'O'], [' ', 'O', ' ', ' '],
+                          [' ', 'X', ' ', ' '], [' ', ' ', ' ', 'X']])
+        board.marks, weighted.marks = np.copy(marks), np.copy(marks)
+        self.assertEqual(board.get_est_utility(), weighted.get_est_utility())
+        self.assertEqual(tuple(board.max_value(-math.inf, math.inf)[1]),
+                         tuple(weighted.max_value(-math.inf, math.inf)[1]))
+
+        # Weights favouring lines with a single mark choose another move.
+        single = WeightedBoard(4, weights=(0, 100, 10, 1))
+        single.marks = np.copy(marks)
+        self.assertEqual(-110, single.get_est_utility())
+        self.assertEqual((2, 2), tuple(weighted.max_value(-math.inf, math.inf,
+                                                          SearchContext(1))[1]))
+        self.assertEqual((2, 0), tuple(single.max_value(-math.inf, math.inf,
+                                                        SearchContext(1))[1]))
+        with self.assertRaises(ValueError):
+            WeightedBoard(4, weights=(0, 1, 10))
+
+    def test_score_interval(self):
+        """ Tests the mean score, its interval and the implied Elo difference. """
+        self.assertEqual((1.0, 1.0, 1.0), get_score_interval(10, 0, 0))
+        score, low, high = get_score_interval(30, 40, 30)
+        self.assertEqual(0.5, score)
+        self.assertAlmostEqual(0.5 - low, high - 0.5)
+        self.assertAlmostEqual(1.959964 * math.sqrt(0.15 / 100), high - 0.5)
+        self.assertEqual(0.0, get_elo(0.5))
+        self.assertAlmostEqual(190.849, get_elo(0.75), places=3)
+        self.assertEqual(-math.inf, get_elo(0.0))
+        summary = summarize([{'result': 'win', 'latencies': [[], [0.0015]]}])
+        self.assertEqual((0, None), (summary['latency'][0]['moves'],
+                                     summary['latency'][0]['mean_ms']))
+        self.assertEqual(('-', '1.50'), (format_ms(None), format_ms(1.5)))
+
+    def test_paired_games(self):
+        """ Tests that pairs share an opening, colors alternate and every move is timed. """
+        configs = (PlayerConfig(max_depth=2), parse_config('max_depth=1,engine=pvs,memory=1'))
+        results = sorted(run_tournament((3, 3, 3), configs, 6, workers=2, opening_plies=2),
+                         key=lambda result: result['game'])
+        self.assertEqual(list(range(6)), [result['game'] for result in results])
+        for even, odd in zip(results[::2], results[1::2]):
+            self.assertEqual(even['opening'], odd['opening'])
+            self.assertEqual((0, 1), (even['first'], odd['first']))
+        for result in results:
+            self.assertEqual(2, len(result['opening']))
+            self.assertEqual(result['plies'] - 2, sum(map(len, result['latencies'])))
+
+        summary = summarize(results)
+        self.assertEqual(6, summary['wins'] + summary['draws'] + summary['losses'])
+        self.assertEqual(sum(len(result['latencies'][1]) for result in results),
+                         summary['latency'][1]['moves'])
+
+    def test_perfect_play_draws(self):
+        """ Tests that perfect play on both sides of 3x3 draws every game. """
+        config = PlayerConfig(max_depth=9, ordering=True, table=1 << 14)
+        results = list(run_tournament((3, 3, 3), (config, config), 2, workers=2,
+                                      opening_plies=0))
+        self.assertEqual(['draw', 'draw'], [result['result'] for result in results])
+        with self.assertRaises(ValueError):
+            list(run_tournament((3, 3, 3), (config, config), 2, opening_plies=5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+""" The unit tests for the TranspositionTable class and its use in the search. """
+import math
+import unittest
+
+from parameterized import parameterized
+import numpy as np
+
+from mp2 import GenGameBoard, SearchContext
+from transposition import EXACT, LOWER_BOUND, TranspositionTable
+
+
+class TestTranspositionTable(unittest.TestCase):
+    """ Will run tests against the transposition table and the search using it. """
+
+    def tearDown(self):
+        """ Leaves the search without a table for the other tests. """
+        GenGameBoard.transposition_table = None
+
+    def test_store_and_probe(self):
+        """ Tests that a stored entry is found again by its key. """
+        table = TranspositionTable(8)
+        table.store(12345, 100, 3, EXACT, (1, 2))
+        entry = table.probe(12345)
+        self.assertEqual((100, 3, EXACT, (1, 2)),
+                         (entry.value, entry.depth, entry.bound, entry.best_move))
+        self.assertIsNone(table.probe(54321))
+
+    def test_replacement_policy(self):
+        """ Tests that the deepest entry of a bucket is kept and the newest goes alongside. """
+        table = TranspositionTable(2)  # a single bucket
+        table.store(1, 10, 5, EXACT, None)
+        table.store(2, 20, 1, LOWER_BOUND, None)
+        table.store(3, 30, 2, LOWER_BOUND, None)
+        self.assertIsNotNone(table.probe(1))
+        self.assertIsNone(table.probe(2))
+        self.assertIsNotNone(table.probe(3))
+
+        # A deeper result takes the depth-preferred slot.
+        table.store(4, 40, 6, EXACT, None)
+        self.assertIsNone(table.probe(1))
+        self.assertEqual(2, len(table))
+
+    def test_entry_cap(self):
+        """ Tests that the table never holds more than its entry cap. """
+        table = TranspositionTable(16)
+        for key in range(1000):
+            table.store(key * 7919, key, key % 5, EXACT, None)
+        self.assertLessEqual(len(table), 16)
+
+    def test_proven_result_holds_at_any_depth(self):
+        """ Tests that a win found within the horizon is stored as searched to the end. """
+        board = GenGameBoard(3)
+        board.marks = np.array([['O', 'O', ' '], ['X', 'X', ' '], ['X', ' ', ' ']])
+        table = TranspositionTable(64)
+        context = SearchContext(0, transposition_table=table)
+        self.assertEqual(board.max_value(-math.inf, math.inf, context)[0], 1000)
+        self.assertEqual(table.probe(board.position_hashes[0]).depth, math.inf)
+
+    def test_zobrist_hash_is_incremental(self):
+        """ Tests that place()/undo() keep the hash equal to a freshly computed one. """
+        test_board = GenGameBoard(3)
+        test_board.place(0, 0, 'X')
+        test_board.place(1, 1, 'O')
+        fresh_board = GenGameBoard(3)
+        fresh_board.marks = np.copy(test_board.marks)
+        self.assertEqual(fresh_board.zobrist_hash, test_board.zobrist_hash)
+
+        test_board.undo(0, 0)
+        test_board.undo(1, 1)
+        self.assertEqual(GenGameBoard(3).zobrist_hash, test_board.zobrist_hash)
+
+    @parameterized.expand([
+        ('O to move', [['X', 'O', 'X'], [' ', 'O', ' '], [' ', 'X', ' ']]),
+        ('opening reply', [[' ', ' ', ' '], [' ', 'X', ' '], [' ', ' ', ' ']]),
+        ('empty board', [[' ', ' ', ' '], [' ', ' ', ' '], [' ', ' ', ' ']])
+    ])
+    def test_search_value_unchanged(self, _test_name, marks):
+        """ Tests that a full-depth search returns the same value with and without the table. """
+        test_board = GenGameBoard(3)
+        test_board.marks = np.copy(marks)
+        saved_depth = GenGameBoard.MAX_DEPTH
+        GenGameBoard.MAX_DEPTH = 9
+        try:
+            expected = test_board.max_value(-math.inf, math.inf)[0]
+            GenGameBoard.transposition_table = TranspositionTable(1024)
+            GenGameBoard.tt_stores = 0
+            actual = test_board.max_value(-math.inf, math.inf)[0]
+        finally:
+            GenGameBoard.MAX_DEPTH = saved_depth
+        self.assertEqual(expected, actual)
+        self.assertGreater(GenGameBoard.tt_stores, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
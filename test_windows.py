@@ -0,0 +1,122 @@
+""" The unit tests for m x n boards won by k in a row. """
+import random
+import unittest
+
+from parameterized import parameterized
+import numpy as np
+
+from batch_eval import encode_marks, evaluate_batch
+from mp2 import GenGameBoard, SearchContext
+from tactics import get_fork_squares
+from windows import count_windows, get_win_lines, get_window_index
+
+# (name, rows, win_length, cols) of the boards tested
+GEOMETRIES = [
+    ('3x3 k=3', 3, 3, 3),
+    ('4x4 k=4', 4, 4, 4),
+    ('5x5 k=3', 5, 3, 5),
+    ('7x7 k=4', 7, 4, 7),
+    ('5x7 k=4', 5, 4, 7),
+    ('7x4 k=3', 7, 3, 4),
+    ('15x15 k=5', 15, 5, 15)
+]
+
+
+def play_random_moves(board, num_moves, seed):
+    """ Plays num_moves random moves on the board, X first; returns the moves. """
+    generator = random.Random(seed)
+    squares = [(row, col) for row in range(board.board_size) for col in range(board.num_cols)]
+    moves = generator.sample(squares, num_moves)
+    for number, (row, col) in enumerate(moves):
+        board.place(row, col, GenGameBoard.PLAYER if number % 2 == 0 else GenGameBoard.COMPUTER)
+    return moves
+
+
+class TestWindows(unittest.TestCase):
+    """ Will run tests against the winning windows of m x n boards and their evaluation. """
+
+    @parameterized.expand(GEOMETRIES)
+    def test_win_lines(self, _test_name, rows, win_length, cols):
+        """ Tests that every window of k squares in a row, column or diagonal is listed once. """
+        lines, lines_through = get_win_lines(rows, win_length, cols)
+        free_rows, free_cols = rows - win_length + 1, cols - win_length + 1
+        expected = rows * max(free_cols, 0) + max(free_rows, 0) * cols \
+            + 2 * max(free_rows, 0) * max(free_cols, 0)
+        self.assertEqual(expected, len(lines))
+        self.assertEqual(len(set(lines)), len(lines))
+        for index, line in enumerate(lines):
+            self.assertEqual(win_length, len(line))
+            steps = {(row - line[0][0], col - line[0][1]) for row, col in line[1:2]}
+            self.assertTrue(steps <= {(0, 1), (1, 0), (1, 1), (-1, 1)})
+            for row, col in line:
+                self.assertIn(index, lines_through[row][col])
+        self.assertLessEqual(max(len(indexes) for row in lines_through for indexes in row),
+                             4 * win_length)
+        self.assertEqual((len(lines), win_length), get_window_index(rows, win_length, cols).shape)
+
+    @parameterized.expand(GEOMETRIES)
+    def test_counts_match_batch_evaluation(self, _test_name, rows, win_length, cols):
+        """ Tests the running counts against a recount, the index table and the convolution. """
+        boards, codes = [], []
+        for seed in range(20):
+            board = GenGameBoard(rows, win_length, cols)
+            play_random_moves(board, seed * rows * cols // 20, seed)
+            boards.append(board)
+            codes.append(encode_marks(board.marks))
+        for convolution in (False, True):
+            result = evaluate_batch(codes, win_length=win_length, convolution=convolution)
+            for index, board in enumerate(boards):
+                recounted = GenGameBoard(rows, win_length, cols)
+                recounted.marks = np.copy(board.marks)
+                self.assertEqual(board.line_counts, recounted.line_counts)
+                self.assertEqual(board.est_points, recounted.est_points)
+                self.assertEqual(board.est_points, result.scores[index])
+                self.assertEqual(board.is_terminal(), result.terminal[index])
+                self.assertEqual(board.get_utility(), result.utility[index])
+
+        is_x = np.array(codes) == 1
+        flat = is_x.reshape(len(codes), -1)
+        np.testing.assert_array_equal(
+            count_windows(is_x, win_length),
+            flat[:, get_window_index(rows, win_length, cols)].sum(axis=2))
+
+    @parameterized.expand(GEOMETRIES)
+    def test_search_wins_and_blocks(self, _test_name, rows, win_length, cols):
+        """ Tests that the search completes its own k in a row, else blocks the player's. """
+        board = GenGameBoard(rows, win_length, cols)
+        for col in range(win_length - 1):
+            board.place(rows - 1, col, GenGameBoard.PLAYER)
+            board.place(0, col, GenGameBoard.COMPUTER)
+        self.assertFalse(board.is_terminal())
+        action = board.alpha_beta_search(context=SearchContext(0))
+        self.assertEqual((0, win_length - 1), tuple(action))
+
+        if rows * cols <= 49:
+            board.undo(0, 0)
+            board.place(1, cols - 1, GenGameBoard.COMPUTER)
+            action = board.alpha_beta_search(context=SearchContext(1))
+            self.assertEqual((rows - 1, win_length - 1), tuple(action))
+
+    def test_forks_need_two_squares(self):
+        """ Tests that overlapping windows needing the same square are not a fork. """
+        board = GenGameBoard(4, 4, 7)
+        for col in (0, 1, 4):
+            board.place(0, col, GenGameBoard.COMPUTER)
+        self.assertEqual([], get_fork_squares(board, GenGameBoard.COMPUTER, GenGameBoard.PLAYER))
+
+        board = GenGameBoard(4, 4, 7)
+        for col in (2, 3):
+            board.place(0, col, GenGameBoard.COMPUTER)
+        forks = get_fork_squares(board, GenGameBoard.COMPUTER, GenGameBoard.PLAYER)
+        self.assertEqual({(0, 1), (0, 4)}, set(forks))
+
+    def test_rectangular_board_symmetry(self):
+        """ Tests that a 3x5 board only merges moves under its mirrors and half turn. """
+        board = GenGameBoard(3, 3, 5)
+        self.assertEqual(6, len(board.get_actions(unique=True)))
+        board.place(0, 0, GenGameBoard.PLAYER)
+        self.assertEqual(14, len(board.get_actions(unique=True)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,395 @@
+"""
+Self-play tournaments between two engine configurations.
+
+Configuration A plays configuration B over many games, run in parallel in a
+process pool. Each configuration is a PlayerConfig: search depth, time budget,
+engine, tactical prefilter, move ordering, transposition table, search memory
+and the line weights of the evaluation. Both sides search as the computer: X's
+moves are found on a board with the marks swapped.
+
+Games come in pairs: both games of a pair start from the same random opening
+of a few plies, A moving first in one and B in the other, so neither the
+opening nor the first move favours a side. Results are streamed as the games
+finish (optionally as JSON lines to a file), with a running tally. The report
+gives A's wins, draws and losses, its mean score (win 1, draw 1/2) with a 95%
+confidence interval, the Elo difference that score implies, and the latency
+percentiles per move of each side, so a faster setting can be checked to play
+as well as a slower one:
+
+    python tournament.py --size 4 --games 1000 --a max_depth=4 --b max_depth=3,ordering=1
+    python tournament.py --geometry 7x7:4 --games 200 --a engine=mcts,playouts=2000 \\
+        --b max_depth=2 --output games.jsonl
+
+A configuration is given as name=value pairs separated by commas (see
+CONFIG_TYPES); weights are the points of a line holding 0, 1, ... k-1 marks of
+one side, as in weights=0:1:10:100 (the default evaluation is 10^count).
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import json
+import math
+import multiprocessing
+import random
+import statistics
+import time
+
+import numpy as np
+
+from batch_eval import parse_geometry
+from game_server import get_latency_stats
+from mcts import MCTSEngine
+from mp2 import GenGameBoard, SearchContext
+from mtdf import MTDFEngine
+from ordering import MoveOrderer
+from pvs import PVSEngine
+from search_memory import SearchMemory
+from transposition import TranspositionTable
+
+# Settings of one side of a tournament
+PlayerConfig = collections.namedtuple(
+    'PlayerConfig',
+    ['max_depth', 'time_ms', 'engine', 'playouts', 'prefilter', 'ordering', 'table', 'memory',
+     'weights'],
+    defaults=(GenGameBoard.MAX_DEPTH, None, 'alphabeta', None, True, False, 0, False, None))
+
+# Engines by configuration name; None searches with plain alpha-beta (max_value)
+ENGINES = {'alphabeta': None, 'pvs': PVSEngine, 'mtdf': MTDFEngine, 'mcts': MCTSEngine}
+
+# z value of the two-sided 95% confidence interval
+Z_95 = 1.959964
+
+
+def parse_flag(text):
+    """ Parses a yes/no setting: 1/0, true/false, yes/no or on/off. """
+    flags = {'1': True, 'true': True, 'yes': True, 'on': True,
+             '0': False, 'false': False, 'no': False, 'off': False}
+    if text.lower() not in flags:
+        raise ValueError(f'not a yes/no value: {text}')
+    return flags[text.lower()]
+
+
+def parse_engine(text):
+    """ Parses an engine name, one of ENGINES. """
+    if text not in ENGINES:
+        raise ValueError(f"unknown engine {text}, expected one of {', '.join(ENGINES)}")
+    return text
+
+
+# Parsers of the PlayerConfig fields given on the command line
+CONFIG_TYPES = {
+    'max_depth': int,
+    'time_ms': float,
+    'engine': parse_engine,
+    'playouts': int,
+    'prefilter': parse_flag,
+    'ordering': parse_flag,
+    'table': int,  # transposition table entries, 0 for none
+    'memory': parse_flag,  # keep the table and orderer between moves (see search_memory.py)
+    'weights': lambda text: tuple(int(weight) for weight in text.split(':'))
+}
+
+
+def parse_config(text):
+    """
+    Parses 'name=value,...' into a PlayerConfig; names left out keep their defaults.
+    """
+    settings = {}
+    for item in filter(None, text.split(',')):
+        name, _, value = item.partition('=')
+        name = name.strip().replace('-', '_')
+        if name not in CONFIG_TYPES:
+            raise argparse.ArgumentTypeError(
+                f"unknown setting {name}, expected one of {', '.join(CONFIG_TYPES)}")
+        try:
+            settings[name] = CONFIG_TYPES[name](value.strip())
+        except ValueError as error:
+            raise argparse.ArgumentTypeError(f'{name}: {error}') from error
+    return PlayerConfig(**settings)
+
+
+def format_config(config):
+    """ Returns the settings that differ from the defaults, as parse_config() reads them. """
+    defaults = PlayerConfig()._asdict()
+    changed = [f"{name}={':'.join(map(str, value)) if name == 'weights' else value}"
+               for name, value in config._asdict().items()
+               if value != defaults[name]]
+    return ','.join(changed) or 'defaults'
+
+
+class WeightedBoard(GenGameBoard):
+    """
+    Board whose evaluation scores each line by the given weight of the O count minus
+    the weight of the X count, instead of 10^(O count) - 10^(X count)
+    """
+
+    def __init__(self, board_size, win_length=None, num_cols=None, weights=None):
+        """
+        Constructor method - weights[count] are the points of a line holding count marks
+        of one side, for counts 0 to win_length - 1
+        """
+        super().__init__(board_size, win_length, num_cols)
+        self.weights = weights
+        if weights is None or len(weights) < self.win_length:
+            raise ValueError(f'{self.win_length} line weights are needed, for 0 to '
+                             f'{self.win_length - 1} marks')
+
+    def get_est_utility(self):
+        """
+        Sums the weights over every winning line. Unlike the default evaluation it is
+        not kept up to date by place()/undo(), so it takes one pass over the lines.
+        """
+        assert not self.is_terminal()
+        weights = self.weights
+        return sum(weights[num_o_in_row] - weights[num_x_in_row] for num_o_in_row, num_x_in_row
+                   in zip(self.line_counts[GenGameBoard.COMPUTER],
+                          self.line_counts[GenGameBoard.PLAYER]))
+
+
+def check_config(config, geometry):
+    """ Raises ValueError when the config cannot play on boards of the geometry. """
+    if config.weights is not None:
+        WeightedBoard(*geometry, weights=config.weights)
+    if config.max_depth < 0:
+        raise ValueError('max_depth must not be negative')
+
+
+def get_search_marks(marks, mark):
+    """ Returns a copy of the marks in which the mark to move is the computer's (O). """
+    if mark == GenGameBoard.COMPUTER:
+        return np.copy(marks)
+    return np.where(marks == GenGameBoard.PLAYER, GenGameBoard.COMPUTER,
+                    np.where(marks == GenGameBoard.COMPUTER, GenGameBoard.PLAYER, marks))
+
+
+class Player:  # pylint: disable=too-few-public-methods
+    """
+    Search state of one configuration during a game, and the time of each of its moves
+    """
+
+    def __init__(self, config, geometry, seed=None):
+        """
+        Constructor method - builds the engine, table, orderer and memory of the config
+        for boards of the geometry; seed makes MCTS playouts repeatable
+        """
+        self.config = config
+        self.geometry = geometry
+        if config.engine == 'mcts':
+            self.engine = MCTSEngine(config.playouts, seed=seed)
+        else:
+            engine_class = ENGINES[config.engine]
+            self.engine = None if engine_class is None else engine_class()
+        self.memory = None
+        self.transposition_table = None
+        self.move_orderer = None
+        if config.memory:
+            self.memory = SearchMemory(config.table or 1 << 18)
+        else:
+            if config.table:
+                self.transposition_table = TranspositionTable(config.table)
+            if config.ordering:
+                self.move_orderer = MoveOrderer(*geometry)
+        self.latencies = []  # seconds per move
+
+    def get_move(self, board, mark):
+        """ Returns the (row, col) array indexes of the config's move for the mark. """
+        if self.config.weights is None:
+            search_board = GenGameBoard(*self.geometry)
+        else:
+            search_board = WeightedBoard(*self.geometry, weights=self.config.weights)
+        search_board.marks = get_search_marks(board.marks, mark)
+        context = SearchContext(self.config.max_depth, self.transposition_table,
+                                self.move_orderer, engine=self.engine,
+                                prefilter=self.config.prefilter)
+
+        start = time.perf_counter()
+        if self.memory is not None:
+            self.memory.attach(search_board, context)
+        action = search_board.alpha_beta_search(self.config.time_ms, context)
+        self.latencies.append(time.perf_counter() - start)
+        return int(action[0]), int(action[1])
+
+
+def get_result(board, player_marks):
+    """ Returns the result of a finished game for the config playing player_marks[0]. """
+    if board.check_for_win(player_marks[0]):
+        return 'win'
+    if board.check_for_win(player_marks[1]):
+        return 'loss'
+    return 'draw'
+
+
+def get_max_opening_plies(geometry):
+    """
+    Returns the most random opening moves that cannot finish a game on boards of the
+    geometry: a side needs k marks to win, and a square must be left to play.
+    """
+    board_size, win_length, num_cols = geometry
+    return min(2 * win_length - 2, board_size * num_cols - 1)
+
+
+def play_game(geometry, configs, game, opening_plies, seed):
+    """
+    Worker task: plays game number game of a tournament between the two configs.
+    Both games of a pair (game // 2) open with the same opening_plies random moves;
+    configs[0] moves first (X) in even games and configs[1] in odd ones.
+    Returns a JSON-ready dict with the result for configs[0] ('win', 'draw' or 'loss'),
+    the opening, the number of moves and each config's seconds per move.
+    """
+    generator = random.Random(f'{seed}-{game // 2}')
+    players = [Player(config, geometry, seed=f'{seed}-{game}-{index}')
+               for index, config in enumerate(configs)]
+    player_marks = [GenGameBoard.PLAYER, GenGameBoard.COMPUTER]
+    if game % 2 == 1:
+        player_marks.reverse()
+
+    board = GenGameBoard(*geometry)
+    mark, opening = GenGameBoard.PLAYER, []
+    while not board.is_terminal():
+        if len(opening) < opening_plies:
+            row, col = (int(index) for index in generator.choice(list(board.get_actions())))
+            opening.append([row, col])
+        else:
+            row, col = players[player_marks.index(mark)].get_move(board, mark)
+        board.place(row, col, mark)
+        mark = GenGameBoard.COMPUTER if mark == GenGameBoard.PLAYER else GenGameBoard.PLAYER
+
+    plies = board.board_size * board.num_cols - board.num_empty
+    return {'game': game, 'first': game % 2, 'result': get_result(board, player_marks),
+            'plies': plies,
+            'opening': opening, 'latencies': [player.latencies for player in players]}
+
+
+def run_tournament(geometry, configs, games, workers=None, opening_plies=2, seed=0):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Plays the games between the two configs on boards of the geometry in a pool of
+    worker processes (default: one per CPU), and yields each game's play_game()
+    result as soon as the game finishes.
+    """
+    max_plies = get_max_opening_plies(geometry)
+    if not 0 <= opening_plies <= max_plies:
+        raise ValueError(f'a random opening must leave the game open: at most '
+                         f'{max_plies} plies')
+    for config in configs:
+        check_config(config, geometry)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_game, geometry, configs, game, opening_plies, seed)
+                   for game in range(games)]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def get_score_interval(wins, draws, losses, z_value=Z_95):
+    """
+    Returns (score, low, high): the mean score (win 1, draw 1/2, loss 0) and the
+    bounds of its normal-approximation confidence interval (of zero width when every
+    game ended alike, so play enough games).
+    """
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2
+                + losses * score ** 2) / games
+    margin = z_value * math.sqrt(variance / games)
+    return score, max(0.0, score - margin), min(1.0, score + margin)
+
+
+def get_elo(score):
+    """ Returns the Elo rating difference implied by a mean score (infinite at 0 or 1). """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return 400 * math.log10(score / (1 - score))
+
+
+def summarize(results):
+    """
+    Returns the tally of the results of configs[0]: games, wins, draws, losses, score
+    and Elo with their 95% intervals, and the latency statistics of each config.
+    """
+    counts = collections.Counter(result['result'] for result in results)
+    score, low, high = get_score_interval(counts['win'], counts['draw'], counts['loss'])
+    latency = []
+    for index in range(2):
+        seconds = [value for result in results for value in result['latencies'][index]]
+        stats = get_latency_stats(seconds)
+        stats['mean_ms'] = round(statistics.mean(seconds) * 1000, 3) if seconds else None
+        latency.append(stats)
+    return {'games': len(results), 'wins': counts['win'], 'draws': counts['draw'],
+            'losses': counts['loss'], 'score': score, 'score_interval': [low, high],
+            'elo': get_elo(score), 'elo_interval': [get_elo(low), get_elo(high)],
+            'latency': latency}
+
+
+def format_tally(summary):
+    """ Returns a one-line report of A's results in the summary. """
+    low, high = summary['score_interval']
+    elo_low, elo_high = summary['elo_interval']
+    return (f"{summary['games']:>6} games  A W/D/L {summary['wins']}/{summary['draws']}/"
+            f"{summary['losses']}  score {summary['score']:.3f} [{low:.3f}, {high:.3f}]  "
+            f"Elo {summary['elo']:+.0f} [{elo_low:+.0f}, {elo_high:+.0f}]")
+
+
+def format_ms(milliseconds):
+    """ Returns a latency for the report: '-' when the side made no moves. """
+    return '-' if milliseconds is None else f'{milliseconds:.2f}'
+
+
+def main():
+    """ Plays a tournament between two configurations and prints its results. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=3, help='n x n board won by n in a row')
+    parser.add_argument('--geometry', type=parse_geometry, default=None,
+                        help='m x n board won by k in a row, as MxN:K (instead of --size)')
+    parser.add_argument('--a', type=parse_config, default=PlayerConfig(),
+                        help='configuration A, as name=value,...')
+    parser.add_argument('--b', type=parse_config, default=PlayerConfig(),
+                        help='configuration B, as name=value,...')
+    parser.add_argument('--games', type=int, default=100, help='games (in pairs of colors)')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--opening-plies', type=int, default=2,
+                        help='random moves opening each pair of games')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--report-every', type=int, default=50,
+                        help='games between running tallies')
+    parser.add_argument('--output', default=None, help='file receiving every game as JSON')
+    args = parser.parse_args()
+    geometry = args.geometry or (args.size, args.size, args.size)
+
+    print(f'A: {format_config(args.a)}')
+    print(f'B: {format_config(args.b)}')
+    results = []
+    with open(args.output, 'w', encoding='utf-8') if args.output \
+            else contextlib.nullcontext() as output:
+        for result in run_tournament(geometry, (args.a, args.b), args.games, args.workers,
+                                     args.opening_plies, args.seed):
+            results.append(result)
+            if output is not None:
+                output.write(json.dumps(result) + '\n')
+                output.flush()
+            if len(results) % args.report_every == 0 and len(results) < args.games:
+                print(format_tally(summarize(results)), flush=True)
+
+    summary = summarize(results)
+    print(format_tally(summary))
+    low, high = summary['score_interval']
+    if low > 0.5:
+        print('A is stronger than B (95% confidence)')
+    elif high < 0.5:
+        print('B is stronger than A (95% confidence)')
+    else:
+        print('no difference in strength shown at 95% confidence')
+    print(f"{'':>2} {'moves':>7} {'mean ms':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+          f"{'max ms':>9}")
+    for name, stats in zip('AB', summary['latency']):
+        times = [format_ms(stats[key]) for key in ('mean_ms', 'p50_ms', 'p90_ms', 'p99_ms',
+                                                    'max_ms')]
+        print(f"{name:>2} {stats['moves']:>7} " + ' '.join(f'{time:>9}' for time in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Bounded transposition table for the alpha-beta search.
+
+Positions are keyed by the board's Zobrist hash. The table holds a fixed number
+of buckets with two slots each: a depth-preferred slot that keeps the deepest
+result seen for its bucket, and an always-replace slot that takes whatever was
+stored last. Memory therefore stays at max_entries no matter how large the board.
+
+Entries remember the generation (search) that stored them. A table kept between
+moves calls new_generation() before each search: older entries still answer
+lookups, but give up their depth-preferred slot to any result of the new search.
+
+Run this module directly to compare search nodes with and without the table:
+
+    python transposition.py --sizes 3 4 5
+"""
+
+import argparse
+import collections
+import time
+
+# Bound types of a stored value
+EXACT = 0  # the value is the exact minimax value
+LOWER_BOUND = 1  # the search failed high: the value is at least this
+UPPER_BOUND = 2  # the search failed low: the value is at most this
+
+# One stored search result
+TableEntry = collections.namedtuple('TableEntry',
+                                    ['key', 'value', 'depth', 'bound', 'best_move', 'generation'],
+                                    defaults=(0,))
+
+
+class TranspositionTable:
+    """
+    Fixed-size table of search results with depth-preferred and always-replace slots
+    """
+
+    def __init__(self, max_entries=1 << 16):
+        """
+        Constructor method - allocates max_entries slots (two per bucket)
+        """
+        self.num_buckets = max(1, max_entries // 2)
+        self.depth_slots = [None] * self.num_buckets
+        self.always_slots = [None] * self.num_buckets
+        self.generation = 0  # number of the current search, stored with each entry
+
+    def __len__(self):
+        """ Returns the number of entries currently stored. """
+        return sum(1 for entry in self.depth_slots if entry is not None) \
+            + sum(1 for entry in self.always_slots if entry is not None)
+
+    def probe(self, key):
+        """
+        Returns the TableEntry stored for the key, or None if there is none.
+        """
+        bucket = key % self.num_buckets
+        entry = self.depth_slots[bucket]
+        if entry is not None and entry.key == key:
+            return entry
+        entry = self.always_slots[bucket]
+        if entry is not None and entry.key == key:
+            return entry
+        return None
+
+    def store(self, key, value, depth, bound, best_move):
+        """
+        Stores a search result. It takes the depth-preferred slot if that slot is empty,
+        holds the same position, or holds a shallower result or one of an older
+        generation; otherwise it goes to the always-replace slot.
+        """
+        bucket = key % self.num_buckets
+        entry = TableEntry(key, value, depth, bound, best_move, self.generation)
+        current = self.depth_slots[bucket]
+        if current is None or current.key == key or current.depth <= depth \
+                or current.generation != self.generation:
+            self.depth_slots[bucket] = entry
+
+            # Keep a single copy of the position in the bucket.
+            other = self.always_slots[bucket]
+            if other is not None and other.key == key:
+                self.always_slots[bucket] = None
+        else:
+            self.always_slots[bucket] = entry
+
+    def lookup(self, key, depth, alpha, beta):
+        """
+        Returns the stored (value, best_move) for the key if it was searched to at least
+        the given depth and its bound settles the (alpha, beta) window, or None.
+        """
+        entry = self.probe(key)
+        if entry is None or entry.depth < depth:
+            return None
+        if entry.bound == EXACT \
+                or (entry.bound == LOWER_BOUND and entry.value >= beta) \
+                or (entry.bound == UPPER_BOUND and entry.value <= alpha):
+            return entry.value, entry.best_move
+        return None
+
+    def record(self, key, value, depth, alpha, beta, best_move):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Stores a fail-soft search result, classifying it against its (alpha, beta) window.
+        """
+        if value <= alpha:
+            bound = UPPER_BOUND
+        elif value >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.store(key, value, depth, bound, best_move)
+
+    def new_generation(self):
+        """ Ages the stored entries: results stored from now on may replace them. """
+        self.generation = self.generation + 1
+
+    def clear(self):
+        """ Removes every entry. """
+        self.depth_slots = [None] * self.num_buckets
+        self.always_slots = [None] * self.num_buckets
+        self.generation = 0
+
+
+# Default search depth per board size for the benchmark.
+BENCHMARK_DEPTHS = {3: 8, 4: 5, 5: 3}
+
+
+def run_search(board_size, max_depth, table, canonical=False):
+    """
+    Runs one alpha_beta_search on an empty board with the given table (or None),
+    keyed by canonical (symmetry-reduced) positions if canonical is True.
+    Returns the best action, the number of nodes visited and the elapsed seconds.
+    """
+    from mp2 import GenGameBoard, SearchContext  # pylint: disable=import-outside-toplevel
+
+    board = GenGameBoard(board_size)
+    context = SearchContext(max_depth, transposition_table=table, canonical_table_keys=canonical)
+    start = time.perf_counter()
+    action = board.alpha_beta_search(context=context)
+    return action, context.num_nodes, time.perf_counter() - start
+
+
+def main():
+    """ Compares search nodes and time with and without a transposition table. """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[3, 4, 5])
+    parser.add_argument('--depth', type=int, default=None,
+                        help='MAX_DEPTH for every size (default: per-size table)')
+    parser.add_argument('--entries', type=int, default=1 << 16, help='table entry cap')
+    parser.add_argument('--canonical', action='store_true',
+                        help='key the table by symmetry-reduced positions')
+    args = parser.parse_args()
+
+    print(f"{'n':>2} {'nodes':>9} {'time':>7} {'nodes (tt)':>11} {'time (tt)':>10} "
+          f"{'entries':>8}")
+    for board_size in args.sizes:
+        depth = args.depth if args.depth is not None else BENCHMARK_DEPTHS.get(board_size, 2)
+        _, nodes, elapsed = run_search(board_size, depth, None)
+        table = TranspositionTable(args.entries)
+        _, table_nodes, table_elapsed = run_search(board_size, depth, table, args.canonical)
+        print(f"{board_size:>2} {nodes:>9} {elapsed:>6.2f}s {table_nodes:>11} "
+              f"{table_elapsed:>9.2f}s {len(table):>8}")
+
+
+if __name__ == "__main__":
+    main()
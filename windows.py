@@ -0,0 +1,111 @@
+"""
+Winning windows of m x n boards with k in a row.
+
+A GenGameBoard of board_size (m) rows and num_cols (n) columns is won by
+win_length (k) marks in a row. Its winning lines are all the windows of k
+squares along a row, a column, a diagonal or an anti-diagonal: O(mn) of them,
+at most 4k through any square. get_win_lines() lists them once per geometry,
+and the board keeps its count of X and O marks per window up to date as moves
+are played, touching only the windows through the square played.
+
+Whole positions are counted without those running counts in two ways, each
+working on a stack of boards at once:
+
+    - get_window_index() is the (windows, k) table of the flat square indexes
+      of each window, so one gather and a sum count the marks of every window;
+    - count_windows() gets the same counts as a 2D convolution of the marks
+      with the four line kernels of length k, done as k shifted array additions.
+
+The board recounts with the index table when its marks are assigned, and
+batch_eval.py scores stacks of boards with either method.
+"""
+
+import numpy as np
+
+# Winning lines for each board geometry, built once by get_win_lines()
+WIN_LINES = {}
+
+# Window index tables for each board geometry, built once by get_window_index()
+WINDOW_INDEXES = {}
+
+# Directions of the winning lines: along a row, a column, a diagonal, an anti-diagonal
+LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (-1, 1))
+
+
+def get_win_lines(board_size, win_length=None, num_cols=None):
+    """
+    Returns the winning lines of a board with board_size rows and num_cols columns
+    (default: square) where win_length marks in a row win (default: the shorter side)
+    as (lines, lines_through). lines is a list of tuples of (row, col) positions:
+    every window of win_length squares along a row, a column, a diagonal, then an
+    anti-diagonal. lines_through[row][col] holds the indexes of the lines crossing
+    that position. An n x n board with win_length n has the 2n+2 rows, columns and
+    two diagonals, at most 4 lines per position.
+    """
+    num_cols = board_size if num_cols is None else num_cols
+    win_length = min(board_size, num_cols) if win_length is None else win_length
+    geometry = (board_size, win_length, num_cols)
+    if geometry not in WIN_LINES:
+        if not 1 <= win_length <= max(board_size, num_cols):
+            raise ValueError(f"win length {win_length} does not fit a "
+                             f"{board_size}x{num_cols} board")
+        lines = []
+        last = win_length - 1
+        for d_row, d_col in LINE_DIRECTIONS:
+            for row in range(board_size):
+                for col in range(num_cols):
+                    # Keep the windows whose last square is on the board.
+                    if 0 <= row + d_row * last < board_size and col + d_col * last < num_cols:
+                        lines.append(tuple((row + d_row * i, col + d_col * i)
+                                           for i in range(win_length)))
+
+        lines_through = [[[] for _ in range(num_cols)] for _ in range(board_size)]
+        for index, line in enumerate(lines):
+            for row, col in line:
+                lines_through[row][col].append(index)
+        lines_through = [[tuple(indexes) for indexes in row] for row in lines_through]
+
+        WIN_LINES[geometry] = (lines, lines_through)
+    return WIN_LINES[geometry]
+
+
+def get_window_index(board_size, win_length=None, num_cols=None):
+    """
+    Returns the (windows, win_length) array of the flat square indexes
+    (row * num_cols + col) of each winning line, in get_win_lines() order.
+    """
+    num_cols = board_size if num_cols is None else num_cols
+    win_length = min(board_size, num_cols) if win_length is None else win_length
+    geometry = (board_size, win_length, num_cols)
+    if geometry not in WINDOW_INDEXES:
+        lines = get_win_lines(*geometry)[0]
+        WINDOW_INDEXES[geometry] = np.array(
+            [[row * num_cols + col for row, col in line] for line in lines],
+            dtype=np.intp).reshape(-1, win_length)
+    return WINDOW_INDEXES[geometry]
+
+
+def count_windows(is_mark, win_length):
+    """
+    Returns the number of marked squares in every window of win_length squares, in
+    get_win_lines() order, for boolean arrays of shape (..., rows, cols): one 2D
+    convolution per line direction, summed as win_length shifted slices.
+    """
+    is_mark = np.asarray(is_mark, dtype=np.int16)
+    rows, cols = is_mark.shape[-2:]
+    last = win_length - 1
+    counts = []
+    for d_row, d_col in LINE_DIRECTIONS:
+        out_rows, out_cols = rows - last * abs(d_row), cols - last * d_col
+        if out_rows <= 0 or out_cols <= 0:
+            continue
+        total = 0
+        for i in range(win_length):
+            # Anti-diagonal windows start on their bottom square and go up.
+            row = i * d_row + (last if d_row < 0 else 0)
+            col = i * d_col
+            total = total + is_mark[..., row:row + out_rows, col:col + out_cols]
+        counts.append(total.reshape(is_mark.shape[:-2] + (-1,)))
+    if not counts:
+        return np.zeros(is_mark.shape[:-2] + (0,), dtype=np.int16)
+    return np.concatenate(counts, axis=-1)